@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the REST API (Django) and the reporting service (FastAPI).
+
+Runs every endpoint in ``endpoints()`` against running servers with a fixed
+number of requests and concurrency, records p50/p95/p99/mean/max latency and
+throughput, and writes a JSON report. Reports taken at different data sizes
+(see ``manage.py generate_data``) or on different commits can be compared:
+
+    python bench/bench_endpoints.py --label 300-farmers --output before.json
+    python bench/bench_endpoints.py --label 300-farmers --output after.json \
+        --compare before.json
+
+Run the reporting service with ``REPORT_CACHE_ENABLED=0`` to measure the
+queries rather than the response cache. Only the standard library is used.
+"""
+import argparse
+import json
+import platform
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Client:
+    def __init__(self, base_url, token=None, timeout=30.0):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def request(self, path, method="GET", body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        request.add_header("Accept", "application/json")
+        if data is not None:
+            request.add_header("Content-Type", "application/json")
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.read()
+
+    def json(self, path, method="GET", body=None):
+        status, payload = self.request(path, method, body)
+        if status >= 400:
+            raise RuntimeError(f"{method} {path} -> {status}: {payload[:200]!r}")
+        return json.loads(payload)
+
+
+def login(api_url, username, password):
+    client = Client(api_url)
+    tokens = client.json(
+        "/auth/token/", "POST", {"username": username, "password": password}
+    )
+    return tokens["access"]
+
+
+def first_id(client, path):
+    page = client.json(path + ("&" if "?" in path else "?") + "page_size=1")
+    results = page["results"] if isinstance(page, dict) else page
+    return results[0]["id"] if results else None
+
+
+def endpoints(api, reporting):
+    """(name, client, path) for every benchmarked endpoint, ids picked from the data."""
+    farm_id = first_id(api, "/api/farms/")
+    cow_id = first_id(api, "/api/cows/")
+    profile = api.json("/api/farmer-profiles/?page_size=1")["results"]
+    farmer_user_id = profile[0]["user_id"] if profile else None
+    farm_ids = ",".join(
+        str(farm["id"]) for farm in api.json("/api/farms/?page_size=50")["results"]
+    )
+    farmer_ids = ",".join(
+        str(p["user_id"])
+        for p in api.json("/api/farmer-profiles/?page_size=50")["results"]
+    )
+    month_ago = (date.today() - timedelta(days=30)).isoformat()
+
+    listed = [
+        ("api: farms list", api, "/api/farms/"),
+        ("api: farmer profiles list", api, "/api/farmer-profiles/"),
+        ("api: cows list", api, "/api/cows/"),
+        ("api: cows list expanded", api, "/api/cows/?expand=farm,agent"),
+        ("api: cows list tag,breed", api, "/api/cows/?fields=tag,breed"),
+        ("api: activities list", api, "/api/activities/"),
+        ("api: milk records list", api, "/api/milk-records/"),
+        (
+            "api: milk records date,liters",
+            api,
+            "/api/milk-records/?fields=date,liters",
+        ),
+        (
+            "api: milk records last 30 days",
+            api,
+            f"/api/milk-records/?date_from={month_ago}",
+        ),
+        ("api: users list", api, "/api/users/"),
+        ("reporting: summary", reporting, "/summary"),
+        ("reporting: recent activities", reporting, "/reports/activities/recent"),
+    ]
+    if cow_id is not None:
+        listed += [
+            ("api: cow detail", api, f"/api/cows/{cow_id}/"),
+            (
+                "api: milk records for cow",
+                api,
+                f"/api/milk-records/?cow_id={cow_id}",
+            ),
+        ]
+    if farm_id is not None:
+        listed += [
+            ("reporting: farm summary", reporting, f"/reports/farm/{farm_id}/summary"),
+            (
+                "reporting: farm summaries",
+                reporting,
+                f"/reports/farms/summary?ids={farm_ids}",
+            ),
+            (
+                "reporting: farm milk production",
+                reporting,
+                f"/reports/farm/{farm_id}/milk-production",
+            ),
+            (
+                "reporting: farm daily milk",
+                reporting,
+                f"/reports/farm/{farm_id}/daily-milk",
+            ),
+            (
+                "reporting: farm cow analytics",
+                reporting,
+                f"/reports/farm/{farm_id}/cow-analytics",
+            ),
+            (
+                "reporting: recent farm activities",
+                reporting,
+                f"/reports/activities/recent?farm_id={farm_id}",
+            ),
+        ]
+    if farmer_user_id is not None:
+        listed += [
+            (
+                "reporting: farmer summary",
+                reporting,
+                f"/reports/farmer/{farmer_user_id}/summary",
+            ),
+            (
+                "reporting: farmer summaries",
+                reporting,
+                f"/reports/farmers/summary?user_ids={farmer_ids}",
+            ),
+        ]
+    return listed
+
+
+def run_endpoint(client, path, requests, concurrency, warmup):
+    for _ in range(warmup):
+        client.request(path)
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def one(_):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            status, _ = client.request(path)
+        except (OSError, urllib.error.URLError):
+            status = 0
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies.append(elapsed)
+            if not 200 <= status < 300:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "max_ms": round(latencies[-1], 2),
+        "throughput_rps": round(requests / wall, 1),
+    }
+
+
+def compare(report, baseline, threshold):
+    """Print p95/throughput deltas; returns the number of regressions."""
+    regressions = 0
+    print(f"\nCompared with {baseline.get('label')} ({baseline.get('started_at')}):")
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"  {name:<40} new")
+            continue
+        change = (result["p95_ms"] - before["p95_ms"]) / max(before["p95_ms"], 0.001)
+        flag = ""
+        if change * 100 > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"  {name:<40} p95 {before['p95_ms']:>8.2f} -> {result['p95_ms']:>8.2f} ms "
+            f"({change:+.0%}), {before['throughput_rps']:>7.1f} -> "
+            f"{result['throughput_rps']:>7.1f} req/s{flag}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--reporting-url", default="http://127.0.0.1:8001")
+    parser.add_argument("--username", default="superadmin")
+    parser.add_argument("--password", default="SuperAdmin@123")
+    parser.add_argument("--requests", type=int, default=200, help="Per endpoint.")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", help="Run endpoints whose name contains this text.")
+    parser.add_argument("--label", default="", help="Free text, e.g. dataset size.")
+    parser.add_argument("--output", help="Write the JSON report here.")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=20.0,
+        help="p95 increase (percent) counted as a regression.",
+    )
+    args = parser.parse_args(argv)
+
+    api = Client(args.api_url, login(args.api_url, args.username, args.password))
+    reporting = Client(args.reporting_url)
+    report = {
+        "label": args.label,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "api_url": args.api_url,
+            "reporting_url": args.reporting_url,
+            "username": args.username,
+            "python": platform.python_version(),
+        },
+        "dataset": reporting.json("/report/summary"),
+        "results": {},
+    }
+    print(f"Dataset: {report['dataset']}")
+    for name, client, path in endpoints(api, reporting):
+        if args.only and args.only not in name:
+            continue
+        result = run_endpoint(
+            client, path, args.requests, args.concurrency, args.warmup
+        )
+        result["path"] = path
+        report["results"][name] = result
+        print(
+            f"  {name:<40} p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  "
+            f"p99 {result['p99_ms']:>8.2f} ms  {result['throughput_rps']:>7.1f} req/s"
+            + (f"  errors {result['errors']}" if result["errors"] else "")
+        )
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Wrote {args.output}")
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Compare model-serializer list output with the lean ``.values()`` list path.
+
+For each list endpoint, times fetching and shaping ``--rows`` rows the old way
+(``select_related`` queryset + ``<Model>Serializer(many=True).data``) and the
+lean way (one ``.values()`` query + ``LeanListMixin.lean_rows``), with and
+without expansions. Runs in-process against the configured database:
+
+    python bench/bench_list_serialization.py --rows 10000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "core"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from common.lean import LeanListMixin  # noqa: E402
+from farms.serializers import FarmerProfileSerializer, FarmSerializer  # noqa: E402
+from farms.views import FarmerProfileViewSet, FarmViewSet  # noqa: E402
+from livestock.serializers import ActivitySerializer, CowSerializer  # noqa: E402
+from livestock.views import ActivityViewSet, CowViewSet  # noqa: E402
+from production.serializers import MilkRecordSerializer  # noqa: E402
+from production.views import MilkRecordViewSet  # noqa: E402
+
+# (name, viewset, serializer, expansions)
+CASES = [
+    ("cows", CowViewSet, CowSerializer, ()),
+    ("cows ?expand=farm,agent", CowViewSet, CowSerializer, ("farm", "agent")),
+    ("farms", FarmViewSet, FarmSerializer, ()),
+    ("farms ?expand=agent", FarmViewSet, FarmSerializer, ("agent",)),
+    ("farmer profiles", FarmerProfileViewSet, FarmerProfileSerializer, ()),
+    (
+        "farmer profiles ?expand=user,farm",
+        FarmerProfileViewSet,
+        FarmerProfileSerializer,
+        ("user", "farm"),
+    ),
+    ("activities", ActivityViewSet, ActivitySerializer, ()),
+    ("milk records", MilkRecordViewSet, MilkRecordSerializer, ()),
+    ("milk records ?expand=cow", MilkRecordViewSet, MilkRecordSerializer, ("cow",)),
+]
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings), statistics.median(timings)
+
+
+def run_case(viewset, serializer_class, expansions, rows, repeat):
+    model = serializer_class.Meta.model
+    ordering = [f.lstrip("-") for f in viewset.keyset_ordering]
+    # The list querysets as the viewsets build them for a superuser.
+    queryset = viewset.queryset.order_by(*viewset.keyset_ordering)
+
+    def serializer_path():
+        return serializer_class(list(queryset[:rows]), many=True).data
+
+    expanded = {name: viewset.list_expansions[name] for name in expansions}
+    lookups = set(viewset.list_fields.values()) | set(ordering)
+    for columns in expanded.values():
+        lookups.update(columns.values())
+
+    def lean_path():
+        page = list(queryset.values(*lookups)[:rows])
+        return LeanListMixin.lean_rows(page, model, viewset.list_fields, expanded)
+
+    count = len(lean_path())
+    old = best_of(repeat, serializer_path)
+    new = best_of(repeat, lean_path)
+    return count, old, new
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000, help="Rows per list.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="Run cases whose name contains this text.")
+    parser.add_argument(
+        "--min-speedup",
+        type=float,
+        default=0,
+        help="Exit non-zero when a case is slower than this factor.",
+    )
+    args = parser.parse_args(argv)
+
+    failures = 0
+    print(f"{'case':<36} {'rows':>6} {'serializer':>12} {'lean':>10} {'speedup':>8}")
+    for name, viewset, serializer_class, expansions in CASES:
+        if args.only and args.only not in name:
+            continue
+        count, old, new = run_case(
+            viewset, serializer_class, expansions, args.rows, args.repeat
+        )
+        speedup = old[0] / max(new[0], 0.001)
+        flag = ""
+        if args.min_speedup and speedup < args.min_speedup:
+            flag = "  BELOW TARGET"
+            failures += 1
+        print(
+            f"{name:<36} {count:>6} {old[0]:>9.1f} ms {new[0]:>7.1f} ms "
+            f"{speedup:>7.1f}x{flag}"
+        )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Throughput of the production servers by gunicorn worker count.
+
+Starts the API (``core/gunicorn.conf.py``) or the reporting service
+(``reporting/gunicorn.conf.py``) once per entry of ``--workers`` on a spare
+port, drives one endpoint with ``--concurrency`` parallel clients and prints
+throughput and latency per worker count, relative to the first:
+
+    python bench/bench_workers.py --service api --workers 1,2,4,8
+    python bench/bench_workers.py --service reporting --workers 1,2,4 \
+        --path /reports/farm/1/daily-milk --output workers.json
+
+The servers read the same ``.env`` as in production; anything else set in the
+environment (e.g. ``REPORT_CACHE_ENABLED=0``, ``DB_POOL=1``) is passed through.
+Throughput only scales up to the number of cores the host (and PostgreSQL)
+can give the workers, so run it on a machine sized like production.
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench_endpoints import Client, login, run_endpoint
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+SERVICES = {
+    # config file, env prefix, health path, default benchmarked path
+    "api": ("core/gunicorn.conf.py", "WEB", "/healthz/", "/api/cows/"),
+    "reporting": (
+        "reporting/gunicorn.conf.py",
+        "REPORTING",
+        "/health",
+        "/report/summary",
+    ),
+}
+
+
+def start_server(service, workers, port):
+    conf, prefix, health, _ = SERVICES[service]
+    env = dict(
+        os.environ,
+        **{
+            f"{prefix}_WORKERS": str(workers),
+            f"{prefix}_BIND": f"127.0.0.1:{port}",
+            f"{prefix}_ACCESS_LOG": "",
+            f"{prefix}_LOG_LEVEL": "warning",
+        },
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", str(REPO_ROOT / conf)], env=env
+    )
+    client = Client(f"http://127.0.0.1:{port}", timeout=5)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            if client.request(health)[0] == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"{service} did not answer {health} within 30s")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--service", choices=sorted(SERVICES), default="api")
+    parser.add_argument(
+        "--workers", default="1,2,4", help="Comma-separated worker counts."
+    )
+    parser.add_argument("--path", help="Endpoint to load (default per service).")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--username", default="superadmin")
+    parser.add_argument("--password", default="SuperAdmin@123")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--output", help="Write the JSON report here.")
+    args = parser.parse_args(argv)
+
+    path = args.path or SERVICES[args.service][3]
+    worker_counts = [int(n) for n in args.workers.split(",")]
+    base_url = f"http://127.0.0.1:{args.port}"
+    report = {
+        "service": args.service,
+        "path": path,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+        },
+        "results": {},
+    }
+    print(f"{args.service} {path}, {os.cpu_count()} CPUs")
+    token = None
+    for workers in worker_counts:
+        process = start_server(args.service, workers, args.port)
+        try:
+            if args.service == "api" and token is None:
+                token = login(base_url, args.username, args.password)
+            client = Client(base_url, token)
+            result = run_endpoint(
+                client, path, args.requests, args.concurrency, args.warmup
+            )
+        finally:
+            stop_server(process)
+        report["results"][str(workers)] = result
+        first = report["results"][str(worker_counts[0])]["throughput_rps"]
+        print(
+            f"  {workers:>3} workers  {result['throughput_rps']:>8.1f} req/s "
+            f"(x{result['throughput_rps'] / first:.2f})  p50 {result['p50_ms']:>8.2f}  "
+            f"p95 {result['p95_ms']:>8.2f} ms"
+            + (f"  errors {result['errors']}" if result["errors"] else "")
+        )
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""JWT authentication from token claims instead of the ``User`` row.
+
+simplejwt's ``JWTAuthentication`` loads the ``User`` row on every request,
+although permissions and role scoping only read ``id``, ``role``,
+``is_staff`` and ``is_superuser``. Tokens issued by
+:class:`TokenObtainPairSerializer` carry those as claims, together with the
+user's ``token_version``, and :class:`StatelessJWTAuthentication` turns them
+into a :class:`ClaimsUser` without touching the database.
+
+Revocation: changing a user's role, flags, password or active status bumps
+``User.token_version`` (see ``accounts.models``), and tokens (access and
+refresh) carrying an older version are refused. The current version is cached
+for ``JWT_VERSION_CACHE_SECONDS`` and dropped on commit of such a change, so
+claims-only requests need no query at all.
+
+That drop has to reach every worker, so the claims path requires a shared
+``DJANGO_CACHE_BACKEND``. With the per-process default, requests are
+authenticated the stateful way: one load of the user row, whose
+``token_version`` is compared with the token's, and no extra query.
+
+Code that needs more than the claims (``user.username``,
+``user.farmer_profile``, ...) gets the full row transparently; those loads go
+through a small per-process LRU cache (``JWT_USER_CACHE_SIZE`` users for
+``JWT_USER_CACHE_SECONDS``). Tokens without the claims, issued before this
+mode, are still authenticated the stateful way.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.cache import is_shared as shared_cache
+from common.routers import use_primary
+
+from .models import User
+
+VERSION_CLAIM = "ver"
+CLAIMS = ("role", "is_staff", "is_superuser")
+VERSION_KEY = "token-version:{}"
+
+
+def add_claims(token, user):
+    token["role"] = user.role
+    token["is_staff"] = user.is_staff
+    token["is_superuser"] = user.is_superuser
+    token[VERSION_CLAIM] = user.token_version
+    return token
+
+
+def current_version(user_id):
+    """The user's ``token_version``, or ``None`` for a missing or inactive user.
+
+    Only cached in a shared cache: ``revoke`` cannot reach the memory of other
+    worker processes. With a per-process cache only token refreshes call this.
+    """
+    key = VERSION_KEY.format(user_id)
+    shared = shared_cache()
+    version = cache.get(key) if shared else None
+    if version is None:
+        with use_primary():
+            version = (
+                User.objects.filter(pk=user_id, is_active=True)
+                .values_list("token_version", flat=True)
+                .first()
+            )
+        # -1 caches "no such active user" as well.
+        version = -1 if version is None else version
+        if shared:
+            cache.set(key, version, settings.JWT_VERSION_CACHE_SECONDS)
+    return None if version < 0 else version
+
+
+def revoke(user_id):
+    """Drop the cached version once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(VERSION_KEY.format(user_id)))
+    _users.discard(user_id)
+
+
+def check_version(token, version=None):
+    """Refuse ``token`` unless it carries the user's current ``version``."""
+    if version is None:
+        version = current_version(token[api_settings.USER_ID_CLAIM])
+    if version is None or token[VERSION_CLAIM] != version:
+        raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+
+
+class _UserCache:
+    """Thread-safe LRU of full ``User`` rows, keyed by id and token version."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id, version):
+        key = (user_id, version)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+        with use_primary():
+            user = User.objects.filter(pk=user_id).first()
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        with self._lock:
+            self._entries[key] = (now + settings.JWT_USER_CACHE_SECONDS, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.JWT_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+        return user
+
+    def discard(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+
+_users = _UserCache()
+
+
+class ClaimsUser:
+    """The request user as described by the token's claims.
+
+    Behaves like ``accounts.User`` for permission checks (``Roles`` is the
+    model's). Any other attribute is read from the full row, loaded on first
+    use through the LRU cache.
+    """
+
+    Roles = User.Roles
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+
+    def __init__(self, token):
+        # simplejwt stores the id as a string.
+        self.id = self.pk = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        self.role = token["role"]
+        self.is_staff = token["is_staff"]
+        self.is_superuser = token["is_superuser"]
+        self.token_version = token[VERSION_CLAIM]
+        self._user = None
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._user is None:
+            self._user = _users.get(self.id, self.token_version)
+        return getattr(self._user, name)
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.pk and isinstance(
+            other, (ClaimsUser, User)
+        )
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return f"user {self.id} ({self.role})"
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` building the user from the token's claims.
+
+    Falls back to loading the row (see the module docstring) for tokens
+    without the claims and when the cache is per-process.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if not shared_cache() or any(
+            name not in validated_token for name in (*CLAIMS, VERSION_CLAIM)
+        ):
+            user = super().get_user(validated_token)
+            if VERSION_CLAIM in validated_token:
+                check_version(validated_token, user.token_version)
+            return user
+        check_version(validated_token)
+        return ClaimsUser(validated_token)
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    """Login: the role claims and token version go into both tokens."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """Refresh: refused once the refresh token's version is outdated."""
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs["refresh"])
+        if VERSION_CLAIM in refresh:
+            check_version(refresh)
+        return super().validate(attrs)
@@ -0,0 +1,246 @@
+import math
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from farms import report_cache
+from farms.models import Farm, FarmerProfile
+from livestock.models import Activity, Cow
+from production import partitions, rollup
+from production.models import MilkRecord
+
+DISTRICTS = [
+    "Rajshahi",
+    "Sunamganj",
+    "Bogura",
+    "Sirajganj",
+    "Pabna",
+    "Mymensingh",
+    "Tangail",
+    "Kushtia",
+    "Jessore",
+    "Rangpur",
+]
+BREEDS = ["Holstein Friesian", "Sahiwal", "Red Chittagong", "Jersey", "Local Cross"]
+ACTIVITY_TYPES = [
+    (Activity.Types.HEALTH, 5),
+    (Activity.Types.VACCINATION, 3),
+    (Activity.Types.OTHER, 2),
+    (Activity.Types.BIRTH, 1),
+]
+# Share of days without a milk record (dry days, missed entries).
+MISSING_DAY_RATE = 0.03
+
+CLEAR_SQL = [
+    """
+    DELETE FROM production_milkrecord mr USING livestock_cow c, farms_farm f
+    WHERE mr.cow_id = c.id AND c.farm_id = f.id AND f.name LIKE %(farms)s
+    """,
+    """
+    DELETE FROM livestock_activity a USING livestock_cow c, farms_farm f
+    WHERE a.cow_id = c.id AND c.farm_id = f.id AND f.name LIKE %(farms)s
+    """,
+    """
+    DELETE FROM livestock_cow c USING farms_farm f
+    WHERE c.farm_id = f.id AND f.name LIKE %(farms)s
+    """,
+    """
+    DELETE FROM farms_farmerprofile fp USING accounts_user u
+    WHERE fp.user_id = u.id AND u.username LIKE %(users)s
+    """,
+    "DELETE FROM farms_farm WHERE name LIKE %(farms)s",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset (agents, farms, farmers, cows and daily "
+        "milk/activity history) with bulk inserts, for load testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--farms", type=int, default=10)
+        parser.add_argument("--farmers", type=int, default=100)
+        parser.add_argument("--cows-per-farmer", type=int, default=5)
+        parser.add_argument(
+            "--years", type=float, default=1.0, help="Days of milk history / 365."
+        )
+        parser.add_argument(
+            "--activities-per-year", type=int, default=6, help="Per cow."
+        )
+        parser.add_argument("--farms-per-agent", type=int, default=5)
+        parser.add_argument(
+            "--prefix",
+            default="syn",
+            help="Prefix for generated usernames and farm names.",
+        )
+        parser.add_argument("--password", default="Synthetic@123")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete data generated earlier with the same prefix first.",
+        )
+
+    def handle(self, *args, **options):
+        if options["farms"] < 1 or options["farmers"] < 1:
+            raise CommandError("--farms and --farmers must be at least 1.")
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        prefix = options["prefix"]
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            if options["clear"]:
+                self._clear(prefix)
+            elif User.objects.filter(username__startswith=f"{prefix}_").exists():
+                raise CommandError(
+                    f"Data with prefix '{prefix}' exists; use --clear or another --prefix."
+                )
+            password = make_password(options["password"])
+            farms = self._farms(prefix, options, password)
+            profiles = self._farmers(prefix, options, farms, password)
+            cows = self._cows(prefix, options, profiles)
+            milk = self._milk(cows, options["years"])
+            activities = self._activities(cows, options)
+            rollup.rebuild()
+            report_cache.invalidate(farm_ids=[farm.id for farm in farms])
+        # Fresh planner statistics, so EXPLAIN/benchmarks see realistic plans.
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(farms)} farms, {len(profiles)} farmers, "
+                f"{len(cows)} cows, {milk} milk records and {activities} "
+                f"activities in {elapsed:.1f}s."
+            )
+        )
+
+    def _clear(self, prefix):
+        params = {"farms": f"{prefix} Farm %", "users": f"{prefix}\\_%"}
+        with connection.cursor() as cursor:
+            for sql in CLEAR_SQL:
+                cursor.execute(sql, params)
+        User.objects.filter(username__startswith=f"{prefix}_").delete()
+
+    def _farms(self, prefix, options, password):
+        agent_count = math.ceil(options["farms"] / max(1, options["farms_per_agent"]))
+        agents = User.objects.bulk_create(
+            User(
+                username=f"{prefix}_agent_{i}",
+                email=f"{prefix}.agent{i}@farmhub.bd",
+                role=User.Roles.AGENT,
+                password=password,
+            )
+            for i in range(1, agent_count + 1)
+        )
+        return Farm.objects.bulk_create(
+            Farm(
+                name=f"{prefix} Farm {i}",
+                location=f"{self.rng.choice(DISTRICTS)}, Bangladesh",
+                agent_id=agents[(i - 1) % len(agents)].id,
+            )
+            for i in range(1, options["farms"] + 1)
+        )
+
+    def _farmers(self, prefix, options, farms, password):
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f"{prefix}_farmer_{i}",
+                    email=f"{prefix}.farmer{i}@farmhub.bd",
+                    role=User.Roles.FARMER,
+                    password=password,
+                )
+                for i in range(1, options["farmers"] + 1)
+            ),
+            batch_size=self.batch_size,
+        )
+        return FarmerProfile.objects.bulk_create(
+            (
+                FarmerProfile(user_id=user.id, farm_id=farms[i % len(farms)].id)
+                for i, user in enumerate(users)
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def _cows(self, prefix, options, profiles):
+        today = timezone.localdate()
+        return Cow.objects.bulk_create(
+            (
+                Cow(
+                    tag=f"{prefix.upper()}-{profile.id}-{j}",
+                    breed=self.rng.choice(BREEDS),
+                    dob=today - timedelta(days=self.rng.randint(2 * 365, 8 * 365)),
+                    farm_id=profile.farm_id,
+                    owner_id=profile.id,
+                )
+                for profile in profiles
+                for j in range(1, options["cows_per_farmer"] + 1)
+            ),
+            batch_size=self.batch_size,
+        )
+
+    def _milk(self, cows, years):
+        """Daily yields with a per-cow baseline, a yearly cycle and noise."""
+        days = max(1, int(years * 365))
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+        with connection.cursor() as cursor:
+            if partitions.is_partitioned(cursor):
+                # History would otherwise land in the default partition.
+                interval = partitions.detect_interval(cursor) or "month"
+                partitions.create_partitions(cursor, start, end, interval)
+        total = 0
+        batch = []
+        for cow in cows:
+            base = self.rng.uniform(6.0, 18.0)
+            phase = self.rng.uniform(0, 2 * math.pi)
+            for offset in range(days):
+                if self.rng.random() < MISSING_DAY_RATE:
+                    continue
+                day = start + timedelta(days=offset)
+                seasonal = 1 + 0.15 * math.sin(2 * math.pi * offset / 365 + phase)
+                liters = max(0.5, base * seasonal + self.rng.gauss(0, 0.8))
+                batch.append(
+                    MilkRecord(
+                        cow_id=cow.id,
+                        date=day,
+                        liters=Decimal(f"{liters:.2f}"),
+                    )
+                )
+                if len(batch) >= self.batch_size:
+                    MilkRecord.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+        if batch:
+            MilkRecord.objects.bulk_create(batch)
+            total += len(batch)
+        return total
+
+    def _activities(self, cows, options):
+        days = max(1, int(options["years"] * 365))
+        per_cow = max(0, round(options["activities_per_year"] * options["years"]))
+        types, weights = zip(*ACTIVITY_TYPES)
+        end = timezone.localdate()
+        activities = (
+            Activity(
+                cow_id=cow.id,
+                type=self.rng.choices(types, weights)[0],
+                notes="Synthetic",
+                date=end - timedelta(days=self.rng.randrange(days)),
+            )
+            for cow in cows
+            for _ in range(per_cow)
+        )
+        return len(Activity.objects.bulk_create(activities, batch_size=self.batch_size))
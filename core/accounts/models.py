@@ -1,19 +1,36 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from common.tracking import LoadedValuesMixin
 
 
-class User(AbstractUser):
+class User(LoadedValuesMixin, AbstractUser):
 	class Roles(models.TextChoices):
 		SUPERADMIN = 'SUPERADMIN', 'SuperAdmin'
 		AGENT = 'AGENT', 'Agent'
 		FARMER = 'FARMER', 'Farmer'
 
+	# Changing any of these revokes the user's issued JWTs.
+	TOKEN_FIELDS = ("role", "is_active", "is_staff", "is_superuser", "password")
+
 	role = models.CharField(
 		max_length=20,
 		choices=Roles.choices,
 		default=Roles.FARMER,
 		help_text="Role of the user in the system"
 	)
+	# Copied into issued tokens and checked by accounts.authentication.
+	token_version = models.PositiveIntegerField(default=0, editable=False)
+
+	def save(self, *args, **kwargs):
+		loaded = getattr(self, "_loaded_values", None)
+		if loaded is not None and any(
+			loaded.get(name) != getattr(self, name) for name in self.TOKEN_FIELDS
+		):
+			self.token_version += 1
+			update_fields = kwargs.get("update_fields")
+			if update_fields is not None:
+				kwargs["update_fields"] = {*update_fields, "token_version"}
+		super().save(*args, **kwargs)
 
 	def __str__(self) -> str:
 		return f"{self.username} ({self.get_role_display()})"
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from .models import User
+from common.metrics import TimedSerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     # Write-only password field for create/update; never returned
     password = serializers.CharField(write_only=True, required=False, allow_blank=False)
 
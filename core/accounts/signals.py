@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common import access
+from . import authentication
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def revoke_tokens_on_user_change(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    if loaded.get("token_version") == instance.token_version:
+        return
+    authentication.revoke(instance.pk)
+    # The cached access scope carries the role and flags too.
+    access.invalidate(user_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=User)
+def revoke_tokens_on_user_delete(sender, instance, **kwargs):
+    authentication.revoke(instance.pk)
+    access.invalidate(user_ids=[instance.pk])
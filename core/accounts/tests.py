@@ -1,3 +1,117 @@
-from django.test import TestCase
+import os
+import tempfile
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test.utils import override_settings
+from rest_framework.test import APITestCase
+
+from accounts.authentication import TokenObtainPairSerializer
+from accounts.models import User
+from farms.models import Farm, FarmerProfile
+from livestock.models import Cow
+
+SHARED_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "farmhub-accounts-tests"),
+    }
+}
+PER_PROCESS_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+class AuthTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = User.objects.create_user(
+            "agent", password="Agent@123", role=User.Roles.AGENT
+        )
+        farmer = User.objects.create_user("farmer", role=User.Roles.FARMER)
+        farm = Farm.objects.create(name="Farm", location="Sylhet", agent=cls.agent)
+        profile = FarmerProfile.objects.create(user=farmer, farm=farm)
+        cls.cow = Cow.objects.create(tag="C-1", farm=farm, owner=profile)
+
+    def setUp(self):
+        cache.clear()
+        self.refresh = TokenObtainPairSerializer.get_token(self.agent)
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}"
+        )
+
+    def get_cow(self):
+        return self.client.get(f"/api/cows/{self.cow.id}/")
+
+    def change_agent(self, **changes):
+        # A fresh instance, so the model sees which token fields changed.
+        user = User.objects.get(pk=self.agent.pk)
+        for name, value in changes.items():
+            setattr(user, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def assertRevoked(self, response, code="token_revoked"):
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], code)
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class StatelessAuthTests(AuthTestCase):
+    def test_requests_are_authorized_from_the_claims(self):
+        # The token version is read once, then served from the cache.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_cow().status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_cow().status_code, 200)
+
+    def test_role_change_revokes_issued_tokens(self):
+        self.assertEqual(self.get_cow().status_code, 200)
+        self.change_agent(role=User.Roles.FARMER)
+        self.assertRevoked(self.get_cow())
+
+    def test_deactivation_revokes_issued_tokens(self):
+        self.assertEqual(self.get_cow().status_code, 200)
+        self.change_agent(is_active=False)
+        self.assertRevoked(self.get_cow())
+
+    def test_other_changes_keep_tokens_valid(self):
+        self.assertEqual(self.get_cow().status_code, 200)
+        self.change_agent(first_name="Rahim")
+        self.assertEqual(self.get_cow().status_code, 200)
+
+    def test_refresh_is_refused_after_a_password_change(self):
+        response = self.client.post(
+            "/auth/token/refresh/", {"refresh": str(self.refresh)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.change_agent(password="changed")
+        response = self.client.post(
+            "/auth/token/refresh/", {"refresh": str(self.refresh)}
+        )
+        self.assertRevoked(response)
+
+
+@override_settings(CACHES=PER_PROCESS_CACHE)
+class PerProcessCacheAuthTests(AuthTestCase):
+    def test_requests_load_the_user_row(self):
+        # Revocations could not reach other workers: no claims-only path, and
+        # the row's version is checked without a query of its own.
+        for _ in range(2):
+            with self.assertNumQueries(2):
+                self.assertEqual(self.get_cow().status_code, 200)
+
+    def test_role_change_revokes_issued_tokens(self):
+        self.assertEqual(self.get_cow().status_code, 200)
+        self.change_agent(role=User.Roles.FARMER)
+        self.assertRevoked(self.get_cow())
+
+    def test_deactivation_refuses_the_user(self):
+        self.change_agent(is_active=False)
+        self.assertRevoked(self.get_cow(), code="user_inactive")
+
+    def test_refresh_is_refused_after_a_role_change(self):
+        self.change_agent(role=User.Roles.FARMER)
+        response = self.client.post(
+            "/auth/token/refresh/", {"refresh": str(self.refresh)}
+        )
+        self.assertRevoked(response)
@@ -2,6 +2,7 @@ from rest_framework import viewsets
 from rest_framework.permissions import BasePermission, IsAuthenticated
 from .models import User
 from .serializers import UserSerializer
+from common.routers import ReplicaReadsMixin
 
 
 class IsSuperAdminOrStaff(BasePermission):
@@ -19,7 +20,8 @@ class IsSuperAdminOrStaff(BasePermission):
             return False
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ReplicaReadsMixin, viewsets.ModelViewSet):
     queryset = User.objects.all().order_by("-date_joined")
     serializer_class = UserSerializer
+    keyset_ordering = ("-date_joined", "-id")
     permission_classes = [IsAuthenticated, IsSuperAdminOrStaff]
@@ -0,0 +1,346 @@
+"""Per-user access scope shared by viewsets, permissions and serializers.
+
+``get_access_scope(request)`` loads the farms an agent manages (with their
+farmer profiles), the farmer profile of a farmer, and the ids of the cows the
+user may touch. It is computed once per request and kept in the Django cache
+for ``ACCESS_SCOPE_CACHE_SECONDS``; ownership changes (farms, farmer profiles,
+cows) drop the cached scopes of the affected users once their transaction
+commits. Bulk writes that skip model signals must call :func:`invalidate`.
+
+Those drops only reach other worker processes through a shared cache backend.
+With a per-process one (the default ``LocMemCache``), cached scopes serve
+reads only. Write requests then get a :class:`LiveAccessScope`, which answers
+each check with one indexed query on the ids in the request instead of loading
+everything the user manages.
+"""
+
+import threading
+from functools import cached_property
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+from common.cache import is_shared as shared_cache
+from common.routers import use_primary
+
+_pending = threading.local()
+
+CACHE_KEY = "access-scope:{}"
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class AccessScope:
+    """Role flags plus the farm, farmer profile and cow ids a user may touch.
+
+    Staff/superusers are unrestricted and carry no id sets; callers must keep
+    querying the database to check that ids exist for them.
+    """
+
+    def __init__(
+        self,
+        user_id,
+        role=None,
+        is_staff=False,
+        is_superuser=False,
+        farm_ids=(),
+        profile_farms=None,
+        farmer_profile_id=None,
+        cow_ids=(),
+    ):
+        self.user_id = user_id
+        self.role = role
+        self.is_staff = is_staff
+        self.is_superuser = is_superuser
+        self.farm_ids = frozenset(farm_ids)
+        # farmer profile id -> farm id, for every profile the user may assign
+        self.profile_farms = dict(profile_farms or {})
+        self.farmer_profile_id = farmer_profile_id
+        self.cow_ids = frozenset(cow_ids)
+
+    @property
+    def farmer_farm_id(self):
+        return self.profile_farms.get(self.farmer_profile_id)
+
+    def manages_farm(self, farm_id):
+        return _as_int(farm_id) in self.farm_ids
+
+    def can_access_cow(self, cow_id):
+        return _as_int(cow_id) in self.cow_ids
+
+    def profile_in_farm(self, profile_id, farm_id):
+        farm = self.profile_farms.get(_as_int(profile_id))
+        return farm is not None and farm == _as_int(farm_id)
+
+    def can_assign_profile(self, profile_id):
+        return _as_int(profile_id) in self.profile_farms
+
+    def accessible_cows(self, cow_ids):
+        """The subset of ``cow_ids`` the user may touch."""
+        return set(cow_ids) & self.cow_ids
+
+    def to_cache(self):
+        return {
+            "user_id": self.user_id,
+            "role": self.role,
+            "is_staff": self.is_staff,
+            "is_superuser": self.is_superuser,
+            "farm_ids": self.farm_ids,
+            "profile_farms": self.profile_farms,
+            "farmer_profile_id": self.farmer_profile_id,
+            "cow_ids": self.cow_ids,
+        }
+
+    @classmethod
+    def load(cls, user):
+        live = LiveAccessScope(user)
+        base = {
+            "user_id": live.user_id,
+            "role": live.role,
+            "is_staff": live.is_staff,
+            "is_superuser": live.is_superuser,
+        }
+        if live.is_staff or live.is_superuser or not (live.is_agent or live.is_farmer):
+            return cls(**base)
+        if live.is_farmer and live.farmer_profile_id is None:
+            return cls(**base)
+        return cls(
+            **base,
+            farm_ids=live.farm_ids,
+            profile_farms=live.profile_farms,
+            farmer_profile_id=live.farmer_profile_id,
+            cow_ids=live.cow_ids,
+        )
+
+
+class LiveAccessScope:
+    """:class:`AccessScope` answered by queries on the ids being checked.
+
+    Each check is one ``exists()`` on an indexed lookup, memoized for the
+    request, so authorizing a write does not depend on the size of the user's
+    herd. The id sets are only loaded when a caller (the bulk endpoints) asks
+    for them.
+    """
+
+    def __init__(self, user):
+        Roles = getattr(user.__class__, "Roles", None)
+        self.user_id = user.id
+        self.role = getattr(user, "role", None)
+        self.is_staff = getattr(user, "is_staff", False)
+        self.is_superuser = getattr(user, "is_superuser", False)
+        self.is_agent = bool(Roles) and self.role == Roles.AGENT
+        self.is_farmer = bool(Roles) and self.role == Roles.FARMER
+        self._checks = {}
+
+    def _exists(self, key, queryset):
+        if key not in self._checks:
+            with use_primary():
+                self._checks[key] = queryset.exists()
+        return self._checks[key]
+
+    @cached_property
+    def _profile(self):
+        from farms.models import FarmerProfile
+
+        if not self.is_farmer:
+            return None
+        with use_primary():
+            return (
+                FarmerProfile.objects.filter(user_id=self.user_id)
+                .values_list("id", "farm_id")
+                .first()
+            )
+
+    @property
+    def farmer_profile_id(self):
+        return self._profile[0] if self._profile else None
+
+    @property
+    def farmer_farm_id(self):
+        return self._profile[1] if self._profile else None
+
+    @cached_property
+    def farm_ids(self):
+        from farms.models import Farm
+
+        if self.is_agent:
+            with use_primary():
+                return frozenset(
+                    Farm.objects.filter(agent_id=self.user_id).values_list(
+                        "id", flat=True
+                    )
+                )
+        return frozenset([self.farmer_farm_id]) if self._profile else frozenset()
+
+    @cached_property
+    def profile_farms(self):
+        from farms.models import FarmerProfile
+
+        if self.is_agent:
+            with use_primary():
+                return dict(
+                    FarmerProfile.objects.filter(
+                        farm__agent_id=self.user_id
+                    ).values_list("id", "farm_id")
+                )
+        return dict([self._profile]) if self._profile else {}
+
+    @cached_property
+    def cow_ids(self):
+        return frozenset(self._cows().values_list("id", flat=True))
+
+    def _cows(self):
+        from livestock.models import Cow
+
+        if self.is_agent:
+            return Cow.objects.filter(farm__agent_id=self.user_id)
+        if self.is_farmer:
+            return Cow.objects.filter(owner__user_id=self.user_id)
+        return Cow.objects.none()
+
+    def manages_farm(self, farm_id):
+        from farms.models import Farm
+
+        farm_id = _as_int(farm_id)
+        if farm_id is None:
+            return False
+        if self.is_agent:
+            return self._exists(
+                ("farm", farm_id),
+                Farm.objects.filter(id=farm_id, agent_id=self.user_id),
+            )
+        return farm_id == self.farmer_farm_id
+
+    def can_access_cow(self, cow_id):
+        cow_id = _as_int(cow_id)
+        if cow_id is None:
+            return False
+        return self._exists(("cow", cow_id), self._cows().filter(id=cow_id))
+
+    def profile_in_farm(self, profile_id, farm_id):
+        from farms.models import FarmerProfile
+
+        profile_id, farm_id = _as_int(profile_id), _as_int(farm_id)
+        if profile_id is None or farm_id is None:
+            return False
+        if self.is_agent:
+            found = self._exists(
+                ("profile", profile_id, farm_id),
+                FarmerProfile.objects.filter(
+                    id=profile_id, farm_id=farm_id, farm__agent_id=self.user_id
+                ),
+            )
+            if found:
+                self._checks[("profile", profile_id)] = True
+            return found
+        return self._profile == (profile_id, farm_id)
+
+    def can_assign_profile(self, profile_id):
+        from farms.models import FarmerProfile
+
+        profile_id = _as_int(profile_id)
+        if profile_id is None:
+            return False
+        if self.is_agent:
+            return self._exists(
+                ("profile", profile_id),
+                FarmerProfile.objects.filter(
+                    id=profile_id, farm__agent_id=self.user_id
+                ),
+            )
+        return profile_id == self.farmer_profile_id
+
+    def accessible_cows(self, cow_ids):
+        """The subset of ``cow_ids`` the user may touch (one query)."""
+        with use_primary():
+            return set(self._cows().filter(id__in=cow_ids).values_list("id", flat=True))
+
+
+def get_access_scope(request):
+    """Return the (request-memoized, cross-request cached) scope of ``request.user``.
+
+    A :class:`LiveAccessScope` for writes when the cache is per process.
+    """
+    scope = getattr(request, "_access_scope", None)
+    if scope is not None:
+        return scope
+    user = request.user
+    timeout = settings.ACCESS_SCOPE_CACHE_SECONDS
+    key = CACHE_KEY.format(user.id)
+    # Writes are authorized from the scope; a per-process cache is not cleared
+    # when another worker changes ownership, so writes then check the database.
+    if not (request.method in SAFE_METHODS or shared_cache()):
+        request._access_scope = LiveAccessScope(user)
+        return request._access_scope
+    cached = cache.get(key) if timeout else None
+    if cached is not None:
+        scope = AccessScope(**cached)
+    else:
+        # Cached for other requests, so never built from a lagging replica.
+        with use_primary():
+            scope = AccessScope.load(user)
+        if timeout:
+            cache.set(key, scope.to_cache(), timeout)
+    request._access_scope = scope
+    return scope
+
+
+def serializer_scope(serializer):
+    """Scope of the serializer's request user, or ``None`` outside an authenticated request."""
+    request = serializer.context.get("request")
+    user = getattr(request, "user", None)
+    if user is None or not getattr(user, "is_authenticated", False):
+        return None
+    return get_access_scope(request)
+
+
+def _state():
+    if not hasattr(_pending, "user_ids"):
+        _pending.user_ids = set()
+        _pending.farm_ids = set()
+        _pending.profile_ids = set()
+    return _pending
+
+
+def unchanged(instance, loaded, signal_kwargs, fields):
+    """True for a ``post_save`` update that left every ownership field in ``fields`` as loaded."""
+    if signal_kwargs.get("created") is not False:
+        return False
+    return all(loaded.get(field) == getattr(instance, field) for field in fields)
+
+
+def invalidate(user_ids=(), farm_ids=(), profile_ids=()):
+    """Drop cached scopes after commit for these users, farms' agents and profiles' users."""
+    state = _state()
+    state.user_ids.update(i for i in user_ids if i is not None)
+    state.farm_ids.update(i for i in farm_ids if i is not None)
+    state.profile_ids.update(i for i in profile_ids if i is not None)
+    transaction.on_commit(flush)
+
+
+def flush():
+    state = _state()
+    user_ids, farm_ids, profile_ids = (
+        state.user_ids,
+        state.farm_ids,
+        state.profile_ids,
+    )
+    if not user_ids and not farm_ids and not profile_ids:
+        return
+    state.user_ids, state.farm_ids, state.profile_ids = set(), set(), set()
+    if farm_ids or profile_ids:
+        from farms.models import Farm, FarmerProfile
+
+        agents = Farm.objects.filter(id__in=farm_ids).values_list("agent_id")
+        owners = FarmerProfile.objects.filter(id__in=profile_ids).values_list("user_id")
+        user_ids |= {
+            user_id for (user_id,) in agents.union(owners) if user_id is not None
+        }
+    cache.delete_many([CACHE_KEY.format(user_id) for user_id in user_ids])
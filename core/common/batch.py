@@ -0,0 +1,137 @@
+"""``POST /api/batch/``: several API calls in one round trip.
+
+Mobile clients start up with a dozen independent reads (farms, profile, cows,
+recent activities and milk). Sent as one batch, they pay for one HTTP round
+trip, one JWT validation and user lookup, and run on the same database
+connection::
+
+    {"requests": [
+        {"method": "GET", "path": "/api/cows/?page_size=100"},
+        {"method": "GET", "path": "/api/milk-records/?date_from=2025-01-01"},
+        {"method": "POST", "path": "/api/activities/", "body": {...}}
+    ]}
+
+Sub-requests run in order, as the batch's user, through the same views,
+permissions and role scoping as standalone calls. The response lists one
+``{"status", "body"}`` per sub-request. A failing sub-request does not stop
+the others: like a standalone request, each write runs in its own transaction
+(see ``common.middleware``) and only that one is rolled back. Streaming
+exports and nested batches cannot be batched.
+"""
+
+import io
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.urls import Resolver404, resolve
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.middleware import call_atomic
+
+API_PREFIX = "/api/"
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+logger = logging.getLogger("django.request")
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=METHODS)
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+
+    def validate_path(self, value):
+        if not urlsplit(value).path.startswith(API_PREFIX):
+            raise serializers.ValidationError(f"Path must start with {API_PREFIX}.")
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"At most {settings.BATCH_MAX_REQUESTS} requests per batch."
+            )
+        return value
+
+
+def _error(status, detail):
+    return {"status": status, "body": {"detail": detail}}
+
+
+class BatchView(APIView):
+    """Run ``requests`` as the authenticated user (see the module docstring)."""
+
+    permission_classes = [IsAuthenticated]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Sub-requests get their own transactions, not one around the batch.
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = [
+            self.run(request, item) for item in serializer.validated_data["requests"]
+        ]
+        return Response({"responses": results})
+
+    def run(self, request, item):
+        url = urlsplit(item["path"])
+        try:
+            match = resolve(url.path)
+        except Resolver404:
+            return _error(404, "Not found.")
+        if getattr(match.func, "view_class", None) is type(self):
+            return _error(400, "Batches cannot be nested.")
+
+        body = json.dumps(item["body"]).encode() if "body" in item else b""
+        environ = {
+            **request.META,
+            "REQUEST_METHOD": item["method"],
+            "PATH_INFO": url.path,
+            "QUERY_STRING": url.query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.url_scheme": request.scheme,
+        }
+        subrequest = WSGIRequest(environ)
+        subrequest.resolver_match = match
+        # Authenticated once for the whole batch (DRF's forced authentication).
+        subrequest._force_auth_user = request.user
+        subrequest._force_auth_token = request.auth
+
+        atomic = (
+            settings.DB_ATOMIC_READS or item["method"] not in SAFE_METHODS
+        ) and DEFAULT_DB_ALIAS not in getattr(match.func, "_non_atomic_requests", ())
+        try:
+            if atomic:
+                response = call_atomic(
+                    match.func, subrequest, *match.args, **match.kwargs
+                )
+            else:
+                response = match.func(subrequest, *match.args, **match.kwargs)
+        except Exception:
+            # A standalone request would get a 500; keep the other results.
+            logger.exception("Batched %s %s failed", item["method"], url.path)
+            return _error(500, "Server error.")
+
+        if response.streaming:
+            response.close()
+            return _error(400, "Streaming responses cannot be batched.")
+        if hasattr(response, "data"):
+            return {"status": response.status_code, "body": response.data}
+        content = response.content.decode(response.charset)
+        if response.get("Content-Type", "").startswith("application/json"):
+            content = json.loads(content) if content else None
+        return {"status": response.status_code, "body": content}
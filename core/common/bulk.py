@@ -0,0 +1,69 @@
+"""Row validation shared by the bulk endpoints.
+
+Building a serializer per row is the dominant cost for large batches, so bulk
+rows are validated field by field against shared field instances. Existence
+and ownership checks are left to the caller, which runs them for the whole
+batch at once.
+"""
+
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+def bulk_rows(request, max_rows, noun="records"):
+    """The parsed bulk body, checked to be a list of at most ``max_rows`` rows."""
+    rows = request.data
+    if not isinstance(rows, list):
+        raise ValidationError(
+            {"detail": f"Expected a JSON array or NDJSON stream of {noun}."}
+        )
+    if len(rows) > max_rows:
+        raise ValidationError(
+            {"detail": f"A batch may contain at most {max_rows} {noun}."}
+        )
+    return rows
+
+
+def bulk_response(
+    message, data, saved, noun="records", success=status.HTTP_201_CREATED
+):
+    """``message`` with ``success`` if any row was saved, else a 400 saying none was."""
+    if saved:
+        return Response({"message": message, "data": data}, status=success)
+    return Response(
+        {"message": f"No {noun} were saved.", "data": data},
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def validate_rows(rows, fields):
+    """Validate raw bulk rows against ``(name, field)`` pairs.
+
+    Returns ``(valid, errors)``: ``valid`` is a list of ``(index, attrs)``
+    tuples and ``errors`` a list of ``{"index": ..., "errors": ...}`` dicts.
+    Optional fields missing from a row are left out of its ``attrs``.
+    """
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors.append(
+                {
+                    "index": index,
+                    "errors": {"non_field_errors": ["Expected a JSON object."]},
+                }
+            )
+            continue
+        attrs, row_errors = {}, {}
+        for name, field in fields:
+            try:
+                attrs[name] = field.run_validation(row.get(name, serializers.empty))
+            except serializers.SkipField:
+                pass
+            except serializers.ValidationError as exc:
+                row_errors[name] = exc.detail
+        if row_errors:
+            errors.append({"index": index, "errors": row_errors})
+        else:
+            valid.append((index, attrs))
+    return valid, errors
@@ -0,0 +1,19 @@
+"""Helpers around the Django cache."""
+
+from django.conf import settings
+
+# Backends whose entries live in the memory of a single worker process.
+PER_PROCESS_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def is_shared(alias="default"):
+    """True when every worker process reads and clears the same cache entries.
+
+    Entries that authorize requests may only outlive a request in a shared
+    cache: signal-driven invalidation runs in the worker that made the change,
+    so a per-process cache elsewhere would keep granting stale access.
+    """
+    return settings.CACHES[alias]["BACKEND"] not in PER_PROCESS_BACKENDS
@@ -0,0 +1,127 @@
+"""Streaming CSV / NDJSON exports for list endpoints.
+
+Rows are read with ``QuerySet.iterator(chunk_size=...)``, which uses a
+server-side cursor on PostgreSQL, and written out as they arrive, so memory
+stays flat regardless of how many rows an export returns.
+
+The output format is chosen with ``?output=csv|ndjson`` because DRF reserves
+``?format=`` for its own content negotiation.
+"""
+
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class ExportRenderer(BaseRenderer):
+    """Accepts any ``Accept`` header for export actions.
+
+    The streamed body bypasses rendering; only error responses (plain data)
+    reach :meth:`render` and are returned as JSON.
+    """
+
+    media_type = "*/*"
+    format = "export"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+
+# For ``@action(renderer_classes=EXPORT_RENDERERS)``: JSON errors by default,
+# no 406 for clients asking for text/csv or application/x-ndjson.
+EXPORT_RENDERERS = [JSONRenderer, ExportRenderer]
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def filter_by_cow_and_dates(queryset, params):
+    """Apply the ``cow_id`` / ``date_from`` / ``date_to`` list filters."""
+    cow_id = params.get("cow_id")
+    if cow_id:
+        if not cow_id.isdigit():
+            raise ValidationError({"cow_id": "Must be an integer."})
+        queryset = queryset.filter(cow_id=cow_id)
+    for name, lookup in (("date_from", "date__gte"), ("date_to", "date__lte")):
+        value = params.get(name)
+        if value:
+            try:
+                parsed = parse_date(value)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                raise ValidationError({name: "Use YYYY-MM-DD."})
+            queryset = queryset.filter(**{lookup: parsed})
+    return queryset
+
+
+def _rows(queryset, fields, chunk_size):
+    # Outside a transaction Django declares the server-side cursor WITH HOLD,
+    # which makes PostgreSQL materialize the whole result before the first
+    # row; iterating inside one streams it. The request's own transaction
+    # (ATOMIC_REQUESTS) has ended by the time the response body is consumed,
+    # and so has its database routing: ``queryset.db`` was resolved in the view.
+    with transaction.atomic(using=queryset.db):
+        yield from queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def _csv_chunks(header, rows, rows_per_chunk):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= rows_per_chunk:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def _ndjson_chunks(header, rows, rows_per_chunk):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    buffer = []
+    for row in rows:
+        buffer.append(encoder.encode(dict(zip(header, row))) + "\n")
+        if len(buffer) >= rows_per_chunk:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def export_response(request, queryset, columns, filename):
+    """Stream ``queryset`` as CSV or NDJSON.
+
+    ``columns`` maps output column names to ``values_list`` lookups, e.g.
+    ``{"cow_tag": "cow__tag"}``.
+    """
+    output = request.query_params.get("output", "csv")
+    if output not in CONTENT_TYPES:
+        choices = ", ".join(CONTENT_TYPES)
+        raise ValidationError({"output": f"Choose one of: {choices}."})
+    queryset = queryset.using(queryset.db)
+    rows = _rows(queryset, columns.values(), settings.EXPORT_CHUNK_SIZE)
+    chunks = _csv_chunks if output == "csv" else _ndjson_chunks
+    response = StreamingHttpResponse(
+        chunks(list(columns), rows, rows_per_chunk=500),
+        content_type=CONTENT_TYPES[output],
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{output}"'
+    return response
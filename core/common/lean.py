@@ -0,0 +1,220 @@
+"""Lean list responses built from ``.values()`` rows, and sparse fieldsets.
+
+Model serializers create and run DRF field objects for every row, and once
+more for every nested serializer, which dominates list latency for large
+pages. ``LeanListMixin`` serves ``list`` from one ``.values()`` query instead:
+related objects are returned as ``<name>_id`` columns and only joined when a
+client asks for them with ``?expand=``. Retrieve, create and update keep
+using the model serializers.
+
+``?fields=tag,breed`` trims responses to the named fields (``id`` is always
+included) and the query with them: list selects only those columns, retrieve
+defers the other columns and skips joins for relations that were not asked
+for.
+"""
+
+from django.db import models
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from common.metrics import serializing
+
+
+def related(path, names):
+    """Expansion columns for the relation at ``path``, e.g. ``farm__agent``."""
+    return {name: f"{path}__{name}" for name in names}
+
+
+def _decimal_lookups(model, lookups):
+    """Lookups that resolve to ``DecimalField`` (rendered as strings, like DRF)."""
+    decimals = []
+    for lookup in lookups:
+        current, field = model, None
+        for part in lookup.split("__"):
+            field = current._meta.get_field(part)
+            if field.is_relation:
+                current = field.related_model
+        if isinstance(field, models.DecimalField):
+            decimals.append(lookup)
+    return decimals
+
+
+def _lookups(tree, prefix=""):
+    """``select_related`` lookups of a ``query.select_related`` tree."""
+    for name, children in tree.items():
+        if children:
+            yield from _lookups(children, f"{prefix}{name}__")
+        else:
+            yield f"{prefix}{name}"
+
+
+class SparseFieldsMixin:
+    """``?fields=`` for ``retrieve``: trimmed serializer, projected query.
+
+    Field names are the serializer's readable fields. Concrete columns that
+    were not requested are deferred with ``.only()`` and ``select_related`` is
+    narrowed to the requested relations. Serializer fields that do not map to
+    a model column (method fields, dotted sources) disable the projection but
+    still trim the output.
+    """
+
+    fields_query_param = "fields"
+
+    def get_requested_fields(self, request, available):
+        """Requested field names (always with ``id``), or ``None`` for all."""
+        raw = request.query_params.get(self.fields_query_param)
+        if raw is None:
+            return None
+        names = list(dict.fromkeys(n.strip() for n in raw.split(",") if n.strip()))
+        unknown = [name for name in names if name not in available]
+        if unknown or not names:
+            raise ValidationError(
+                {
+                    self.fields_query_param: (
+                        f"Unknown field: {', '.join(unknown) or '(none given)'}. "
+                        f"Choose from: {', '.join(available)}."
+                    )
+                }
+            )
+        if "id" in available and "id" not in names:
+            names.insert(0, "id")
+        return names
+
+    def retrieve(self, request, *args, **kwargs):
+        readable = {
+            name: field
+            for name, field in self.get_serializer_class()().fields.items()
+            if not field.write_only
+        }
+        fields = self.get_requested_fields(request, list(readable))
+        self.requested_fields = fields
+        if fields is not None:
+            self.projected_sources = [readable[name].source for name in fields]
+        return super().retrieve(request, *args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        sources = getattr(self, "projected_sources", None)
+        if self.action == "retrieve" and sources:
+            queryset = self.project_queryset(queryset, sources)
+        return queryset
+
+    @staticmethod
+    def project_queryset(queryset, sources):
+        model = queryset.model
+        columns = {field.name: field for field in model._meta.concrete_fields}
+        names, relations = {model._meta.pk.name}, []
+        for source in sources:
+            field = columns.get(source)
+            if field is None:
+                return queryset
+            names.add(field.name)
+            if field.is_relation:
+                relations.append(field.name)
+        # Object permissions read foreign keys (farm, owner, cow, agent) and
+        # the viewsets' ownership annotations, which ``.only()`` keeps.
+        names.update(f.name for f in columns.values() if f.is_relation)
+        selected = queryset.query.select_related
+        queryset = queryset.select_related(None)
+        if relations:
+            # Keep what the viewset joins below them (the farm's agent, ...).
+            nested = selected if isinstance(selected, dict) else {}
+            queryset = queryset.select_related(
+                *relations,
+                *(
+                    lookup
+                    for name in relations
+                    for lookup in _lookups(nested.get(name, {}), f"{name}__")
+                ),
+            )
+        return queryset.only(*names)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = getattr(self, "requested_fields", None)
+        if self.action == "retrieve" and fields is not None:
+            for name in list(serializer.fields):
+                if name not in fields:
+                    serializer.fields.pop(name)
+        return serializer
+
+
+class LeanListMixin(SparseFieldsMixin):
+    """Serve ``list`` from ``.values()`` rows without a serializer.
+
+    ``list_fields`` maps output keys to ``values()`` lookups; ``?fields=``
+    picks a subset of them. ``list_expansions`` maps each ``?expand=`` name
+    to such a mapping, rendered as a nested object (``None`` when the related
+    row's ``id`` is null).
+    """
+
+    list_fields = {}
+    list_expansions = {}
+    expand_query_param = "expand"
+
+    def get_expansions(self, request):
+        raw = request.query_params.get(self.expand_query_param, "")
+        names = list(dict.fromkeys(n.strip() for n in raw.split(",") if n.strip()))
+        unknown = [name for name in names if name not in self.list_expansions]
+        if unknown:
+            choices = ", ".join(self.list_expansions) or "none"
+            raise ValidationError(
+                {
+                    self.expand_query_param: (
+                        f"Unknown expansion: {', '.join(unknown)}. "
+                        f"Choose from: {choices}."
+                    )
+                }
+            )
+        return {name: self.list_expansions[name] for name in names}
+
+    def list(self, request, *args, **kwargs):
+        expansions = self.get_expansions(request)
+        fields = self.list_fields
+        requested = self.get_requested_fields(request, list(fields))
+        if requested is not None:
+            fields = {name: fields[name] for name in requested}
+        lookups = set(fields.values())
+        for columns in expansions.values():
+            lookups.update(columns.values())
+        # Keyset pagination reads the ordering columns from each row.
+        lookups.update(f.lstrip("-") for f in getattr(self, "keyset_ordering", ()))
+
+        queryset = self.filter_queryset(self.get_queryset())
+        model = queryset.model
+        queryset = queryset.values(*lookups)
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        with serializing():
+            data = self.lean_rows(rows, model, fields, expansions)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    @staticmethod
+    def lean_rows(rows, model, fields, expansions):
+        """Shape ``values()`` rows into response dicts."""
+        top = list(fields.items())
+        nested = [
+            (name, columns["id"], list(columns.items()))
+            for name, columns in expansions.items()
+        ]
+        lookups = set(fields.values())
+        for columns in expansions.values():
+            lookups.update(columns.values())
+        decimals = _decimal_lookups(model, lookups)
+
+        data = []
+        for row in rows:
+            for lookup in decimals:
+                if row[lookup] is not None:
+                    row[lookup] = str(row[lookup])
+            item = {key: row[lookup] for key, lookup in top}
+            for name, id_lookup, columns in nested:
+                item[name] = (
+                    {key: row[lookup] for key, lookup in columns}
+                    if row[id_lookup] is not None
+                    else None
+                )
+            data.append(item)
+        return data
@@ -0,0 +1,147 @@
+"""Per-request SQL, serializer and latency metrics in the Prometheus text format.
+
+``RequestMetricsMiddleware`` (first in ``MIDDLEWARE``) wraps every database
+alias with ``connection.execute_wrapper`` for the duration of a request and
+counts the queries and the time spent in them. Serializer time is collected
+by ``TimedSerializerMixin`` and around the lean list rows (see
+``common.lean``); it includes the queries lazily run while serializing, which
+are counted as DB time as well. Streaming exports are measured until their
+headers are sent.
+
+The totals go back to the client in a ``Server-Timing`` header (browser
+developer tools show it) and into histograms labelled by method and URL name
+(``livestock:cow-list``, ``production:milkrecord-detail``), served at
+``/internal/metrics/`` for Prometheus. A route whose
+``farmhub_db_queries`` distribution moves up after a release is the N+1 to
+look at.
+
+The registry, histograms and Prometheus rendering live in
+``shared/metrics.py`` at the repository root, shared with the reporting
+service. Histograms are kept per process. With several worker processes, point
+``METRICS_DIR`` at a directory they share: each worker writes its totals
+there from a background thread every ``METRICS_FLUSH_SECONDS`` (so scrapes
+lag by at most that much), the endpoint adds up all the files, and
+``core/gunicorn.conf.py`` folds the file of an exited worker into one archive
+so recycled workers do not reset the counters.
+"""
+
+import hmac
+import sys
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+REPO_ROOT = str(Path(__file__).resolve().parents[2])
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+# clear_dir and merge_dead_process are re-exported for gunicorn.conf.py.
+from shared import metrics as shared  # noqa: E402
+from shared.metrics import (  # noqa: E402, F401
+    CONTENT_TYPE,
+    Registry,
+    clear_dir,
+    merge_dead_process,
+    render,
+)
+
+_stats = ContextVar("request_metrics", default=None)
+
+
+class RequestStats(shared.RequestStats):
+    """SQL and serializer totals of one request; also the execute wrapper."""
+
+    __slots__ = ("serializing",)
+
+    def __init__(self):
+        super().__init__()
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - started
+
+
+@contextmanager
+def serializing():
+    """Count the block as serializer time (nested blocks are not counted twice)."""
+    stats = _stats.get()
+    if stats is None or stats.serializing:
+        yield
+        return
+    stats.serializing = True
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serializer_time += time.perf_counter() - started
+        stats.serializing = False
+
+
+class TimedSerializerMixin:
+    """Count ``to_representation`` of the outermost serializer as serializer time."""
+
+    def to_representation(self, instance):
+        stats = _stats.get()
+        if stats is None or stats.serializing:
+            return super().to_representation(instance)
+        stats.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+            stats.serializing = False
+
+
+registry = Registry(settings.METRICS_DIR, settings.METRICS_FLUSH_SECONDS)
+
+
+class RequestMetricsMiddleware:
+    """Measure each request; see the module docstring."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _stats.reset(token)
+        total = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        route = match.view_name if match else "unmatched"
+        registry.observe(
+            (request.method, route), response.status_code, stats.observations(total)
+        )
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = stats.server_timing(total)
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint: bearer ``METRICS_TOKEN`` or an allowed IP."""
+    if settings.METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "")
+        allowed = hmac.compare_digest(supplied, f"Bearer {settings.METRICS_TOKEN}")
+    else:
+        allowed = request.META.get("REMOTE_ADDR") in settings.METRICS_ALLOWED_IPS
+    if not allowed:
+        return HttpResponseForbidden()
+    return HttpResponse(render(registry.collect()), content_type=CONTENT_TYPE)
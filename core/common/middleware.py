@@ -0,0 +1,39 @@
+"""Request-level database middleware."""
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework.permissions import SAFE_METHODS
+
+
+class AtomicWritesMiddleware:
+    """``ATOMIC_REQUESTS`` for unsafe methods only.
+
+    Installed by settings when ``DB_ATOMIC_READS`` is off (``ATOMIC_REQUESTS``
+    is then off too): POST/PUT/PATCH/DELETE views run in one transaction that
+    is rolled back on an exception or a DRF error response, while GET, HEAD
+    and OPTIONS run in autocommit mode without BEGIN/COMMIT round trips.
+    Views marked with ``transaction.non_atomic_requests`` are left alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method in SAFE_METHODS:
+            return None
+        if DEFAULT_DB_ALIAS in getattr(view_func, "_non_atomic_requests", ()):
+            return None
+        return call_atomic(view_func, request, *view_args, **view_kwargs)
+
+
+def call_atomic(view_func, request, *args, **kwargs):
+    """Run a view in a transaction that is rolled back on an error response."""
+    with transaction.atomic():
+        response = view_func(request, *args, **kwargs)
+        # DRF turns exceptions into error responses and only marks the
+        # transaction for rollback itself under ATOMIC_REQUESTS.
+        if getattr(response, "exception", False):
+            transaction.set_rollback(True)
+    return response
@@ -0,0 +1,156 @@
+"""Keyset (cursor) pagination for list endpoints.
+
+Pages are selected with ``WHERE (date, id) < (:last_date, :last_id)``-style
+filters on the view's ``keyset_ordering`` instead of ``OFFSET``, so deep pages
+cost the same as the first one and rows inserted while a client is paging do
+not shift or duplicate results. The last field of the ordering must be unique
+(normally ``id``).
+"""
+
+import base64
+import datetime
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over ``view.keyset_ordering`` (default ``("-id",)``).
+
+    Responses are ``{"next": url, "previous": url, "results": [...]}``. Page size
+    defaults to ``PAGE_SIZE`` and can be changed per request with
+    ``?page_size=`` up to ``API_MAX_PAGE_SIZE``.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("-id",)
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = tuple(getattr(view, "keyset_ordering", self.ordering))
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor["r"])
+
+        ordering = self._reversed(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self._after(ordering, cursor["v"]))
+            except (DjangoValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.first_values = self._values(rows[0]) if rows else None
+        self.last_values = self._values(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        page_size = api_settings.PAGE_SIZE or 50
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                page_size = int(requested)
+            except ValueError:
+                pass
+        return max(1, min(page_size, settings.API_MAX_PAGE_SIZE))
+
+    def get_next_link(self):
+        if not self.has_next or self.last_values is None:
+            return None
+        return self.encode_cursor(self.last_values, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_values is None:
+            return None
+        return self.encode_cursor(self.first_values, reverse=True)
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({"v": values, "r": int(reverse)}, separators=(",", ":"))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values, reverse = cursor["v"], bool(cursor["r"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return {"v": values, "r": reverse}
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(f[1:] if f.startswith("-") else f"-{f}" for f in ordering)
+
+    @staticmethod
+    def _after(ordering, values):
+        """Rows strictly after ``values`` in ``ordering`` (lexicographic keyset)."""
+        fields = [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+        condition = Q()
+        for position, (name, descending) in enumerate(fields):
+            lookup = "lt" if descending else "gt"
+            step = Q(**{f"{name}__{lookup}": values[position]})
+            for (prev_name, _), value in zip(fields[:position], values):
+                step &= Q(**{prev_name: value})
+            condition |= step
+        # Redundant bound on the leading column lets Postgres use a range scan.
+        name, descending = fields[0]
+        bound = Q(**{f"{name}__{'lte' if descending else 'gte'}": values[0]})
+        return bound & condition
+
+    def _values(self, row):
+        names = [f.lstrip("-") for f in self.ordering]
+        if isinstance(row, dict):
+            return [_encode_value(row[name]) for name in names]
+        return [_encode_value(getattr(row, name)) for name in names]
@@ -0,0 +1,115 @@
+"""Read-replica routing.
+
+With ``DB_REPLICA_HOST`` set, settings add a ``replica`` database alias and
+install :class:`ReplicaRouter`. Writes, migrations and every read outside a
+replica-enabled request go to ``default``. Viewsets using
+:class:`ReplicaReadsMixin` send the queries of GET/HEAD/OPTIONS requests to
+the replica once the user is authenticated, unless that user wrote something
+in the last ``DB_REPLICA_STICKY_SECONDS`` (read-your-writes while the replica
+catches up). Stickiness travels with the client as a short-lived cookie, so it
+follows the user to whichever worker serves the next read. With a shared cache
+backend it is also kept there for clients that drop cookies; a per-process
+cache would only cover the worker that served the write.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+from common.cache import is_shared as shared_cache
+
+REPLICA = "replica"
+STICKY_KEY = "db-primary:{}"
+# Holds the Unix time until which the client's reads stay on the primary.
+STICKY_COOKIE = "db_primary_until"
+
+_read_alias = ContextVar("read_alias", default=DEFAULT_DB_ALIAS)
+
+
+def replica_enabled():
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def use_primary():
+    """Read from ``default`` inside the block, e.g. for data that gets cached."""
+    token = _read_alias.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def is_sticky(request):
+    try:
+        if float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    return shared_cache() and cache.get(STICKY_KEY.format(request.user.id)) is not None
+
+
+def mark_sticky(request, response):
+    """Keep the user's reads on the primary for the replica lag window."""
+    seconds = settings.DB_REPLICA_STICKY_SECONDS
+    response.set_cookie(
+        STICKY_COOKIE,
+        str(int(time.time()) + seconds),
+        max_age=seconds,
+        secure=request.is_secure(),
+        httponly=True,
+        samesite="Lax",
+    )
+    if shared_cache():
+        cache.set(STICKY_KEY.format(request.user.id), 1, seconds)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadsMixin:
+    """Route safe-method queries of a viewset to the replica.
+
+    Authentication and permission checks in ``initial`` still read from the
+    primary; everything after them (querysets, object lookups, serializers)
+    uses the replica. Successful writes make the user sticky to the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            replica_enabled()
+            and request.method in SAFE_METHODS
+            and not is_sticky(request)
+        ):
+            self._replica_token = _read_alias.set(REPLICA)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_replica_token", None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+        elif (
+            replica_enabled()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            mark_sticky(request, response)
+        return super().finalize_response(request, response, *args, **kwargs)
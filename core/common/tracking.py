@@ -0,0 +1,21 @@
+class LoadedValuesMixin:
+    """Keeps the column values of the row as last read or written in ``_loaded_values``.
+
+    Signal receivers use it to find the previous farm/owner/cow/date of an
+    updated row (the rollup and the report cache must refresh the old key too)
+    without an extra query. ``post_save`` receivers still see the old values;
+    they are replaced once ``save()`` returns.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+        }
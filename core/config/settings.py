@@ -23,6 +23,7 @@ INSTALLED_APPS = [
     "farms",
     "livestock",
     "production",
+    "sync",
 ]
 
 MIDDLEWARE = [
@@ -57,6 +58,15 @@ WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
 
 # PostgreSQL only (no SQLite)
+# Connection reuse: persistent connections (DB_CONN_MAX_AGE seconds, checked
+# before reuse) or, with DB_POOL=1, a psycopg 3 pool per process (needs
+# psycopg[pool]; Django requires CONN_MAX_AGE=0 with a pool).
+DB_POOL = config("DB_POOL", default=False, cast=bool)
+DB_CONN_MAX_AGE = config("DB_CONN_MAX_AGE", default=60, cast=int)
+# Off: only unsafe methods run in a per-request transaction (see
+# common.middleware.AtomicWritesMiddleware); on: every request does.
+DB_ATOMIC_READS = config("DB_ATOMIC_READS", default=False, cast=bool)
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
@@ -65,9 +75,42 @@ DATABASES = {
         "PASSWORD": config("DB_PASSWORD"),  # required, no default
         "HOST": config("DB_HOST", default="localhost"),
         "PORT": config("DB_PORT", default=5432, cast=int),
-        "ATOMIC_REQUESTS": True,
+        "ATOMIC_REQUESTS": DB_ATOMIC_READS,
+        "CONN_MAX_AGE": 0 if DB_POOL else DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": config("DB_CONN_HEALTH_CHECKS", default=True, cast=bool),
+        "OPTIONS": {},
     }
 }
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+        "max_size": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+        "timeout": config("DB_POOL_TIMEOUT", default=10, cast=float),
+    }
+if not DB_ATOMIC_READS:
+    MIDDLEWARE.append("common.middleware.AtomicWritesMiddleware")
+
+# Optional read replica (see common/routers.py). Point DB_REPLICA_HOST at the
+# primary itself to exercise the routing locally with a second alias.
+DB_REPLICA_HOST = config("DB_REPLICA_HOST", default="")
+# Reads of a user who just wrote stay on the primary this long.
+DB_REPLICA_STICKY_SECONDS = config("DB_REPLICA_STICKY_SECONDS", default=5, cast=int)
+if DB_REPLICA_HOST:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": config("DB_REPLICA_NAME", default=DATABASES["default"]["NAME"]),
+        "USER": config("DB_REPLICA_USER", default=DATABASES["default"]["USER"]),
+        "PASSWORD": config(
+            "DB_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]
+        ),
+        "HOST": DB_REPLICA_HOST,
+        "PORT": config(
+            "DB_REPLICA_PORT", default=DATABASES["default"]["PORT"], cast=int
+        ),
+        "OPTIONS": {**DATABASES["default"]["OPTIONS"]},
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_ROUTERS = ["common.routers.ReplicaRouter"]
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -90,9 +133,93 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "accounts.User"
 
 # DRF & JWT
+# Stateless JWT auth (accounts/authentication.py): the user is built from the
+# token's role claims instead of a query per request. Requires a shared
+# DJANGO_CACHE_BACKEND (revocations must reach every worker); with the
+# per-process default the User row is loaded per request, as when this is off.
+JWT_STATELESS_AUTH = config("JWT_STATELESS_AUTH", default=True, cast=bool)
+# How long a user's current token version is cached, and the per-process LRU
+# of full user rows.
+JWT_VERSION_CACHE_SECONDS = config("JWT_VERSION_CACHE_SECONDS", default=30, cast=int)
+JWT_USER_CACHE_SIZE = config("JWT_USER_CACHE_SIZE", default=1024, cast=int)
+JWT_USER_CACHE_SECONDS = config("JWT_USER_CACHE_SECONDS", default=60, cast=int)
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.StatelessJWTAuthentication"
+        if JWT_STATELESS_AUTH
+        else "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
+    # Keyset pagination; views pick their ordering with ``keyset_ordering``.
+    "DEFAULT_PAGINATION_CLASS": "common.pagination.KeysetPagination",
+    "PAGE_SIZE": config("API_PAGE_SIZE", default=50, cast=int),
+}
+SIMPLE_JWT = {
+    # Role claims and the token version go into issued tokens.
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.authentication.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.authentication.TokenRefreshSerializer",
+}
+API_MAX_PAGE_SIZE = config("API_MAX_PAGE_SIZE", default=500, cast=int)
+# Rows fetched per server-side cursor round trip by the CSV/NDJSON exports.
+EXPORT_CHUNK_SIZE = config("EXPORT_CHUNK_SIZE", default=2000, cast=int)
+
+# Bulk milk ingestion (POST /api/milk-records/bulk/)
+MILK_BULK_MAX_ROWS = config("MILK_BULK_MAX_ROWS", default=100000, cast=int)
+MILK_BULK_BATCH_SIZE = config("MILK_BULK_BATCH_SIZE", default=2000, cast=int)
+
+# Bulk cow enrollment and transfers (POST /api/cows/bulk/, /api/cows/bulk-transfer/)
+COW_BULK_MAX_ROWS = config("COW_BULK_MAX_ROWS", default=20000, cast=int)
+COW_BULK_BATCH_SIZE = config("COW_BULK_BATCH_SIZE", default=1000, cast=int)
+# Bulk activity logging (POST /api/activities/bulk/): most cow ids per request
+ACTIVITY_BULK_MAX_COWS = config("ACTIVITY_BULK_MAX_COWS", default=20000, cast=int)
+
+# Optional range partitioning of production_milkrecord by date: "month" or
+# "year" (empty = plain table). Applied by production migration 0004 or later
+# with ``manage.py milk_partitions --convert``; MILK_PARTITION_AHEAD is how
+# many future periods get a partition in advance.
+MILK_PARTITION_INTERVAL = config("MILK_PARTITION_INTERVAL", default="")
+MILK_PARTITION_AHEAD = config("MILK_PARTITION_AHEAD", default=3, cast=int)
+
+# Sub-requests accepted by POST /api/batch/ (common/batch.py)
+BATCH_MAX_REQUESTS = config("BATCH_MAX_REQUESTS", default=20, cast=int)
+
+# Offline sync feed (GET /api/sync/): rows per response, and how long deletions
+# are kept for clients to catch up (``manage.py prune_sync_tombstones``).
+SYNC_PAGE_SIZE = config("SYNC_PAGE_SIZE", default=1000, cast=int)
+SYNC_MAX_PAGE_SIZE = config("SYNC_MAX_PAGE_SIZE", default=5000, cast=int)
+SYNC_TOMBSTONE_RETENTION_DAYS = config(
+    "SYNC_TOMBSTONE_RETENTION_DAYS", default=90, cast=int
+)
+
+# Shared Django cache (per-process memory unless a shared backend is configured)
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "DJANGO_CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("DJANGO_CACHE_LOCATION", default="farmhub"),
+    }
 }
+
+# Per-user access scope (common/access.py) cached across requests; 0 disables.
+# Writes only use the cached scope with a shared cache backend (common/cache.py);
+# otherwise they check the ids in the request with one query each.
+ACCESS_SCOPE_CACHE_SECONDS = config("ACCESS_SCOPE_CACHE_SECONDS", default=30, cast=int)
+
+# Request metrics (common/metrics.py): Server-Timing headers and per-route
+# histograms at /internal/metrics/. Worker processes of one server share
+# METRICS_DIR so a scrape sees all of them.
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+METRICS_SERVER_TIMING = config("METRICS_SERVER_TIMING", default=True, cast=bool)
+METRICS_DIR = config("METRICS_DIR", default="")
+METRICS_FLUSH_SECONDS = config("METRICS_FLUSH_SECONDS", default=1.0, cast=float)
+# Scrapes send "Authorization: Bearer <METRICS_TOKEN>", or without a token come
+# from one of METRICS_ALLOWED_IPS.
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_ALLOWED_IPS = [
+    ip for ip in config("METRICS_ALLOWED_IPS", default="127.0.0.1,::1").split(",") if ip
+]
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, "common.metrics.RequestMetricsMiddleware")
@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.http import JsonResponse
 from django.urls import path, include
+from common.batch import BatchView
+from common.metrics import metrics_view
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -20,9 +22,14 @@ urlpatterns = [
                 path("", include("farms.urls", namespace="farms")),
                 path("", include("livestock.urls", namespace="livestock")),
                 path("", include("production.urls", namespace="production")),
+                path("", include("sync.urls", namespace="sync")),
+                # Several API calls in one round trip (common/batch.py)
+                path("batch/", BatchView.as_view(), name="batch"),
             ]
         ),
     ),
     # Simple health/ping endpoint
     path("healthz/", lambda request: JsonResponse({"status": "ok"}), name="healthz"),
+    # Prometheus scrape endpoint (common/metrics.py)
+    path("internal/metrics/", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("farms", "0002_report_cache_invalidation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="farmerprofile",
+            name="sync_version",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
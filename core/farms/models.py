@@ -1,8 +1,9 @@
 from django.conf import settings
 from django.db import models
+from common.tracking import LoadedValuesMixin
 
 
-class Farm(models.Model):
+class Farm(LoadedValuesMixin, models.Model):
     name = models.CharField(max_length=255)
     location = models.CharField(max_length=255)
     agent = models.ForeignKey(
@@ -18,7 +19,7 @@ class Farm(models.Model):
         return self.name
 
 
-class FarmerProfile(models.Model):
+class FarmerProfile(LoadedValuesMixin, models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -29,6 +30,37 @@ class FarmerProfile(models.Model):
         on_delete=models.CASCADE,
         related_name='farmers'
     )
+    # Id of the last transaction that wrote the row; set by the sync triggers.
+    sync_version = models.BigIntegerField(default=0, editable=False, db_index=True)
 
     def __str__(self) -> str:
         return f"FarmerProfile<{self.user.username} @ {self.farm.name}>"
+
+
+class ReportCacheInvalidation(models.Model):
+    """Per-tag write counter polled by the reporting service's response cache.
+
+    ``scope`` is ``farm``, ``farmer`` (keyed by user id, as in the reporting
+    routes) or ``global``; ``version`` increases on every committed write that
+    affects the tag. Rows are written by ``farms.report_cache``.
+    """
+
+    class Scopes(models.TextChoices):
+        GLOBAL = 'global', 'Global'
+        FARM = 'farm', 'Farm'
+        FARMER = 'farmer', 'Farmer'
+
+    scope = models.CharField(max_length=16, choices=Scopes.choices)
+    object_id = models.BigIntegerField()
+    version = models.BigIntegerField(default=1)
+    updated_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'object_id'], name='farms_report_cache_scope_object_uniq'
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.scope}:{self.object_id} v{self.version}"
@@ -0,0 +1,67 @@
+"""Write-side invalidation for the reporting service's response cache.
+
+Writes queue the farms/farmers they affect; once the transaction commits the
+matching ``farms_reportcacheinvalidation`` rows get their version bumped. The
+reporting service polls that table and evicts only the tagged entries. No
+shared row is bumped for cross-farm reports, so writers to different farms
+never wait on each other; the poller evicts those reports itself whenever a
+poll finds a change.
+"""
+
+import threading
+
+from django.db import connection, transaction
+
+_pending = threading.local()
+
+BUMP_SQL = """
+    INSERT INTO farms_reportcacheinvalidation (scope, object_id, version, updated_at)
+    SELECT t.scope, t.object_id, 1, now()
+    FROM unnest(%s::varchar[], %s::bigint[]) AS t(scope, object_id)
+    ON CONFLICT (scope, object_id) DO UPDATE
+    SET version = farms_reportcacheinvalidation.version + 1,
+        updated_at = EXCLUDED.updated_at
+"""
+
+
+def _state():
+    if not hasattr(_pending, "farm_ids"):
+        _pending.farm_ids = set()
+        _pending.farmer_user_ids = set()
+        _pending.cow_ids = set()
+    return _pending
+
+
+def invalidate(farm_ids=(), farmer_user_ids=(), cow_ids=()):
+    """Queue report invalidation for farms, farmers (user ids) and cows' farms."""
+    state = _state()
+    state.farm_ids.update(i for i in farm_ids if i is not None)
+    state.farmer_user_ids.update(i for i in farmer_user_ids if i is not None)
+    state.cow_ids.update(i for i in cow_ids if i is not None)
+    transaction.on_commit(flush)
+
+
+def flush():
+    state = _state()
+    farm_ids, farmer_user_ids, cow_ids = (
+        state.farm_ids,
+        state.farmer_user_ids,
+        state.cow_ids,
+    )
+    if not farm_ids and not farmer_user_ids and not cow_ids:
+        return
+    state.farm_ids, state.farmer_user_ids, state.cow_ids = set(), set(), set()
+    if cow_ids:
+        from livestock.models import Cow
+
+        farm_ids |= set(
+            Cow.objects.filter(id__in=cow_ids).values_list("farm_id", flat=True)
+        )
+    # Sorted so concurrent flushes lock rows in the same order.
+    tags = sorted(
+        {("farm", farm_id) for farm_id in farm_ids}
+        | {("farmer", user_id) for user_id in farmer_user_ids}
+    )
+    scopes, object_ids = zip(*tags)
+    with connection.cursor() as cursor:
+        cursor.execute(BUMP_SQL, [list(scopes), list(object_ids)])
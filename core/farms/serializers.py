@@ -1,9 +1,11 @@
 from rest_framework import serializers
 from .models import Farm, FarmerProfile
 from accounts.serializers import UserSerializer
+from common.access import get_access_scope
+from common.metrics import TimedSerializerMixin
 
 
-class FarmSerializer(serializers.ModelSerializer):
+class FarmSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     agent = UserSerializer(read_only=True)
     agent_id = serializers.IntegerField(
         write_only=True, required=False, allow_null=True
@@ -66,7 +68,7 @@ class FarmSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class FarmerProfileSerializer(serializers.ModelSerializer):
+class FarmerProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     user_id = serializers.IntegerField(write_only=True)
 
@@ -103,9 +105,7 @@ class FarmerProfileSerializer(serializers.ModelSerializer):
             farm_id = getattr(farm, "id", farm) if farm else None
             if not farm_id:
                 raise serializers.ValidationError({"farm": "This field is required."})
-            from .models import Farm
-
-            if not Farm.objects.filter(id=farm_id, agent_id=user.id).exists():
+            if not get_access_scope(request).manages_farm(farm_id):
                 from rest_framework.exceptions import PermissionDenied
 
                 raise PermissionDenied(
@@ -0,0 +1,51 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common import access
+from . import report_cache
+from .models import Farm, FarmerProfile
+
+
+@receiver(post_save, sender=Farm)
+@receiver(post_delete, sender=Farm)
+def invalidate_reports_on_farm_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    report_cache.invalidate(farm_ids=[instance.pk])
+
+
+@receiver(post_save, sender=FarmerProfile)
+@receiver(post_delete, sender=FarmerProfile)
+def invalidate_reports_on_profile_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    report_cache.invalidate(
+        farm_ids=[instance.farm_id, loaded.get("farm_id")],
+        farmer_user_ids=[instance.user_id, loaded.get("user_id")],
+    )
+
+
+@receiver(post_save, sender=Farm)
+@receiver(post_delete, sender=Farm)
+def invalidate_access_on_farm_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    if access.unchanged(instance, loaded, kwargs, ("agent_id",)):
+        return
+    access.invalidate(user_ids=[instance.agent_id, loaded.get("agent_id")])
+
+
+@receiver(post_save, sender=FarmerProfile)
+@receiver(post_delete, sender=FarmerProfile)
+def invalidate_access_on_profile_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    if access.unchanged(instance, loaded, kwargs, ("user_id", "farm_id")):
+        return
+    access.invalidate(
+        user_ids=[instance.user_id, loaded.get("user_id")],
+        farm_ids=[instance.farm_id, loaded.get("farm_id")],
+    )
@@ -4,6 +4,11 @@ from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from .models import Farm, FarmerProfile
 from .serializers import FarmSerializer, FarmerProfileSerializer
+from common.lean import LeanListMixin, related
+from common.routers import ReplicaReadsMixin
+
+USER_SUMMARY = ["id", "username", "email", "first_name", "last_name"]
+FARM_SUMMARY = ["id", "name", "location", "agent_id"]
 
 
 class FarmRBACPermission(BasePermission):
@@ -31,9 +36,17 @@ class FarmRBACPermission(BasePermission):
         return Roles and role == Roles.AGENT and obj.agent_id == user.id
 
 
-class FarmViewSet(viewsets.ModelViewSet):
+class FarmViewSet(ReplicaReadsMixin, LeanListMixin, viewsets.ModelViewSet):
     queryset = Farm.objects.select_related("agent").all().order_by("name")
     serializer_class = FarmSerializer
+    keyset_ordering = ("name", "id")
+    list_fields = {
+        "id": "id",
+        "name": "name",
+        "location": "location",
+        "agent_id": "agent_id",
+    }
+    list_expansions = {"agent": related("agent", USER_SUMMARY)}
     permission_classes = [IsAuthenticated, FarmRBACPermission]
 
     def get_queryset(self):
@@ -72,9 +85,15 @@ class FarmViewSet(viewsets.ModelViewSet):
         return Response({"message": "Farm deleted"}, status=status.HTTP_204_NO_CONTENT)
 
 
-class FarmerProfileViewSet(viewsets.ModelViewSet):
+class FarmerProfileViewSet(ReplicaReadsMixin, LeanListMixin, viewsets.ModelViewSet):
     queryset = FarmerProfile.objects.select_related("user", "farm").all()
     serializer_class = FarmerProfileSerializer
+    keyset_ordering = ("id",)
+    list_fields = {"id": "id", "user_id": "user_id", "farm_id": "farm_id"}
+    list_expansions = {
+        "user": related("user", USER_SUMMARY),
+        "farm": related("farm", FARM_SUMMARY),
+    }
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -0,0 +1,77 @@
+"""Gunicorn settings for the Django API (``config.wsgi``).
+
+    gunicorn -c core/gunicorn.conf.py
+
+Every value is read from the environment / ``.env`` through python-decouple,
+like the Django settings. The master preloads the app once and forks
+``WEB_WORKERS`` workers (default ``2 * cores + 1``: DRF views spend most of
+their time waiting on PostgreSQL); ``WEB_THREADS`` > 1 switches to threaded
+workers. Each worker is recycled after ``WEB_MAX_REQUESTS`` requests (plus
+jitter so they do not all restart at once) to bound memory growth.
+
+``kill -HUP <master>`` replaces the workers gracefully, letting in-flight
+requests finish for up to ``WEB_GRACEFUL_TIMEOUT`` seconds. Preloaded code is
+not re-imported on HUP; deploy new code with ``kill -USR2`` (starts a new
+master next to the old one) followed by ``kill -TERM`` of the old master, or
+set ``WEB_PRELOAD=0``.
+
+Database connections are opened lazily by each worker after the fork
+(persistent connections or a ``DB_POOL`` pool per process), so one process
+holds up to ``WEB_THREADS`` connections.
+"""
+
+import multiprocessing
+import os
+from pathlib import Path
+
+# ``config`` is itself a gunicorn setting, so decouple's is imported as ``env``.
+from decouple import config as env
+
+chdir = str(Path(__file__).resolve().parent)
+wsgi_app = "config.wsgi:application"
+
+bind = env("WEB_BIND", default="0.0.0.0:8000")
+workers = env("WEB_WORKERS", cast=int, default=multiprocessing.cpu_count() * 2 + 1)
+threads = env("WEB_THREADS", cast=int, default=1)
+preload_app = env("WEB_PRELOAD", cast=bool, default=True)
+
+max_requests = env("WEB_MAX_REQUESTS", cast=int, default=1000)
+max_requests_jitter = env("WEB_MAX_REQUESTS_JITTER", cast=int, default=100)
+timeout = env("WEB_TIMEOUT", cast=int, default=30)
+graceful_timeout = env("WEB_GRACEFUL_TIMEOUT", cast=int, default=30)
+keepalive = env("WEB_KEEPALIVE", cast=int, default=5)
+
+accesslog = env("WEB_ACCESS_LOG", default="") or None
+errorlog = "-"
+loglevel = env("WEB_LOG_LEVEL", default="info")
+
+# Worker heartbeat files on tmpfs; a disk-backed /tmp (common in containers)
+# can stall workers long enough to get them killed.
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# Request metrics from all workers are added up through METRICS_DIR (see
+# common/metrics.py): start each run empty, flush a worker's last totals as it
+# exits, and fold them into the archive once it is gone.
+METRICS_DIR = env("METRICS_DIR", default="")
+
+
+def on_starting(server):
+    if METRICS_DIR:
+        from common.metrics import clear_dir
+
+        clear_dir(METRICS_DIR)
+
+
+def worker_exit(server, worker):
+    if METRICS_DIR:
+        from common.metrics import registry
+
+        registry.flush()
+
+
+def child_exit(server, worker):
+    if METRICS_DIR:
+        from common.metrics import merge_dead_process
+
+        merge_dead_process(METRICS_DIR, worker.pid)
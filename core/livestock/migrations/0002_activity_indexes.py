@@ -0,0 +1,28 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; avoids locking
+    # writes on large activity tables.
+    atomic = False
+
+    dependencies = [
+        ("livestock", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="activity",
+            index=models.Index(
+                fields=["-date", "-id"], name="livestock_activity_date_id"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="activity",
+            index=models.Index(
+                fields=["cow", "-date", "-id"], name="livestock_activity_cow_date"
+            ),
+        ),
+    ]
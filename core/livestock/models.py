@@ -1,14 +1,17 @@
 from django.db import models
 from django.conf import settings
 from farms.models import FarmerProfile, Farm
+from common.tracking import LoadedValuesMixin
 
 
-class Cow(models.Model):
+class Cow(LoadedValuesMixin, models.Model):
 	tag = models.CharField(max_length=50)
 	breed = models.CharField(max_length=100)
 	dob = models.DateField(blank=True, null=True)
 	farm = models.ForeignKey(Farm, on_delete=models.CASCADE, related_name='cows')
 	owner = models.ForeignKey(FarmerProfile, on_delete=models.CASCADE, related_name='cows')
+	# Id of the last transaction that wrote the row; set by the sync triggers.
+	sync_version = models.BigIntegerField(default=0, editable=False, db_index=True)
 
 	class Meta:
 		unique_together = ("farm", "tag")
@@ -17,7 +20,7 @@ class Cow(models.Model):
 		return f"{self.tag} ({self.breed})"
 
 
-class Activity(models.Model):
+class Activity(LoadedValuesMixin, models.Model):
 	class Types(models.TextChoices):
 		VACCINATION = 'vaccination', 'Vaccination'
 		BIRTH = 'birth', 'Birth'
@@ -28,6 +31,15 @@ class Activity(models.Model):
 	type = models.CharField(max_length=20, choices=Types.choices)
 	notes = models.TextField(blank=True)
 	date = models.DateField()
+	sync_version = models.BigIntegerField(default=0, editable=False, db_index=True)
+
+	class Meta:
+		indexes = [
+			# Recent activities across the platform, ordered (date DESC, id DESC).
+			models.Index(fields=["-date", "-id"], name="livestock_activity_date_id"),
+			# Same ordering scoped to the cows of a farm / owner.
+			models.Index(fields=["cow", "-date", "-id"], name="livestock_activity_cow_date"),
+		]
 
 	def __str__(self) -> str:
 		return f"{self.get_type_display()} on {self.date} for {self.cow.tag}"
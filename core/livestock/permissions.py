@@ -1,8 +1,53 @@
+from django.db.models import F
 from rest_framework.permissions import BasePermission
 
+# Annotations for Activity/MilkRecord querysets so object permissions can be
+# decided from the fetched row (see ``resolve_ownership``).
+OWNERSHIP_ANNOTATIONS = {
+    "farm_agent_id": F("cow__farm__agent_id"),
+    "owner_user_id": F("cow__owner__user_id"),
+}
+# The same for Cow querysets; unlike ``select_related`` they survive the
+# ``?fields=`` projection (``common.lean.SparseFieldsMixin``).
+COW_OWNERSHIP_ANNOTATIONS = {
+    "farm_agent_id": F("farm__agent_id"),
+    "owner_user_id": F("owner__user_id"),
+}
+
+
+def resolve_ownership(obj):
+    """Return ``(agent_id, owner_user_id)`` for a Cow, Activity or MilkRecord.
+
+    Uses ``OWNERSHIP_ANNOTATIONS`` or relations already loaded by
+    ``select_related``; only when neither is available does it fall back to a
+    single query for the cow's farm agent and owner.
+    """
+    if hasattr(obj, "farm_agent_id") and hasattr(obj, "owner_user_id"):
+        return obj.farm_agent_id, obj.owner_user_id
+
+    from livestock.models import Cow
+
+    if isinstance(obj, Cow):
+        cow, cow_id = obj, obj.pk
+    else:
+        cow_id = getattr(obj, "cow_id", None)
+        cow = obj._state.fields_cache.get("cow")
+    if cow is not None:
+        cached = cow._state.fields_cache
+        farm, owner = cached.get("farm"), cached.get("owner")
+        if farm is not None and owner is not None:
+            return farm.agent_id, owner.user_id
+    if cow_id is None:
+        return None, None
+    row = (
+        Cow.objects.filter(pk=cow_id)
+        .values_list("farm__agent_id", "owner__user_id")
+        .first()
+    )
+    return row if row is not None else (None, None)
 
-class IsAgentForRelatedFarm(BasePermission):
 
+class IsAgentForRelatedFarm(BasePermission):
     message = "You must be the assigned Agent for this farm."
 
     def _is_agent(self, user):
@@ -26,32 +71,11 @@ class IsAgentForRelatedFarm(BasePermission):
         if not self._is_agent(user):
             return False
 
-        # Determine farm from object
-        farm_id = None
-        try:
-            # Cow -> has farm
-            if hasattr(obj, "farm") and getattr(obj.farm, "id", None) is not None:
-                farm_id = obj.farm.id
-            # Activity/MilkRecord -> obj.cow.farm
-            elif hasattr(obj, "cow") and hasattr(obj.cow, "farm"):
-                farm_id = getattr(obj.cow.farm, "id", None)
-        except Exception:
-            return False
-
-        if farm_id is None:
-            return False
-
-        # Lazy import to avoid circulars
-        try:
-            from farms.models import Farm
-
-            return Farm.objects.filter(id=farm_id, agent_id=user.id).exists()
-        except Exception:
-            return False
+        agent_id, _ = resolve_ownership(obj)
+        return agent_id is not None and agent_id == user.id
 
 
 class IsFarmerAndCowOwner(BasePermission):
-
     message = "You must be the owner (Farmer) of this cow or related record."
 
     def _is_farmer(self, user):
@@ -70,24 +94,5 @@ class IsFarmerAndCowOwner(BasePermission):
         if not self._is_farmer(user):
             return False
         # obj can be Cow, Activity, or MilkRecord (via view usage)
-        cow = None
-        try:
-            from livestock.models import Cow, Activity
-            from production.models import MilkRecord
-
-            if hasattr(obj, "owner") and hasattr(obj, "farm"):
-                # Cow
-                cow = obj
-            elif hasattr(obj, "cow") and isinstance(obj, Activity):
-                cow = obj.cow
-            elif hasattr(obj, "cow"):
-                # MilkRecord (has cow FK)
-                cow = obj.cow
-        except Exception:
-            pass
-        if cow is None:
-            return False
-        # Check ownership
-        farmer_profile = getattr(cow, "owner", None)
-        user_id = getattr(getattr(farmer_profile, "user", None), "id", None)
-        return user_id == user.id
+        _, owner_user_id = resolve_ownership(obj)
+        return owner_user_id is not None and owner_user_id == user.id
@@ -1,9 +1,13 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Cow, Activity
 from farms.serializers import FarmSerializer
+from common.access import serializer_scope
+from common.bulk import validate_rows
+from common.metrics import TimedSerializerMixin
 
 
-class CowSerializer(serializers.ModelSerializer):
+class CowSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     farm = FarmSerializer(read_only=True)
     farm_id = serializers.IntegerField(write_only=True)
     owner_id = serializers.IntegerField(
@@ -18,6 +22,9 @@ class CowSerializer(serializers.ModelSerializer):
     def validate_farm_id(self, value):
         from farms.models import Farm
 
+        scope = serializer_scope(self)
+        if scope is not None and scope.manages_farm(value):
+            return value
         if not Farm.objects.filter(pk=value).exists():
             raise serializers.ValidationError("Farm not found.")
         return value
@@ -27,6 +34,9 @@ class CowSerializer(serializers.ModelSerializer):
             return value
         from farms.models import FarmerProfile
 
+        scope = serializer_scope(self)
+        if scope is not None and scope.can_assign_profile(value):
+            return value
         if not FarmerProfile.objects.filter(pk=value).exists():
             raise serializers.ValidationError("FarmerProfile not found.")
         return value
@@ -49,7 +59,50 @@ class CowSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
-class ActivitySerializer(serializers.ModelSerializer):
+# Shared field instances for bulk enrollment and transfers (see common.bulk).
+_BULK_ENROLL_FIELDS = (
+    ("tag", serializers.CharField(max_length=50)),
+    ("breed", serializers.CharField(max_length=100)),
+    ("dob", serializers.DateField(required=False, allow_null=True)),
+    ("farm_id", serializers.IntegerField()),
+    ("owner_id", serializers.IntegerField(required=False, allow_null=True)),
+)
+_BULK_TRANSFER_FIELDS = (
+    ("id", serializers.IntegerField()),
+    ("farm_id", serializers.IntegerField(required=False)),
+    ("owner_id", serializers.IntegerField(required=False)),
+)
+
+
+def validate_enroll_rows(rows):
+    """Validate raw bulk enrollment rows; returns ``(valid, errors)``.
+
+    Farm and owner existence, owner-farm membership and tag uniqueness are
+    checked by the caller for the whole batch at once.
+    """
+    return validate_rows(rows, _BULK_ENROLL_FIELDS)
+
+
+def validate_transfer_rows(rows):
+    """Validate raw bulk transfer rows (``id`` plus ``farm_id`` and/or ``owner_id``)."""
+    valid, errors = validate_rows(rows, _BULK_TRANSFER_FIELDS)
+    moves = []
+    for index, attrs in valid:
+        if "farm_id" in attrs or "owner_id" in attrs:
+            moves.append((index, attrs))
+        else:
+            errors.append(
+                {
+                    "index": index,
+                    "errors": {
+                        "non_field_errors": ["Give a new farm_id and/or owner_id."]
+                    },
+                }
+            )
+    return moves, errors
+
+
+class ActivitySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     cow_id = serializers.IntegerField(write_only=True)
 
     class Meta:
@@ -58,6 +111,9 @@ class ActivitySerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
     def validate_cow_id(self, value):
+        scope = serializer_scope(self)
+        if scope is not None and scope.can_access_cow(value):
+            return value
         if not Cow.objects.filter(pk=value).exists():
             raise serializers.ValidationError("Cow not found.")
         return value
@@ -72,3 +128,37 @@ class ActivitySerializer(serializers.ModelSerializer):
         if cow_id is not None:
             instance.cow_id = cow_id
         return super().update(instance, validated_data)
+
+
+class CowFilterSerializer(serializers.Serializer):
+    """Narrows a farm's cows for bulk activity logging."""
+
+    breed = serializers.CharField(max_length=100, required=False)
+    owner_id = serializers.IntegerField(required=False)
+    dob_from = serializers.DateField(required=False)
+    dob_to = serializers.DateField(required=False)
+
+
+class BulkActivitySerializer(serializers.Serializer):
+    """One activity for a list of cows (``cow_ids``) or a farm's herd (``farm_id``)."""
+
+    type = serializers.ChoiceField(choices=Activity.Types.choices)
+    date = serializers.DateField()
+    notes = serializers.CharField(required=False, allow_blank=True, default="")
+    cow_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+        allow_empty=False,
+        max_length=settings.ACTIVITY_BULK_MAX_COWS,
+    )
+    farm_id = serializers.IntegerField(required=False)
+    filter = CowFilterSerializer(required=False)
+
+    def validate(self, attrs):
+        if ("cow_ids" in attrs) == ("farm_id" in attrs):
+            raise serializers.ValidationError("Give either cow_ids or farm_id.")
+        if "filter" in attrs and "farm_id" not in attrs:
+            raise serializers.ValidationError(
+                {"filter": "Filters apply to farm_id only."}
+            )
+        return attrs
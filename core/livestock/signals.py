@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common import access
+from farms import report_cache
+from .models import Activity, Cow
+
+
+@receiver(post_save, sender=Cow)
+@receiver(post_delete, sender=Cow)
+def invalidate_reports_on_cow_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    report_cache.invalidate(farm_ids=[instance.farm_id, loaded.get("farm_id")])
+
+
+@receiver(post_save, sender=Cow)
+@receiver(post_delete, sender=Cow)
+def invalidate_access_on_cow_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    if access.unchanged(instance, loaded, kwargs, ("farm_id", "owner_id")):
+        return
+    access.invalidate(
+        farm_ids=[instance.farm_id, loaded.get("farm_id")],
+        profile_ids=[instance.owner_id, loaded.get("owner_id")],
+    )
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_delete, sender=Activity)
+def invalidate_reports_on_activity_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    report_cache.invalidate(cow_ids=[instance.cow_id, loaded.get("cow_id")])
@@ -1,3 +1,36 @@
-from django.test import TestCase
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from accounts.authentication import TokenObtainPairSerializer
+from accounts.models import User
+from farms.models import Farm, FarmerProfile
+from livestock.models import Cow
+
+
+class CowRetrieveTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = User.objects.create_user("agent", role=User.Roles.AGENT)
+        cls.farmer = User.objects.create_user("farmer", role=User.Roles.FARMER)
+        farm = Farm.objects.create(name="Farm", location="Sylhet", agent=cls.agent)
+        profile = FarmerProfile.objects.create(user=cls.farmer, farm=farm)
+        cls.cow = Cow.objects.create(tag="C-1", farm=farm, owner=profile)
+
+    def login(self, user):
+        token = TokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_projected_retrieve_checks_ownership_from_the_row(self):
+        for user in (self.agent, self.farmer):
+            with self.subTest(user=user.username):
+                self.login(user)
+                # User row and the projected cow; no ownership lookup.
+                with self.assertNumQueries(2):
+                    response = self.client.get(f"/api/cows/{self.cow.id}/?fields=tag")
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), {"id": self.cow.id, "tag": "C-1"})
+
+    def test_projected_retrieve_still_enforces_ownership(self):
+        other = User.objects.create_user("other", role=User.Roles.AGENT)
+        self.login(other)
+        response = self.client.get(f"/api/cows/{self.cow.id}/?fields=tag")
+        self.assertEqual(response.status_code, 404)
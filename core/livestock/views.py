@@ -1,24 +1,92 @@
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from .models import Cow, Activity
-from .serializers import CowSerializer, ActivitySerializer
-from .permissions import IsFarmerAndCowOwner, IsAgentForRelatedFarm
-from farms.permissions import IsSuperAdmin
+from .serializers import (
+    CowSerializer,
+    ActivitySerializer,
+    BulkActivitySerializer,
+    validate_enroll_rows,
+    validate_transfer_rows,
+)
+from .permissions import (
+    COW_OWNERSHIP_ANNOTATIONS,
+    OWNERSHIP_ANNOTATIONS,
+    IsFarmerAndCowOwner,
+    IsAgentForRelatedFarm,
+)
+from farms import report_cache
 from farms.models import Farm, FarmerProfile
+from farms.permissions import IsSuperAdmin
+from common import access
+from common.access import get_access_scope
+from common.bulk import bulk_response, bulk_rows
+from common.export import EXPORT_RENDERERS, export_response, filter_by_cow_and_dates
+from common.lean import LeanListMixin, related
+from common.routers import ReplicaReadsMixin
+from farms.views import FARM_SUMMARY, USER_SUMMARY
+from production import rollup
+from production.parsers import BulkJSONParser, NDJSONParser
+
+COW_SUMMARY = ["id", "tag", "breed", "farm_id", "owner_id"]
+
+# Bulk transfers in one statement; ``bulk_update``'s per-row CASE expressions
+# grow quadratically with the batch.
+TRANSFER_SQL = """
+    UPDATE livestock_cow c
+    SET farm_id = t.farm_id, owner_id = t.owner_id
+    FROM unnest(%s::bigint[], %s::bigint[], %s::bigint[]) AS t(id, farm_id, owner_id)
+    WHERE c.id = t.id
+"""
+
+# Activities for every cow the inner query selects, in one statement.
+BULK_ACTIVITY_SQL = """
+    INSERT INTO livestock_activity (cow_id, type, notes, date, sync_version)
+    SELECT c.id, %s, %s, %s, 0 FROM ({cows}) AS c
+    RETURNING id, cow_id
+"""
 
+ACTIVITY_EXPORT_COLUMNS = {
+    "id": "id",
+    "cow_id": "cow_id",
+    "cow_tag": "cow__tag",
+    "farm_id": "cow__farm_id",
+    "type": "type",
+    "date": "date",
+    "notes": "notes",
+}
 
-class CowViewSet(viewsets.ModelViewSet):
-    queryset = Cow.objects.select_related("farm", "owner").all()
+
+class CowViewSet(ReplicaReadsMixin, LeanListMixin, viewsets.ModelViewSet):
+    queryset = Cow.objects.select_related("farm__agent", "owner").all()
     serializer_class = CowSerializer
+    keyset_ordering = ("id",)
+    list_fields = {
+        "id": "id",
+        "tag": "tag",
+        "breed": "breed",
+        "dob": "dob",
+        "farm_id": "farm_id",
+        "owner_id": "owner_id",
+    }
+    list_expansions = {
+        "farm": related("farm", FARM_SUMMARY),
+        "agent": related("farm__agent", USER_SUMMARY),
+    }
     permission_classes = [
         IsAuthenticated,
         (IsSuperAdmin | IsFarmerAndCowOwner | IsAgentForRelatedFarm),
     ]
 
     def get_queryset(self):
-        qs = Cow.objects.select_related("farm", "owner").all()
+        qs = Cow.objects.select_related("farm__agent", "owner").all()
+        if self.detail:
+            # Object permissions read farm agent / owner from the fetched row.
+            qs = qs.annotate(**COW_OWNERSHIP_ANNOTATIONS)
         user = self.request.user
         if getattr(user, "is_superuser", False) or getattr(user, "is_staff", False):
             return qs
@@ -48,18 +116,11 @@ class CowViewSet(viewsets.ModelViewSet):
                 headers=headers,
             )
 
+        scope = get_access_scope(request)
         if Roles and role == Roles.AGENT:
-            if (
-                not farm_id
-                or not Farm.objects.filter(id=farm_id, agent_id=user.id).exists()
-            ):
+            if not farm_id or not scope.manages_farm(farm_id):
                 raise PermissionDenied("You can only add cows to your managed farms.")
-            if (
-                owner_id
-                and not FarmerProfile.objects.filter(
-                    id=owner_id, farm_id=farm_id
-                ).exists()
-            ):
+            if owner_id and not scope.profile_in_farm(owner_id, farm_id):
                 raise ValidationError(
                     {"owner_id": "Owner must belong to the same farm."}
                 )
@@ -74,16 +135,14 @@ class CowViewSet(viewsets.ModelViewSet):
             )
 
         if Roles and role == Roles.FARMER:
-            try:
-                fp = FarmerProfile.objects.select_related("farm").get(user_id=user.id)
-            except FarmerProfile.DoesNotExist:
+            if scope.farmer_profile_id is None:
                 raise PermissionDenied("You do not have a farmer profile.")
             if not farm_id:
                 raise ValidationError({"farm_id": "This field is required."})
-            if int(farm_id) != int(fp.farm_id):
+            if not scope.manages_farm(farm_id):
                 raise PermissionDenied("You can only enroll cows under your own farm.")
             mutable_data = request.data.copy()
-            mutable_data["owner_id"] = fp.id
+            mutable_data["owner_id"] = scope.farmer_profile_id
             serializer = self.get_serializer(data=mutable_data)
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -113,24 +172,19 @@ class CowViewSet(viewsets.ModelViewSet):
             serializer.save()
             return Response({"message": "Cow updated", "data": serializer.data})
 
+        # get_object() has checked the cow; the scope is only needed (and
+        # loaded) when the request moves it.
         if Roles and role == Roles.AGENT:
-            if (
-                farm_id
-                and not Farm.objects.filter(id=farm_id, agent_id=user.id).exists()
-            ):
-                raise PermissionDenied(
-                    "You can only keep cows within your managed farms."
-                )
-            if (
-                farm_id
-                and owner_id
-                and not FarmerProfile.objects.filter(
-                    id=owner_id, farm_id=farm_id
-                ).exists()
-            ):
-                raise ValidationError(
-                    {"owner_id": "Owner must belong to the same farm."}
-                )
+            if farm_id:
+                scope = get_access_scope(request)
+                if not scope.manages_farm(farm_id):
+                    raise PermissionDenied(
+                        "You can only keep cows within your managed farms."
+                    )
+                if owner_id and not scope.profile_in_farm(owner_id, farm_id):
+                    raise ValidationError(
+                        {"owner_id": "Owner must belong to the same farm."}
+                    )
             serializer = self.get_serializer(
                 instance, data=request.data, partial=partial
             )
@@ -139,28 +193,285 @@ class CowViewSet(viewsets.ModelViewSet):
             return Response({"message": "Cow updated", "data": serializer.data})
 
         if Roles and role == Roles.FARMER:
-            try:
-                fp = FarmerProfile.objects.get(user_id=user.id)
-            except FarmerProfile.DoesNotExist:
-                raise PermissionDenied("You do not have a farmer profile.")
-            if farm_id and int(farm_id) != int(fp.farm_id):
-                raise PermissionDenied("You must keep the cow under your own farm.")
+            profile_id = None
+            if farm_id or owner_id:
+                scope = get_access_scope(request)
+                profile_id = scope.farmer_profile_id
+                if profile_id is None:
+                    raise PermissionDenied("You do not have a farmer profile.")
+                if farm_id and not scope.manages_farm(farm_id):
+                    raise PermissionDenied("You must keep the cow under your own farm.")
             serializer = self.get_serializer(
                 instance, data=request.data, partial=partial
             )
             serializer.is_valid(raise_exception=True)
-            if owner_id and int(owner_id) != int(fp.id):
-                serializer.save(owner_id=fp.id)
+            if owner_id and int(owner_id) != int(profile_id):
+                serializer.save(owner_id=profile_id)
             else:
                 serializer.save()
             return Response({"message": "Cow updated", "data": serializer.data})
 
         raise PermissionDenied("Not allowed to update cows.")
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=[BulkJSONParser, NDJSONParser],
+    )
+    def bulk(self, request, *args, **kwargs):
+        """Enroll many cows in one request.
+
+        Accepts a JSON array or an NDJSON stream of ``{"tag", "breed", "dob",
+        "farm_id", "owner_id"}`` objects, with the same role rules as
+        ``create``. Farms, owners and ``(farm, tag)`` uniqueness are checked for
+        the whole batch with a few set-based queries; invalid rows are reported
+        by index and the remaining rows are inserted with ``bulk_create``.
+        """
+        user = request.user
+        role = getattr(user, "role", None)
+        Roles = getattr(user.__class__, "Roles", None)
+        rows = bulk_rows(request, settings.COW_BULK_MAX_ROWS, "cows")
+
+        unrestricted = getattr(user, "is_superuser", False) or getattr(
+            user, "is_staff", False
+        )
+        scope = None if unrestricted else get_access_scope(request)
+        if unrestricted:
+            denied = "Farm not found."
+        elif Roles and role == Roles.AGENT:
+            denied = "You can only add cows to your managed farms."
+        elif Roles and role == Roles.FARMER:
+            if scope.farmer_profile_id is None:
+                raise PermissionDenied("You do not have a farmer profile.")
+            denied = "You can only enroll cows under your own farm."
+        else:
+            raise PermissionDenied("Not allowed to create cows.")
+
+        valid, errors = validate_enroll_rows(rows)
+        if scope is not None and scope.farmer_profile_id is not None:
+            for _, attrs in valid:
+                attrs["owner_id"] = scope.farmer_profile_id
+        farm_ids, profile_farms = self._bulk_targets(scope, valid)
+        taken = self._taken_tags(valid)
+
+        cows = []
+        for index, attrs in valid:
+            key = (attrs["farm_id"], attrs["tag"])
+            if attrs["farm_id"] not in farm_ids:
+                row_errors = {"farm_id": [denied]}
+            elif attrs.get("owner_id") is None:
+                row_errors = {"owner_id": ["This field is required."]}
+            elif scope is None and attrs["owner_id"] not in profile_farms:
+                row_errors = {"owner_id": ["FarmerProfile not found."]}
+            elif profile_farms.get(attrs["owner_id"]) != attrs["farm_id"]:
+                row_errors = {"owner_id": ["Owner must belong to the same farm."]}
+            elif key in taken:
+                row_errors = {
+                    "tag": ["A cow with this tag already exists in this farm."]
+                }
+            else:
+                taken.add(key)
+                cows.append((index, Cow(**attrs)))
+                continue
+            errors.append({"index": index, "errors": row_errors})
+
+        self._bulk_write(
+            lambda: Cow.objects.bulk_create(
+                [cow for _, cow in cows], batch_size=settings.COW_BULK_BATCH_SIZE
+            )
+        )
+        farms = {cow.farm_id for _, cow in cows}
+        report_cache.invalidate(farm_ids=farms)
+        access.invalidate(farm_ids=farms, profile_ids={cow.owner_id for _, cow in cows})
+        errors.sort(key=lambda error: error["index"])
+        return bulk_response(
+            "Cows enrolled",
+            {
+                "received": len(rows),
+                "saved": len(cows),
+                "created": [{"index": index, "id": cow.id} for index, cow in cows],
+                "errors": errors,
+            },
+            saved=len(cows),
+            noun="cows",
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk-transfer",
+        parser_classes=[BulkJSONParser, NDJSONParser],
+    )
+    def bulk_transfer(self, request, *args, **kwargs):
+        """Move many cows to another farm and/or owner in one request.
+
+        Rows are ``{"id", "farm_id", "owner_id"}`` (either target may be
+        omitted to keep the current one). Agents may move cows between their
+        managed farms; the final owner must belong to the final farm and the
+        cow's tag must be free there. Valid rows are written with a single
+        ``UPDATE``, invalid rows are reported by index.
+        """
+        user = request.user
+        role = getattr(user, "role", None)
+        Roles = getattr(user.__class__, "Roles", None)
+        rows = bulk_rows(request, settings.COW_BULK_MAX_ROWS, "cows")
+
+        unrestricted = getattr(user, "is_superuser", False) or getattr(
+            user, "is_staff", False
+        )
+        scope = None if unrestricted else get_access_scope(request)
+        if unrestricted:
+            denied, farm_denied = "Cow not found.", "Farm not found."
+        elif Roles and role == Roles.AGENT:
+            denied = "You can only transfer cows in your managed farms."
+            farm_denied = "You can only keep cows within your managed farms."
+        else:
+            raise PermissionDenied("Not allowed to transfer cows.")
+
+        moves, errors = validate_transfer_rows(rows)
+        locked = Cow.objects.select_for_update().filter(
+            id__in={attrs["id"] for _, attrs in moves}
+        )
+        if scope is not None:
+            # Checked on the locked rows rather than the scope's cow ids, which
+            # may predate a transfer that committed since.
+            locked = locked.filter(farm_id__in=scope.farm_ids)
+        # Locked so concurrent edits cannot slip between the checks and the write.
+        current = {
+            cow.id: cow for cow in locked.only("id", "tag", "farm_id", "owner_id")
+        }
+        targets = []
+        for index, attrs in moves:
+            cow = current.get(attrs["id"])
+            if cow is not None:
+                attrs.setdefault("farm_id", cow.farm_id)
+                attrs.setdefault("owner_id", cow.owner_id)
+                attrs["tag"] = cow.tag
+            targets.append((index, attrs))
+        farm_ids, profile_farms = self._bulk_targets(scope, targets)
+        taken = self._taken_tags(
+            [(index, attrs) for index, attrs in targets if "tag" in attrs]
+        )
+
+        moved, pairs, seen = [], set(), set()
+        for index, attrs in targets:
+            cow = current.get(attrs["id"])
+            farm_id, owner_id = attrs.get("farm_id"), attrs.get("owner_id")
+            if cow is None:
+                row_errors = {"id": [denied]}
+            elif cow.id in seen:
+                row_errors = {"id": ["Cow appears more than once in this batch."]}
+            elif farm_id not in farm_ids:
+                row_errors = {"farm_id": [farm_denied]}
+            elif scope is None and owner_id not in profile_farms:
+                row_errors = {"owner_id": ["FarmerProfile not found."]}
+            elif profile_farms.get(owner_id) != farm_id:
+                row_errors = {"owner_id": ["Owner must belong to the same farm."]}
+            elif farm_id != cow.farm_id and (farm_id, cow.tag) in taken:
+                row_errors = {
+                    "tag": ["A cow with this tag already exists in this farm."]
+                }
+            else:
+                seen.add(cow.id)
+                if (farm_id, owner_id) != (cow.farm_id, cow.owner_id):
+                    taken.add((farm_id, cow.tag))
+                    pairs |= {(cow.farm_id, cow.owner_id), (farm_id, owner_id)}
+                    cow.farm_id, cow.owner_id = farm_id, owner_id
+                    moved.append(cow)
+                continue
+            errors.append({"index": index, "errors": row_errors})
+
+        self._bulk_write(lambda: self._transfer(moved))
+        # The raw UPDATE skips the signals that keep rollups, reports and scopes fresh.
+        rollup.mark_pairs(pairs)
+        report_cache.invalidate(farm_ids={farm_id for farm_id, _ in pairs})
+        access.invalidate(
+            farm_ids={farm_id for farm_id, _ in pairs},
+            profile_ids={owner_id for _, owner_id in pairs},
+        )
+        errors.sort(key=lambda error: error["index"])
+        return bulk_response(
+            "Cows transferred",
+            {
+                "received": len(rows),
+                "saved": len(seen),
+                "moved": len(moved),
+                "errors": errors,
+            },
+            saved=len(seen),
+            noun="cows",
+            success=status.HTTP_200_OK,
+        )
+
+    def _transfer(self, cows):
+        if not cows:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                TRANSFER_SQL,
+                [
+                    [cow.id for cow in cows],
+                    [cow.farm_id for cow in cows],
+                    [cow.owner_id for cow in cows],
+                ],
+            )
+
+    def _bulk_targets(self, scope, valid):
+        """Farm ids and ``{profile id: farm id}`` the batch may write to.
+
+        Staff get what exists among the rows' ids (two queries); other users
+        get their access scope.
+        """
+        if scope is not None:
+            return scope.farm_ids, scope.profile_farms
+        farm_ids = {attrs.get("farm_id") for _, attrs in valid}
+        owner_ids = {attrs.get("owner_id") for _, attrs in valid}
+        return (
+            set(Farm.objects.filter(id__in=farm_ids).values_list("id", flat=True)),
+            dict(
+                FarmerProfile.objects.filter(id__in=owner_ids).values_list(
+                    "id", "farm_id"
+                )
+            ),
+        )
 
-class ActivityViewSet(viewsets.ModelViewSet):
+    def _taken_tags(self, valid):
+        """``(farm_id, tag)`` pairs already used among the rows' farms and tags."""
+        farm_ids = {attrs["farm_id"] for _, attrs in valid}
+        tags = {attrs["tag"] for _, attrs in valid}
+        if not farm_ids:
+            return set()
+        return set(
+            Cow.objects.filter(farm_id__in=farm_ids, tag__in=tags).values_list(
+                "farm_id", "tag"
+            )
+        )
+
+    def _bulk_write(self, write):
+        # Checks ran on a snapshot; a cow enrolled or moved concurrently can
+        # still take a tag, which fails the whole batch instead of half of it.
+        try:
+            with transaction.atomic():
+                write()
+        except IntegrityError:
+            raise ValidationError(
+                {"detail": "Cows changed while the batch was checked; retry it."}
+            )
+
+
+class ActivityViewSet(ReplicaReadsMixin, LeanListMixin, viewsets.ModelViewSet):
     queryset = Activity.objects.select_related("cow").all()
     serializer_class = ActivitySerializer
+    keyset_ordering = ("-date", "-id")
+    list_fields = {
+        "id": "id",
+        "cow_id": "cow_id",
+        "type": "type",
+        "notes": "notes",
+        "date": "date",
+    }
+    list_expansions = {"cow": related("cow", COW_SUMMARY)}
     permission_classes = [
         IsAuthenticated,
         (IsSuperAdmin | IsFarmerAndCowOwner | IsAgentForRelatedFarm),
@@ -168,6 +479,9 @@ class ActivityViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = Activity.objects.select_related("cow").all()
+        if self.detail:
+            # Object permissions read farm agent / owner from the fetched row.
+            qs = qs.annotate(**OWNERSHIP_ANNOTATIONS)
         user = self.request.user
         if getattr(user, "is_superuser", False) or getattr(user, "is_staff", False):
             return qs
@@ -196,17 +510,16 @@ class ActivityViewSet(viewsets.ModelViewSet):
                 headers=headers,
             )
 
+        scope = get_access_scope(request)
         if Roles and role == Roles.AGENT:
-            if not Cow.objects.filter(id=cow_id, farm__agent_id=user.id).exists():
+            if not scope.can_access_cow(cow_id):
                 raise PermissionDenied(
                     "You can only log activities for cows in your farms."
                 )
         elif Roles and role == Roles.FARMER:
-            try:
-                fp = FarmerProfile.objects.get(user_id=user.id)
-            except FarmerProfile.DoesNotExist:
-                raise PermissionDenied("You do not have a farmer profile.")
-            if not Cow.objects.filter(id=cow_id, owner_id=fp.id).exists():
+            if not scope.can_access_cow(cow_id):
+                if scope.farmer_profile_id is None:
+                    raise PermissionDenied("You do not have a farmer profile.")
                 raise PermissionDenied("You can only log activities for your own cows.")
         else:
             raise PermissionDenied("Not allowed to create activities.")
@@ -220,3 +533,114 @@ class ActivityViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
             headers=headers,
         )
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request, *args, **kwargs):
+        """Log one activity for many cows in a single ``INSERT ... SELECT``.
+
+        The body names the cows either as ``cow_ids`` or as ``farm_id`` plus
+        an optional ``filter`` (``breed``, ``owner_id``, ``dob_from``,
+        ``dob_to``). Authorization is decided once: the cows are selected
+        through the user's role scope, and a ``cow_ids`` list containing a cow
+        outside it is rejected as a whole.
+        """
+        user = request.user
+        role = getattr(user, "role", None)
+        Roles = getattr(user.__class__, "Roles", None)
+        serializer = BulkActivitySerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        cows = Cow.objects.all()
+        scope = None
+        if getattr(user, "is_superuser", False) or getattr(user, "is_staff", False):
+            denied = "Farm not found."
+        elif Roles and role == Roles.AGENT:
+            scope = get_access_scope(request)
+            cows = cows.filter(farm__agent_id=user.id)
+            denied = "You can only log activities for cows in your farms."
+        elif Roles and role == Roles.FARMER:
+            scope = get_access_scope(request)
+            if scope.farmer_profile_id is None:
+                raise PermissionDenied("You do not have a farmer profile.")
+            cows = cows.filter(owner_id=scope.farmer_profile_id)
+            denied = "You can only log activities for your own cows."
+        else:
+            raise PermissionDenied("Not allowed to create activities.")
+
+        if "cow_ids" in data:
+            requested = set(data["cow_ids"])
+            cows = cows.filter(id__in=requested)
+        else:
+            farm_id = data["farm_id"]
+            if scope is not None:
+                if not scope.manages_farm(farm_id):
+                    raise PermissionDenied(denied)
+            elif not Farm.objects.filter(pk=farm_id).exists():
+                raise ValidationError({"farm_id": [denied]})
+            cows = cows.filter(farm_id=farm_id)
+            cow_filter = data.get("filter", {})
+            if "breed" in cow_filter:
+                cows = cows.filter(breed__iexact=cow_filter["breed"])
+            if "owner_id" in cow_filter:
+                cows = cows.filter(owner_id=cow_filter["owner_id"])
+            if "dob_from" in cow_filter:
+                cows = cows.filter(dob__gte=cow_filter["dob_from"])
+            if "dob_to" in cow_filter:
+                cows = cows.filter(dob__lte=cow_filter["dob_to"])
+
+        select, params = cows.values_list("id").query.sql_with_params()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                BULK_ACTIVITY_SQL.format(cows=select),
+                [data["type"], data["notes"], data["date"], *params],
+            )
+            created = cursor.fetchall()
+            if "cow_ids" in data:
+                missing = requested - {cow_id for _, cow_id in created}
+                if missing:
+                    # Raised inside the transaction, so the insert is undone.
+                    ids = ", ".join(map(str, sorted(missing)))
+                    if scope is None:
+                        raise ValidationError({"cow_ids": [f"Cows not found: {ids}."]})
+                    raise PermissionDenied(f"{denied} Rejected cow_ids: {ids}.")
+        if not created:
+            raise ValidationError({"detail": "No cows match."})
+        if "cow_ids" in data:
+            report_cache.invalidate(cow_ids=requested)
+        else:
+            report_cache.invalidate(farm_ids=[data["farm_id"]])
+        return Response(
+            {
+                "message": "Activities logged",
+                "data": {
+                    "type": data["type"],
+                    "date": data["date"],
+                    "saved": len(created),
+                    "created": [
+                        {"id": activity_id, "cow_id": cow_id}
+                        for activity_id, cow_id in created
+                    ],
+                },
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export(self, request, *args, **kwargs):
+        """Stream visible activities as CSV or NDJSON (``?output=``).
+
+        Filters: ``cow_id``, ``date_from``, ``date_to``.
+        """
+        queryset = filter_by_cow_and_dates(self.get_queryset(), request.query_params)
+        return export_response(
+            request,
+            queryset.order_by("date", "id"),
+            ACTIVITY_EXPORT_COLUMNS,
+            "activities",
+        )
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import MilkRecord
+from .models import MilkAnomaly, MilkRecord
 
 
 @admin.register(MilkRecord)
@@ -9,3 +9,12 @@ class MilkRecordAdmin(admin.ModelAdmin):
     search_fields = ("cow__tag",)
     list_select_related = ("cow",)
     date_hierarchy = "date"
+
+
+@admin.register(MilkAnomaly)
+class MilkAnomalyAdmin(admin.ModelAdmin):
+    list_display = ("cow", "date", "liters", "baseline", "score", "detected_at")
+    list_filter = ("date",)
+    search_fields = ("cow__tag",)
+    list_select_related = ("cow",)
+    date_hierarchy = "date"
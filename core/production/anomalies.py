@@ -0,0 +1,228 @@
+"""Incremental detection of milk yield drops into ``production_milkanomaly``.
+
+Each run handles the milk records written since the job's watermark, a
+``sync_version`` stored in ``production_scanwatermark``. As in ``sync.views``,
+a run covers the versions in ``[watermark, xmin)`` where ``xmin`` is the
+snapshot's oldest running transaction, so a record whose transaction commits
+after a run is picked up by the next one instead of being skipped. Only the
+cows with new records are read, and only ``window`` days of history before
+their earliest new record, so a run costs the same however long the herd's
+history is.
+
+A record's baseline is the median of its cow's records in the ``window`` days
+before it; its spread is the median absolute deviation (MAD) scaled to a
+standard deviation. Both are computed with NumPy for all new records of a
+chunk of cows at once. A record is flagged when its robust z-score is at most
+``-threshold`` and it is at least ``min_drop_pct`` percent below the baseline.
+
+Changing a record's liters stamps a new ``sync_version``, so the record is
+scored again: its anomaly is updated, or removed when it is no longer flagged.
+Records after it whose baseline it was part of are not re-scored;
+:func:`reset` clears the table and watermark for a full rescan.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.db import connection, transaction
+
+from farms import report_cache
+from production.models import MilkAnomaly, ScanWatermark
+
+# Versions, not the record ids the previous "milk_anomalies" watermark held.
+WATERMARK = "milk_anomaly_versions"
+WINDOW_DAYS = 30
+MIN_PERIODS = 10
+THRESHOLD = 3.5
+MIN_DROP_PCT = 15.0
+CHUNK_COWS = 200
+# Scales the MAD to a standard deviation for normally distributed yields.
+MAD_SCALE = 1.4826
+# A perfectly steady cow has a MAD of 0; liters are recorded to 0.01.
+MIN_SPREAD = 0.01
+
+# A transaction's records share a version, so a capped run ends after the
+# version of the last record it takes and may handle a few more.
+UPPER_BOUND_SQL = """
+    SELECT MAX(sync_version) + 1 FROM (
+        SELECT sync_version FROM production_milkrecord
+        WHERE sync_version >= %s AND sync_version < %s
+        ORDER BY sync_version LIMIT %s
+    ) new
+"""
+
+NEW_COWS_SQL = """
+    SELECT cow_id, MIN(date)
+    FROM production_milkrecord
+    WHERE sync_version >= %s AND sync_version < %s
+    GROUP BY cow_id
+    ORDER BY cow_id
+"""
+
+# Day offsets and centiliters keep the rows integer-only for NumPy.
+HISTORY_SQL = """
+    SELECT mr.cow_id, mr.date - %(epoch)s, (mr.liters * 100)::int4,
+           (mr.sync_version >= %(after)s AND mr.sync_version < %(upto)s)::int4
+    FROM unnest(%(cow_ids)s::bigint[], %(since)s::date[]) AS t(cow_id, since)
+    JOIN production_milkrecord mr
+      ON mr.cow_id = t.cow_id
+     AND mr.date >= t.since - %(window)s
+"""
+
+UPSERT_SQL = """
+    INSERT INTO production_milkanomaly (cow_id, date, liters, baseline, score, detected_at)
+    SELECT t.cow_id, %s::date + t.day, t.centiliters / 100.0, round(t.baseline::numeric, 2),
+           t.score, now()
+    FROM unnest(%s::bigint[], %s::int[], %s::int[], %s::float8[], %s::float8[])
+        AS t(cow_id, day, centiliters, baseline, score)
+    ON CONFLICT (cow_id, date) DO UPDATE
+    SET liters = EXCLUDED.liters,
+        baseline = EXCLUDED.baseline,
+        score = EXCLUDED.score,
+        detected_at = EXCLUDED.detected_at
+"""
+
+# Re-scored records that are no longer flagged.
+CLEAR_SQL = """
+    DELETE FROM production_milkanomaly a
+    USING unnest(%s::bigint[], %s::int[]) AS t(cow_id, day)
+    WHERE a.cow_id = t.cow_id AND a.date = %s::date + t.day
+"""
+
+
+def robust_scores(matrix, new, window, min_periods):
+    """Baseline, spread and z-score for the ``new`` cells of a cows x days matrix.
+
+    Returns ``(rows, days, liters, baseline, score)`` for the new cells that
+    have at least ``min_periods`` records in the preceding ``window`` days.
+    """
+    rows, days = np.nonzero(new)
+    # Column j of the padded matrix is day j - window, so the window before
+    # day d is padded[:, d:d + window].
+    padded = np.hstack([np.full((matrix.shape[0], window), np.nan), matrix])
+    history = padded[rows[:, None], days[:, None] + np.arange(window)]
+    enough = (~np.isnan(history)).sum(axis=1) >= min_periods
+    rows, days, history = rows[enough], days[enough], history[enough]
+
+    baseline = np.nanmedian(history, axis=1)
+    mad = np.nanmedian(np.abs(history - baseline[:, None]), axis=1)
+    spread = np.maximum(MAD_SCALE * mad, MIN_SPREAD)
+    liters = matrix[rows, days]
+    return rows, days, liters, baseline, (liters - baseline) / spread
+
+
+def _detect_chunk(cursor, cow_ids, since, after, upto, options):
+    window = options["window"]
+    epoch = min(since) - timedelta(days=window)
+    cursor.execute(
+        HISTORY_SQL,
+        {
+            "epoch": epoch,
+            "after": after,
+            "cow_ids": cow_ids,
+            "since": since,
+            "window": window,
+            "upto": upto,
+        },
+    )
+    records = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 4)
+    cows = np.array(cow_ids, dtype=np.int64)
+    row_index = np.searchsorted(cows, records[:, 0])
+
+    matrix = np.full((len(cows), records[:, 1].max() + 1), np.nan)
+    matrix[row_index, records[:, 1]] = records[:, 2] / 100
+    new = np.zeros(matrix.shape, dtype=bool)
+    new[row_index, records[:, 1]] = records[:, 3] == 1
+
+    rows, days, liters, baseline, score = robust_scores(
+        matrix, new, window, options["min_periods"]
+    )
+    flagged = (score <= -options["threshold"]) & (
+        liters <= baseline * (1 - options["min_drop_pct"] / 100)
+    )
+    cleared = new.copy()
+    cleared[rows[flagged], days[flagged]] = False
+    cleared_rows, cleared_days = np.nonzero(cleared)
+    changed = rows[flagged]
+    if cleared_rows.size:
+        cursor.execute(
+            CLEAR_SQL, [cows[cleared_rows].tolist(), cleared_days.tolist(), epoch]
+        )
+        if cursor.rowcount:
+            changed = np.concatenate([changed, cleared_rows])
+    if flagged.any():
+        cursor.execute(
+            UPSERT_SQL,
+            [
+                epoch,
+                cows[rows[flagged]].tolist(),
+                days[flagged].tolist(),
+                np.rint(liters[flagged] * 100).astype(int).tolist(),
+                baseline[flagged].tolist(),
+                score[flagged].round(2).tolist(),
+            ],
+        )
+    return int(new.sum()), cows[np.unique(changed)].tolist(), int(flagged.sum())
+
+
+def detect(
+    window=WINDOW_DAYS,
+    min_periods=MIN_PERIODS,
+    threshold=THRESHOLD,
+    min_drop_pct=MIN_DROP_PCT,
+    max_records=None,
+    chunk_cows=CHUNK_COWS,
+):
+    """Scan the records written since the watermark; returns a stats dict.
+
+    ``max_records`` caps the records handled by one run (the rest are left
+    for the next one). Raises ``DatabaseError`` if another run holds the
+    watermark.
+    """
+    options = {
+        "window": window,
+        "min_periods": min_periods,
+        "threshold": threshold,
+        "min_drop_pct": min_drop_pct,
+    }
+    stats = {"records": 0, "cows": 0, "anomalies": 0}
+    with transaction.atomic(), connection.cursor() as cursor:
+        ScanWatermark.objects.get_or_create(name=WATERMARK)
+        # NOWAIT: overlapping runs fail fast instead of queueing up.
+        mark = ScanWatermark.objects.select_for_update(nowait=True).get(name=WATERMARK)
+        after = mark.last_id
+        cursor.execute("SELECT sync_snapshot_version()")
+        upto = cursor.fetchone()[0]
+        if max_records:
+            cursor.execute(UPPER_BOUND_SQL, [after, upto, max_records])
+            upto = min(upto, cursor.fetchone()[0] or upto)
+        stats["watermark"] = after
+        if upto <= after:
+            return stats
+
+        cursor.execute(NEW_COWS_SQL, [after, upto])
+        new_cows = cursor.fetchall()
+        flagged_cows = []
+        for start in range(0, len(new_cows), chunk_cows):
+            cow_ids, since = zip(*new_cows[start : start + chunk_cows])
+            records, cows, anomalies = _detect_chunk(
+                cursor, list(cow_ids), list(since), after, upto, options
+            )
+            stats["records"] += records
+            stats["anomalies"] += anomalies
+            flagged_cows += cows
+        stats["cows"] = len(new_cows)
+
+        mark.last_id = upto
+        mark.save(update_fields=["last_id", "updated_at"])
+        stats["watermark"] = upto
+        report_cache.invalidate(cow_ids=flagged_cows)
+    return stats
+
+
+def reset():
+    """Delete all anomalies and rewind the watermark so the next run rescans."""
+    with transaction.atomic():
+        deleted, _ = MilkAnomaly.objects.all().delete()
+        ScanWatermark.objects.update_or_create(name=WATERMARK, defaults={"last_id": 0})
+    return deleted
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from production import anomalies
+
+
+class Command(BaseCommand):
+    help = (
+        "Flag milk records far below their cow's recent baseline. Only records "
+        "added or changed since the previous run are scanned, so it can run from "
+        "cron every few minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            default=anomalies.WINDOW_DAYS,
+            help="Days of history before a record that form its baseline.",
+        )
+        parser.add_argument(
+            "--min-periods",
+            type=int,
+            default=anomalies.MIN_PERIODS,
+            help="Records needed in the window before a record is scored.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=anomalies.THRESHOLD,
+            help="Flag records at least this many robust deviations below baseline.",
+        )
+        parser.add_argument(
+            "--min-drop-pct",
+            type=float,
+            default=anomalies.MIN_DROP_PCT,
+            help="Also require this relative drop below the baseline (percent).",
+        )
+        parser.add_argument(
+            "--max-records",
+            type=int,
+            help="Handle about this many new records per run (e.g. for a backfill).",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Delete all anomalies and rescan every record.",
+        )
+
+    def handle(self, *args, **options):
+        if options["window"] < 1 or options["min_periods"] > options["window"]:
+            raise CommandError("--min-periods must be between 1 and --window.")
+        if options["reset"]:
+            deleted = anomalies.reset()
+            self.stdout.write(f"Deleted {deleted} anomalies; rescanning all records.")
+        try:
+            stats = anomalies.detect(
+                window=options["window"],
+                min_periods=options["min_periods"],
+                threshold=options["threshold"],
+                min_drop_pct=options["min_drop_pct"],
+                max_records=options["max_records"],
+            )
+        except DatabaseError as e:
+            raise CommandError(f"Another run holds the watermark: {e}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Scanned {stats['records']} new records of {stats['cows']} cows, "
+                f"flagged {stats['anomalies']} (watermark {stats['watermark']})."
+            )
+        )
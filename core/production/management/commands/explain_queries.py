@@ -0,0 +1,206 @@
+import re
+import sys
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.views import UserViewSet
+from farms.models import Farm, FarmerProfile
+from farms.views import FarmerProfileViewSet, FarmViewSet
+from livestock.views import ActivityViewSet, CowViewSet
+from production.models import MilkRecord
+from production.views import MilkRecordViewSet
+
+REPORTING_DIR = settings.BASE_DIR.parent / "reporting"
+
+# (name, query constant in reporting/queries.py)
+REPORTING_QUERIES = [
+    ("general summary", "GENERAL_SUMMARY_SQL"),
+    ("farm summaries", "FARM_SUMMARY_SQL"),
+    ("farmer summaries", "FARMER_SUMMARY_SQL"),
+    ("farm milk production", "FARM_MILK_PRODUCTION_SQL"),
+    ("farm daily milk", "FARM_DAILY_MILK_SQL"),
+    ("farm cow analytics", "COW_ANALYTICS_SQL"),
+    ("farm milk anomalies", "FARM_MILK_ANOMALIES_SQL"),
+    ("recent activities", "RECENT_ACTIVITIES_SQL"),
+    ("recent farm activities", "RECENT_FARM_ACTIVITIES_SQL"),
+]
+
+LIST_VIEWSETS = [
+    FarmViewSet,
+    FarmerProfileViewSet,
+    CowViewSet,
+    ActivityViewSet,
+    MilkRecordViewSet,
+]
+
+SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+# ``:name`` bind parameters (not ``::type`` casts) -> psycopg ``%(name)s``.
+BIND_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN ANALYZE on the reporting queries and the viewset list "
+        "queries and flag sequential scans on large tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-rows",
+            type=int,
+            default=1000,
+            help="Only flag Seq Scans on tables with at least this many rows (estimate).",
+        )
+        parser.add_argument(
+            "--fail",
+            action="store_true",
+            help="Exit with an error when any query is flagged.",
+        )
+
+    def handle(self, *args, **options):
+        self.min_rows = options["min_rows"]
+        self.verbosity = options["verbosity"]
+        self.table_rows, self.parents = self._table_rows()
+        self.params = self._sample_params()
+        flagged = 0
+        for name, sql, params in self._reporting_queries():
+            flagged += self._report(f"reporting: {name}", self._explain(sql, params))
+        for name, queryset in self._list_queries():
+            plan = queryset.explain(analyze=True, buffers=True)
+            flagged += self._report(f"api: {name}", plan)
+
+        if flagged and options["fail"]:
+            raise CommandError(f"{flagged} queries use sequential scans.")
+        style = self.style.WARNING if flagged else self.style.SUCCESS
+        self.stdout.write(style(f"{flagged} queries flagged."))
+
+    def _report(self, label, plan):
+        scanned = {
+            table
+            for table in SEQ_SCAN.findall(plan)
+            if self.table_rows.get(table, 0) >= self.min_rows
+        }
+        # Scanned partitions are summarized under their partitioned table.
+        groups = {}
+        for table in scanned:
+            groups.setdefault(self.parents.get(table, table), []).append(table)
+        scans = sorted(groups)
+        if scans:
+            tables = ", ".join(
+                f"{t} ({len(groups[t])} partitions, ~{self.table_rows[t]} rows)"
+                if t in self.parents.values()
+                else f"{t} (~{self.table_rows[t]} rows)"
+                for t in scans
+            )
+            self.stdout.write(self.style.WARNING(f"SEQ SCAN  {label}: {tables}"))
+        else:
+            self.stdout.write(f"ok        {label}")
+        if self.verbosity >= 2 or scans:
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
+        return 1 if scans else 0
+
+    def _explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "EXPLAIN (ANALYZE, BUFFERS) " + BIND_PARAM.sub(r"%(\1)s", sql), params
+            )
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def _table_rows(self):
+        """Row estimates per table (partitioned tables: sum of partitions)."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, reltuples::bigint FROM pg_class "
+                "WHERE relkind IN ('r', 'p') AND relnamespace = 'public'::regnamespace"
+            )
+            rows = dict(cursor.fetchall())
+            cursor.execute(
+                "SELECT c.relname, p.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relkind = 'p'"
+            )
+            parents = dict(cursor.fetchall())
+        totals = {}
+        for child, parent in parents.items():
+            totals[parent] = totals.get(parent, 0) + max(rows.get(child, 0), 0)
+        for parent, total in totals.items():
+            rows[parent] = max(rows.get(parent, 0), total)
+        return rows, parents
+
+    def _sample_params(self):
+        farm = Farm.objects.annotate(n=Count("cows")).order_by("-n", "id").first()
+        if farm is None:
+            raise CommandError("No farms found; seed or generate data first.")
+        end = MilkRecord.objects.aggregate(last=Max("date"))["last"]
+        end = end or timezone.localdate()
+        return {
+            "farm_id": farm.id,
+            "farm_ids": list(
+                Farm.objects.order_by("id").values_list("id", flat=True)[:200]
+            ),
+            "user_ids": list(
+                FarmerProfile.objects.order_by("user_id").values_list(
+                    "user_id", flat=True
+                )[:200]
+            ),
+            "start_date": end - timedelta(days=30),
+            "end_date": end,
+            "limit": 20,
+            "followup_days": 14,
+        }
+
+    def _reporting_queries(self):
+        sys.path.insert(0, str(REPORTING_DIR))
+        try:
+            import queries
+        except ImportError as exc:
+            self.stderr.write(f"Skipping reporting queries ({exc}).")
+            return
+        finally:
+            sys.path.remove(str(REPORTING_DIR))
+        for name, constant in REPORTING_QUERIES:
+            sql = str(getattr(queries, constant))
+            needed = set(BIND_PARAM.findall(sql))
+            yield name, sql, {key: self.params[key] for key in needed}
+
+    def _list_queries(self):
+        """Yield the first page query of each list endpoint for one user per role."""
+        User = get_user_model()
+        users = [
+            User.objects.filter(is_superuser=True).order_by("id").first(),
+            User.objects.filter(role=User.Roles.AGENT, is_staff=False)
+            .annotate(n=Count("managed_farms__cows"))
+            .order_by("-n", "id")
+            .first(),
+            User.objects.filter(role=User.Roles.FARMER)
+            .annotate(n=Count("farmer_profile__cows"))
+            .order_by("-n", "id")
+            .first(),
+        ]
+        factory = APIRequestFactory()
+        page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE") or 50
+        for user in filter(None, users):
+            role = "superuser" if user.is_superuser else user.role.lower()
+            for viewset in LIST_VIEWSETS + ([UserViewSet] if user.is_superuser else []):
+                request = Request(factory.get("/"))
+                request.user = user
+                view = viewset(
+                    request=request, action="list", kwargs={}, format_kwarg=None
+                )
+                queryset = view.get_queryset().order_by(*view.keyset_ordering)
+                name = f"{viewset.__name__} list as {role}"
+                yield name, queryset[: page_size + 1]
+                if viewset is MilkRecordViewSet:
+                    yield f"{name} (last 30 days)", queryset.filter(
+                        date__gte=self.params["start_date"],
+                        date__lte=self.params["end_date"],
+                    )[: page_size + 1]
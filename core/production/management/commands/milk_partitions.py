@@ -0,0 +1,125 @@
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from production import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Manage date partitions of production_milkrecord: convert the table, "
+        "create future partitions and detach, archive or drop old ones. "
+        "Without options, creates missing future partitions and lists them; run it "
+        "from cron (e.g. monthly)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Convert a plain table into a partitioned one (copies all rows).",
+        )
+        parser.add_argument(
+            "--revert",
+            action="store_true",
+            help="Convert back into a plain table (detached partitions are not included).",
+        )
+        parser.add_argument(
+            "--interval",
+            choices=partitions.INTERVALS,
+            help="Partition size for --convert (default: MILK_PARTITION_INTERVAL).",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.MILK_PARTITION_AHEAD,
+            help="Future periods to create partitions for.",
+        )
+        retention = parser.add_mutually_exclusive_group()
+        retention.add_argument(
+            "--retain",
+            type=int,
+            help="Detach partitions older than this many periods (current one included).",
+        )
+        retention.add_argument(
+            "--detach-before",
+            type=date.fromisoformat,
+            help="Detach partitions that end on or before this date (YYYY-MM-DD).",
+        )
+        archive = parser.add_mutually_exclusive_group()
+        archive.add_argument(
+            "--archive-schema",
+            default="archive",
+            help="Schema detached partitions are moved to (default: archive).",
+        )
+        archive.add_argument(
+            "--drop",
+            action="store_true",
+            help="Drop detached partitions instead of archiving them.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning requires PostgreSQL.")
+        today = timezone.localdate()
+        with transaction.atomic(), connection.cursor() as cursor:
+            if options["revert"]:
+                if partitions.revert(cursor):
+                    self.stdout.write(self.style.SUCCESS("Converted to a plain table."))
+                else:
+                    self.stdout.write("Table is not partitioned.")
+                return
+
+            if options["convert"]:
+                interval = options["interval"] or settings.MILK_PARTITION_INTERVAL
+                if not interval:
+                    raise CommandError(
+                        "Pass --interval or set MILK_PARTITION_INTERVAL."
+                    )
+                if partitions.convert(cursor, interval, options["ahead"], today):
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f"Partitioned {partitions.TABLE} by {interval}."
+                        )
+                    )
+            if not partitions.is_partitioned(cursor):
+                raise CommandError(
+                    f"{partitions.TABLE} is not partitioned; use --convert first."
+                )
+            interval = partitions.detect_interval(cursor) or options["interval"]
+            if interval is None:
+                raise CommandError("No range partitions found; pass --interval.")
+
+            created = partitions.create_partitions(
+                cursor,
+                today,
+                partitions.shift_periods(today, interval, options["ahead"]),
+                interval,
+            )
+            for name in created:
+                self.stdout.write(f"created   {name}")
+
+            before = options["detach_before"]
+            if options["retain"] is not None:
+                if options["retain"] < 1:
+                    raise CommandError("--retain must be at least 1.")
+                before = partitions.shift_periods(
+                    today, interval, 1 - options["retain"]
+                )
+            if before is not None:
+                archive = None if options["drop"] else options["archive_schema"]
+                for name in partitions.detach_partitions(
+                    cursor, before, archive_schema=archive, drop=options["drop"]
+                ):
+                    where = "dropped" if options["drop"] else f"moved to {archive}"
+                    self.stdout.write(f"detached  {name} ({where})")
+
+            # Autovacuum analyzes partitions but never the partitioned parent.
+            if created or before is not None:
+                cursor.execute(f'ANALYZE "{partitions.TABLE}"')
+            for name, lower, upper, rows in partitions.list_partitions(cursor):
+                bounds = f"{lower} .. {upper}" if lower else "default"
+                self.stdout.write(f"  {name:<40} {bounds:<26} ~{rows} rows")
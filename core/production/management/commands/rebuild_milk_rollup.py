@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from production import rollup
+
+
+class Command(BaseCommand):
+    help = "Recompute production_dailymilkrollup from all milk records."
+
+    def handle(self, *args, **options):
+        rows = rollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt milk rollup ({rows} rows)."))
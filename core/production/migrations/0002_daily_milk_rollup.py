@@ -0,0 +1,57 @@
+from django.db import migrations, models
+
+BACKFILL_SQL = """
+    INSERT INTO production_dailymilkrollup (farm_id, owner_id, date, total_liters, cow_count)
+    SELECT c.farm_id, c.owner_id, mr.date, SUM(mr.liters), COUNT(*)
+    FROM production_milkrecord mr
+    JOIN livestock_cow c ON c.id = mr.cow_id
+    GROUP BY c.farm_id, c.owner_id, mr.date
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_seed_initial_data"),
+        ("livestock", "0001_initial"),
+        ("production", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyMilkRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("farm_id", models.BigIntegerField()),
+                ("owner_id", models.BigIntegerField()),
+                ("date", models.DateField()),
+                ("total_liters", models.DecimalField(decimal_places=2, max_digits=14)),
+                ("cow_count", models.PositiveIntegerField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["owner_id", "date"], name="production_rollup_owner_date"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("farm_id", "date", "owner_id"),
+                        name="production_rollup_farm_date_owner_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(
+            sql=BACKFILL_SQL,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
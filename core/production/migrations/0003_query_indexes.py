@@ -0,0 +1,45 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    # The milk record index is built CONCURRENTLY, which cannot run inside a
+    # transaction. The rollup indexes are rebuilt with INCLUDE columns; rollup
+    # refreshes do not rely on the unique constraint (DELETE + INSERT).
+    atomic = False
+
+    dependencies = [
+        ("production", "0002_daily_milk_rollup"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="dailymilkrollup",
+            name="production_rollup_farm_date_owner_uniq",
+        ),
+        migrations.RemoveIndex(
+            model_name="dailymilkrollup",
+            name="production_rollup_owner_date",
+        ),
+        migrations.AddIndex(
+            model_name="dailymilkrollup",
+            index=models.Index(
+                fields=["owner_id", "date"],
+                include=("total_liters",),
+                name="production_rollup_owner_date",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="milkrecord",
+            index=models.Index(fields=["-date", "-id"], name="production_milk_date_id"),
+        ),
+        migrations.AddConstraint(
+            model_name="dailymilkrollup",
+            constraint=models.UniqueConstraint(
+                fields=("farm_id", "date", "owner_id"),
+                include=("total_liters", "cow_count"),
+                name="production_rollup_farm_date_owner_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+def partition_milk_records(apps, schema_editor):
+    # Opt-in: without MILK_PARTITION_INTERVAL the table stays a plain table and
+    # can be converted later with ``manage.py milk_partitions --convert``.
+    interval = settings.MILK_PARTITION_INTERVAL
+    if not interval or schema_editor.connection.vendor != "postgresql":
+        return
+    from production import partitions
+
+    with schema_editor.connection.cursor() as cursor:
+        partitions.convert(
+            cursor, interval, settings.MILK_PARTITION_AHEAD, timezone.localdate()
+        )
+
+
+def unpartition_milk_records(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from production import partitions
+
+    with schema_editor.connection.cursor() as cursor:
+        partitions.revert(cursor)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("production", "0003_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_milk_records, unpartition_milk_records),
+    ]
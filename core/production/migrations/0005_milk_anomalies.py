@@ -0,0 +1,60 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("livestock", "0002_activity_indexes"),
+        ("production", "0004_partition_milkrecord"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScanWatermark",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("last_id", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="MilkAnomaly",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("liters", models.DecimalField(decimal_places=2, max_digits=6)),
+                ("baseline", models.DecimalField(decimal_places=2, max_digits=6)),
+                ("score", models.FloatField()),
+                ("detected_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "cow",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="milk_anomalies",
+                        to="livestock.cow",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date"],
+                "indexes": [
+                    models.Index(
+                        fields=["-date", "-id"], name="production_anomaly_date_id"
+                    )
+                ],
+                "unique_together": {("cow", "date")},
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("production", "0005_milk_anomalies"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="milkrecord",
+            name="sync_version",
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+    ]
@@ -1,18 +1,95 @@
 from django.db import models
 from livestock.models import Cow
+from common.tracking import LoadedValuesMixin
 
 
-class MilkRecord(models.Model):
+class MilkRecord(LoadedValuesMixin, models.Model):
 	cow = models.ForeignKey(Cow, on_delete=models.CASCADE, related_name='milk_records')
 	date = models.DateField()
 	liters = models.DecimalField(max_digits=6, decimal_places=2)
+	sync_version = models.BigIntegerField(default=0, editable=False, db_index=True)
 	# recorded_by will be added later during API work (FK to User)
 
 	class Meta:
 		unique_together = ("cow", "date")
 		ordering = ["-date"]
+		indexes = [
+			# Keyset pagination / date-ordered lists that are not narrowed to a few cows.
+			models.Index(fields=["-date", "-id"], name="production_milk_date_id"),
+		]
 
 	def __str__(self) -> str:
 		return f"{self.cow.tag} - {self.date} - {self.liters} L"
 
-# Create your models here.
+
+class DailyMilkRollup(models.Model):
+	"""Daily milk totals per (farm, owner), derived from MilkRecord.
+
+	Maintained incrementally by ``production.rollup`` and rebuildable at any
+	time with ``manage.py rebuild_milk_rollup``. Farm and owner are plain ids so
+	the rollup never takes part in cascading deletes.
+	"""
+
+	farm_id = models.BigIntegerField()
+	owner_id = models.BigIntegerField()
+	date = models.DateField()
+	total_liters = models.DecimalField(max_digits=14, decimal_places=2)
+	cow_count = models.PositiveIntegerField()
+
+	class Meta:
+		constraints = [
+			# Covers farm summaries and daily-milk reports with index-only scans.
+			models.UniqueConstraint(
+				fields=["farm_id", "date", "owner_id"],
+				name="production_rollup_farm_date_owner_uniq",
+				include=["total_liters", "cow_count"],
+			),
+		]
+		indexes = [
+			# Covers farmer summaries (owner + date range).
+			models.Index(
+				fields=["owner_id", "date"],
+				name="production_rollup_owner_date",
+				include=["total_liters"],
+			),
+		]
+
+	def __str__(self) -> str:
+		return f"Farm {self.farm_id} / owner {self.owner_id} - {self.date} - {self.total_liters} L"
+
+
+class MilkAnomaly(models.Model):
+	"""A milk record far below its cow's recent baseline.
+
+	Written by ``manage.py detect_milk_anomalies`` (see ``production.anomalies``):
+	``baseline`` is the median of the cow's records in the preceding window and
+	``score`` the robust z-score of ``liters`` against it (negative = lower).
+	"""
+
+	cow = models.ForeignKey(Cow, on_delete=models.CASCADE, related_name='milk_anomalies')
+	date = models.DateField()
+	liters = models.DecimalField(max_digits=6, decimal_places=2)
+	baseline = models.DecimalField(max_digits=6, decimal_places=2)
+	score = models.FloatField()
+	detected_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		unique_together = ("cow", "date")
+		ordering = ["-date"]
+		indexes = [
+			models.Index(fields=["-date", "-id"], name="production_anomaly_date_id"),
+		]
+
+	def __str__(self) -> str:
+		return f"{self.cow.tag} - {self.date} - {self.liters} L (baseline {self.baseline} L)"
+
+
+class ScanWatermark(models.Model):
+	"""Highest ``MilkRecord`` id an incremental job has processed, per job name."""
+
+	name = models.CharField(max_length=50, primary_key=True)
+	last_id = models.BigIntegerField(default=0)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self) -> str:
+		return f"{self.name}: {self.last_id}"
@@ -0,0 +1,51 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class BulkJSONParser(BaseParser):
+    """Parses a JSON body straight from the request stream.
+
+    DRF's ``JSONParser`` reads ``request.body``, which is capped by
+    ``DATA_UPLOAD_MAX_MEMORY_SIZE``; bulk batches are expected to exceed it and
+    are bounded by ``MILK_BULK_MAX_ROWS`` instead.
+    """
+
+    media_type = "application/json"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            return json.load(codecs.getreader(encoding)(stream))
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+
+
+class NDJSONParser(BaseParser):
+    """Parses newline-delimited JSON into a list of records.
+
+    Lines that are not valid JSON become ``None`` so the caller can report a
+    per-row error instead of rejecting the whole batch. Blank lines are skipped.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        rows = []
+        if stream is None:
+            return rows
+        for raw in stream:
+            line = raw.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(None)
+        return rows
@@ -0,0 +1,283 @@
+"""Optional range partitioning of ``production_milkrecord`` by ``date``.
+
+With ``MILK_PARTITION_INTERVAL`` set to ``month`` or ``year``, migration
+``0004_partition_milkrecord`` turns the table into a declaratively partitioned
+parent with one partition per period and a default partition for dates no
+period covers yet. ``manage.py milk_partitions`` converts an existing table
+later, creates future partitions and detaches, archives or drops old ones.
+
+The ORM and the reporting SQL keep addressing ``production_milkrecord``;
+date-bounded queries only touch the matching partitions, and vacuum and
+index maintenance run per partition. PostgreSQL requires unique constraints
+on a partitioned table to include the partition key, so the primary key
+becomes ``(id, date)`` (``id`` stays unique through its sequence) and
+``UNIQUE (cow_id, date)`` is kept as is.
+"""
+
+import re
+from datetime import date
+
+TABLE = "production_milkrecord"
+LEGACY_TABLE = f"{TABLE}_unpartitioned"
+DEFAULT_PARTITION = f"{TABLE}_default"
+SEQUENCE = f"{TABLE}_id_seq"
+INTERVALS = ("month", "year")
+
+_BOUNDS = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+def _check_interval(interval):
+    if interval not in INTERVALS:
+        raise ValueError(
+            f"Unknown partition interval {interval!r}; use one of {', '.join(INTERVALS)}."
+        )
+
+
+def period_start(day, interval):
+    _check_interval(interval)
+    return date(day.year, day.month if interval == "month" else 1, 1)
+
+
+def next_period(start, interval):
+    if interval == "year":
+        return date(start.year + 1, 1, 1)
+    if start.month == 12:
+        return date(start.year + 1, 1, 1)
+    return date(start.year, start.month + 1, 1)
+
+
+def shift_periods(day, interval, count):
+    """Start of the period ``count`` periods after (or before) ``day``'s."""
+    _check_interval(interval)
+    if interval == "year":
+        return date(day.year + count, 1, 1)
+    months = day.year * 12 + day.month - 1 + count
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def partition_name(start, interval):
+    suffix = f"{start:%Y}" if interval == "year" else f"{start:%Y_%m}"
+    return f"{TABLE}_{suffix}"
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+    row = cursor.fetchone()
+    return row is not None and row[0] == "p"
+
+
+def list_partitions(cursor):
+    """``[(name, lower, upper, estimated_rows)]``; bounds are ``None`` for default."""
+    cursor.execute(
+        """
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), c.reltuples::bigint
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        ORDER BY c.relname
+        """,
+        [TABLE],
+    )
+    partitions = []
+    for name, bound, rows in cursor.fetchall():
+        match = _BOUNDS.search(bound)
+        lower, upper = (
+            (date.fromisoformat(match[1]), date.fromisoformat(match[2]))
+            if match
+            else (None, None)
+        )
+        partitions.append((name, lower, upper, max(rows, 0)))
+    return partitions
+
+
+def detect_interval(cursor):
+    """Interval of the existing partitions (``None`` if there are none)."""
+    for _, lower, upper, _ in list_partitions(cursor):
+        if lower is not None:
+            return "year" if (upper - lower).days > 31 else "month"
+    return None
+
+
+def create_partitions(cursor, first, last, interval):
+    """Create the partitions covering ``first``..``last``; returns new names.
+
+    Rows already sitting in the default partition for a new range are moved
+    into the new partition before it is attached, since PostgreSQL refuses to
+    attach a range the default partition still holds rows for.
+    """
+    existing = {lower for _, lower, _, _ in list_partitions(cursor)}
+    created = []
+    start = period_start(first, interval)
+    while start <= last:
+        end = next_period(start, interval)
+        if start not in existing:
+            name = partition_name(start, interval)
+            cursor.execute(f'CREATE TABLE "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS)')
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM "{DEFAULT_PARTITION}"
+                    WHERE date >= %s AND date < %s
+                    RETURNING *
+                )
+                INSERT INTO "{name}" SELECT * FROM moved
+                """,
+                [start, end],
+            )
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" '
+                "FOR VALUES FROM (%s) TO (%s)",
+                [start, end],
+            )
+            created.append(name)
+        start = end
+    return created
+
+
+def detach_partitions(cursor, before, archive_schema=None, drop=False):
+    """Detach partitions that end on or before ``before``; returns their names.
+
+    Detached partitions are moved to ``archive_schema`` (created if needed),
+    dropped with ``drop=True``, or otherwise left as standalone tables.
+    """
+    if archive_schema:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{archive_schema}"')
+    detached = []
+    for name, _, upper, _ in list_partitions(cursor):
+        if upper is None or upper > before:
+            continue
+        cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        # Detached tables must not keep depending on the parent's id sequence.
+        cursor.execute(f'ALTER TABLE "{name}" ALTER COLUMN id DROP DEFAULT')
+        if drop:
+            cursor.execute(f'DROP TABLE "{name}"')
+        elif archive_schema:
+            cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{archive_schema}"')
+        detached.append(name)
+    return detached
+
+
+def _definitions(cursor):
+    """Secondary index, non-primary-key constraint and trigger DDL of the table.
+
+    The rebuilt table is created with ``LIKE``, which copies none of them, and the
+    sync triggers (``sync.triggers``) must survive a conversion.
+    """
+    cursor.execute(
+        """
+        SELECT pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        WHERE i.indrelid = to_regclass(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+        """,
+        [TABLE],
+    )
+    # Indexes of a partitioned parent are reported as ``ON ONLY``.
+    indexes = [row[0].replace(" ON ONLY ", " ON ") for row in cursor.fetchall()]
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype <> 'p'
+        """,
+        [TABLE],
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        """
+        SELECT pg_get_triggerdef(oid)
+        FROM pg_trigger
+        WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal
+        """,
+        [TABLE],
+    )
+    return indexes, constraints, [row[0] for row in cursor.fetchall()]
+
+
+def _restore(cursor, primary_key, indexes, constraints, triggers):
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY ({primary_key})'
+    )
+    for name, definition in constraints:
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+    for definition in indexes:
+        cursor.execute(definition)
+    # Created last, so the rows copied over keep their sync versions.
+    for definition in triggers:
+        cursor.execute(definition)
+
+
+def convert(cursor, interval, ahead=3, today=None):
+    """Rebuild the table as a partitioned table; ``False`` if it already is.
+
+    Partitions cover the existing data through ``ahead`` periods past
+    ``today``. Runs under an exclusive lock and copies every row, so run it
+    in a transaction during a maintenance window on large tables.
+    """
+    _check_interval(interval)
+    if is_partitioned(cursor):
+        return False
+    today = today or date.today()
+    cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+    indexes, constraints, triggers = _definitions(cursor)
+    cursor.execute(f'SELECT min(date), coalesce(max(id), 0) FROM "{TABLE}"')
+    first, max_id = cursor.fetchone()
+
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_TABLE}"')
+    cursor.execute(
+        f'ALTER TABLE "{LEGACY_TABLE}" ALTER COLUMN id DROP IDENTITY IF EXISTS'
+    )
+    cursor.execute(
+        f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY_TABLE}" INCLUDING DEFAULTS) '
+        "PARTITION BY RANGE (date)"
+    )
+    # Identity columns are not supported on partitioned tables before
+    # PostgreSQL 17; an owned sequence keeps pg_get_serial_sequence() working.
+    cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ALTER COLUMN id SET DEFAULT nextval(\'"{SEQUENCE}"\')'
+    )
+    cursor.execute("SELECT setval(%s, %s, %s)", [SEQUENCE, max(max_id, 1), max_id > 0])
+    cursor.execute(f'CREATE TABLE "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+    create_partitions(
+        cursor,
+        min(first or today, today),
+        shift_periods(today, interval, ahead),
+        interval,
+    )
+
+    cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{LEGACY_TABLE}"')
+    cursor.execute(f'DROP TABLE "{LEGACY_TABLE}"')
+    _restore(cursor, "id, date", indexes, constraints, triggers)
+    cursor.execute(f'ANALYZE "{TABLE}"')
+    return True
+
+
+def revert(cursor):
+    """Turn the partitioned table back into a plain one; ``False`` if it is not.
+
+    Rows in detached or archived partitions are not brought back.
+    """
+    if not is_partitioned(cursor):
+        return False
+    cursor.execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+    indexes, constraints, triggers = _definitions(cursor)
+    cursor.execute(f'SELECT coalesce(max(id), 0) FROM "{TABLE}"')
+    (max_id,) = cursor.fetchone()
+
+    cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{LEGACY_TABLE}"')
+    cursor.execute(f'ALTER TABLE "{LEGACY_TABLE}" ALTER COLUMN id DROP DEFAULT')
+    cursor.execute(f'DROP SEQUENCE IF EXISTS "{SEQUENCE}"')
+    cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY_TABLE}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f'ALTER TABLE "{TABLE}" ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY'
+    )
+    cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{LEGACY_TABLE}"')
+    cursor.execute(f'DROP TABLE "{LEGACY_TABLE}"')
+    cursor.execute(
+        "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s, %s)",
+        [TABLE, max(max_id, 1), max_id > 0],
+    )
+    _restore(cursor, "id", indexes, constraints, triggers)
+    cursor.execute(f'ANALYZE "{TABLE}"')
+    return True
@@ -0,0 +1,150 @@
+"""Incremental maintenance of ``production_dailymilkrollup``.
+
+Writes only queue the keys they touch; the queued keys are recomputed from
+``production_milkrecord`` once the surrounding transaction commits. Recomputing
+from source (instead of applying deltas) keeps every refresh idempotent, so a
+rolled-back transaction that leaves stale keys queued is harmless.
+
+Refreshed keys are upserted on the ``(farm_id, date, owner_id)`` unique
+constraint, and rows are deleted only for keys that no longer have records.
+Concurrent flushes on the same (farm, owner) pair are serialized with advisory
+locks (see ``LOCK_PAIRS_SQL``), so the last one to run sees every committed
+record.
+
+Bulk paths (``bulk_create``/``bulk_update``/``QuerySet.update``) bypass model
+signals and must call :func:`mark_days` or :func:`mark_pairs` themselves.
+"""
+
+import threading
+
+from django.db import connection, transaction
+
+_pending = threading.local()
+
+# Flushes of different transactions can touch the same keys. Each flush first
+# takes a transaction-level advisory lock per (farm, owner) pair, in sorted
+# order, so flushes of one pair run one after the other and the later one
+# recomputes from a snapshot that includes the earlier one's records.
+LOCK_PAIRS_SQL = """
+    SELECT pg_advisory_xact_lock(hashtext('production_dailymilkrollup'), k)
+    FROM (
+        SELECT DISTINCT hashtext(p.farm_id || ':' || p.owner_id) AS k
+        FROM (
+            SELECT c.farm_id, c.owner_id
+            FROM unnest(%s::bigint[]) AS t(cow_id)
+            JOIN livestock_cow c ON c.id = t.cow_id
+            UNION
+            SELECT * FROM unnest(%s::bigint[], %s::bigint[])
+        ) p
+        ORDER BY k
+    ) keys
+"""
+
+# Keys touched by a list of (cow, date) pairs, mapped through the cows'
+# current farm and owner.
+_DAY_KEYS = """
+    SELECT DISTINCT c.farm_id, c.owner_id, t.date
+    FROM unnest(%s::bigint[], %s::date[]) AS t(cow_id, date)
+    JOIN livestock_cow c ON c.id = t.cow_id
+"""
+
+REFRESH_DAYS_UPSERT_SQL = f"""
+    INSERT INTO production_dailymilkrollup (farm_id, owner_id, date, total_liters, cow_count)
+    SELECT c.farm_id, c.owner_id, mr.date, SUM(mr.liters), COUNT(*)
+    FROM ({_DAY_KEYS}) k
+    JOIN livestock_cow c ON c.farm_id = k.farm_id AND c.owner_id = k.owner_id
+    JOIN production_milkrecord mr ON mr.cow_id = c.id AND mr.date = k.date
+    GROUP BY c.farm_id, c.owner_id, mr.date
+    ON CONFLICT (farm_id, date, owner_id) DO UPDATE
+    SET total_liters = EXCLUDED.total_liters, cow_count = EXCLUDED.cow_count
+"""
+
+# Keys whose last record is gone (deleted, moved to another day or cow).
+REFRESH_DAYS_DELETE_SQL = f"""
+    DELETE FROM production_dailymilkrollup r
+    USING ({_DAY_KEYS}) k
+    WHERE r.farm_id = k.farm_id AND r.owner_id = k.owner_id AND r.date = k.date
+      AND NOT EXISTS (
+        SELECT 1
+        FROM livestock_cow c
+        JOIN production_milkrecord mr ON mr.cow_id = c.id AND mr.date = k.date
+        WHERE c.farm_id = k.farm_id AND c.owner_id = k.owner_id
+      )
+"""
+
+REBUILD_PAIRS_DELETE_SQL = """
+    DELETE FROM production_dailymilkrollup
+    WHERE (farm_id, owner_id) IN (SELECT * FROM unnest(%s::bigint[], %s::bigint[]))
+"""
+
+REBUILD_PAIRS_INSERT_SQL = """
+    INSERT INTO production_dailymilkrollup (farm_id, owner_id, date, total_liters, cow_count)
+    SELECT c.farm_id, c.owner_id, mr.date, SUM(mr.liters), COUNT(*)
+    FROM livestock_cow c
+    JOIN production_milkrecord mr ON mr.cow_id = c.id
+    WHERE (c.farm_id, c.owner_id) IN (SELECT * FROM unnest(%s::bigint[], %s::bigint[]))
+    GROUP BY c.farm_id, c.owner_id, mr.date
+    ON CONFLICT (farm_id, date, owner_id) DO UPDATE
+    SET total_liters = EXCLUDED.total_liters, cow_count = EXCLUDED.cow_count
+"""
+
+REBUILD_ALL_SQL = """
+    INSERT INTO production_dailymilkrollup (farm_id, owner_id, date, total_liters, cow_count)
+    SELECT c.farm_id, c.owner_id, mr.date, SUM(mr.liters), COUNT(*)
+    FROM production_milkrecord mr
+    JOIN livestock_cow c ON c.id = mr.cow_id
+    GROUP BY c.farm_id, c.owner_id, mr.date
+"""
+
+
+def _state():
+    if not hasattr(_pending, "days"):
+        _pending.days = set()
+        _pending.pairs = set()
+    return _pending
+
+
+def mark_days(cow_dates):
+    """Queue ``(cow_id, date)`` pairs whose rollup rows must be recomputed."""
+    _state().days.update(cow_dates)
+    transaction.on_commit(flush)
+
+
+def mark_pairs(farm_owner_pairs):
+    """Queue ``(farm_id, owner_id)`` pairs whose whole history must be rebuilt.
+
+    Used when cows change farm or owner, or are deleted, since every past
+    record of the cow moves to a different rollup key.
+    """
+    _state().pairs.update(farm_owner_pairs)
+    transaction.on_commit(flush)
+
+
+def flush():
+    state = _state()
+    days, pairs = state.days, state.pairs
+    if not days and not pairs:
+        return
+    state.days, state.pairs = set(), set()
+    cow_ids, dates = zip(*days) if days else ((), ())
+    farm_ids, owner_ids = zip(*pairs) if pairs else ((), ())
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(LOCK_PAIRS_SQL, [list(cow_ids), list(farm_ids), list(owner_ids)])
+        if pairs:
+            params = [list(farm_ids), list(owner_ids)]
+            cursor.execute(REBUILD_PAIRS_DELETE_SQL, params)
+            cursor.execute(REBUILD_PAIRS_INSERT_SQL, params)
+        if days:
+            params = [list(cow_ids), list(dates)]
+            cursor.execute(REFRESH_DAYS_UPSERT_SQL, params)
+            cursor.execute(REFRESH_DAYS_DELETE_SQL, params)
+
+
+def rebuild():
+    """Recompute the whole rollup table from ``production_milkrecord``."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Incremental flushes wait until the rebuilt table is committed.
+        cursor.execute("LOCK TABLE production_dailymilkrollup IN EXCLUSIVE MODE")
+        cursor.execute("DELETE FROM production_dailymilkrollup")
+        cursor.execute(REBUILD_ALL_SQL)
+        return cursor.rowcount
@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from .models import MilkRecord
 from livestock.models import Cow
+from common.access import serializer_scope
+from common.bulk import validate_rows
+from common.metrics import TimedSerializerMixin
 
 
-class MilkRecordSerializer(serializers.ModelSerializer):
+class MilkRecordSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     cow_id = serializers.IntegerField(write_only=True)
 
     class Meta:
@@ -12,6 +15,9 @@ class MilkRecordSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
     def validate_cow_id(self, value):
+        scope = serializer_scope(self)
+        if scope is not None and scope.can_access_cow(value):
+            return value
         if not Cow.objects.filter(pk=value).exists():
             raise serializers.ValidationError('Cow not found.')
         return value
@@ -26,3 +32,21 @@ class MilkRecordSerializer(serializers.ModelSerializer):
         if cow_id is not None:
             instance.cow_id = cow_id
         return super().update(instance, validated_data)
+
+
+# Shared field instances for bulk ingestion. Building a serializer per row is
+# the dominant cost for large batches, so rows are validated field by field.
+_BULK_FIELDS = (
+    ('cow_id', serializers.IntegerField()),
+    ('date', serializers.DateField()),
+    ('liters', serializers.DecimalField(max_digits=6, decimal_places=2)),
+)
+
+
+def validate_bulk_rows(rows):
+    """Validate raw bulk milk rows; returns ``(valid, errors)``.
+
+    See ``common.bulk.validate_rows``. Cow existence and ownership are checked
+    by the caller for the whole batch at once.
+    """
+    return validate_rows(rows, _BULK_FIELDS)
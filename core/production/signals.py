@@ -0,0 +1,48 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from farms import report_cache
+from livestock.models import Cow
+from . import rollup
+from .models import MilkRecord
+
+
+@receiver(post_save, sender=MilkRecord)
+def refresh_rollup_on_milk_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    days = {(instance.cow_id, instance.date)}
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    if "cow_id" in loaded and "date" in loaded:
+        days.add((loaded["cow_id"], loaded["date"]))
+    rollup.mark_days(days)
+
+
+@receiver(post_delete, sender=MilkRecord)
+def refresh_rollup_on_milk_delete(sender, instance, **kwargs):
+    rollup.mark_days({(instance.cow_id, instance.date)})
+
+
+@receiver(post_save, sender=Cow)
+def rebuild_rollup_on_cow_transfer(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    old = (loaded.get("farm_id", instance.farm_id), loaded.get("owner_id", instance.owner_id))
+    new = (instance.farm_id, instance.owner_id)
+    if old != new:
+        rollup.mark_pairs({old, new})
+
+
+@receiver(post_delete, sender=Cow)
+def rebuild_rollup_on_cow_delete(sender, instance, **kwargs):
+    rollup.mark_pairs({(instance.farm_id, instance.owner_id)})
+
+
+@receiver(post_save, sender=MilkRecord)
+@receiver(post_delete, sender=MilkRecord)
+def invalidate_reports_on_milk_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    report_cache.invalidate(cow_ids=[instance.cow_id, loaded.get("cow_id")])
@@ -1,3 +1,79 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.test.utils import override_settings
+from rest_framework.test import APITestCase
+
+from accounts.authentication import TokenObtainPairSerializer
+from accounts.models import User
+from farms.models import Farm, FarmerProfile
+from livestock.models import Cow
+from production.models import MilkRecord
+
+
+# The default per-process cache: writes are authorized against the database.
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class MilkRecordWriteTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = User.objects.create_user("agent", role=User.Roles.AGENT)
+        cls.farmer = User.objects.create_user("farmer", role=User.Roles.FARMER)
+        farm = Farm.objects.create(name="Farm", location="Sylhet", agent=cls.agent)
+        profile = FarmerProfile.objects.create(user=cls.farmer, farm=farm)
+        cls.cow = Cow.objects.create(tag="C-1", farm=farm, owner=profile)
+        # Enough herd that loading it would show in the query count.
+        Cow.objects.bulk_create(
+            Cow(tag=f"C-{i}", farm=farm, owner=profile) for i in range(2, 50)
+        )
+        cls.record = MilkRecord.objects.create(
+            cow=cls.cow, date=date(2026, 1, 1), liters="8.50"
+        )
+
+        other_agent = User.objects.create_user("other", role=User.Roles.AGENT)
+        other_farm = Farm.objects.create(
+            name="Other", location="Khulna", agent=other_agent
+        )
+        other_farmer = User.objects.create_user("other_farmer")
+        other_profile = FarmerProfile.objects.create(user=other_farmer, farm=other_farm)
+        cls.other_cow = Cow.objects.create(
+            tag="O-1", farm=other_farm, owner=other_profile
+        )
+
+    def login(self, user):
+        token = TokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_farmer_create_checks_only_the_cow(self):
+        self.login(self.farmer)
+        # User row, cow ownership, insert (plus the request's transaction).
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                "/api/milk-records/",
+                {"cow_id": self.cow.id, "date": "2026-01-02", "liters": "9.00"},
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_farmer_cannot_record_for_other_cows(self):
+        self.login(self.farmer)
+        response = self.client.post(
+            "/api/milk-records/",
+            {"cow_id": self.other_cow.id, "date": "2026-01-02", "liters": "9.00"},
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_agent_patch_without_cow_loads_no_scope(self):
+        self.login(self.agent)
+        # User row, record (with its ownership), update, transaction.
+        with self.assertNumQueries(5):
+            response = self.client.patch(
+                f"/api/milk-records/{self.record.id}/", {"liters": "7.25"}
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_agent_cannot_move_record_to_other_farm(self):
+        self.login(self.agent)
+        response = self.client.patch(
+            f"/api/milk-records/{self.record.id}/", {"cow_id": self.other_cow.id}
+        )
+        self.assertEqual(response.status_code, 403)
@@ -1,18 +1,44 @@
+from django.conf import settings
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
+from . import rollup
 from .models import MilkRecord
-from .serializers import MilkRecordSerializer
-from livestock.permissions import IsFarmerAndCowOwner, IsAgentForRelatedFarm
+from .parsers import BulkJSONParser, NDJSONParser
+from .serializers import MilkRecordSerializer, validate_bulk_rows
+from livestock.permissions import (
+    OWNERSHIP_ANNOTATIONS,
+    IsFarmerAndCowOwner,
+    IsAgentForRelatedFarm,
+)
 from farms.permissions import IsSuperAdmin
-from farms.models import FarmerProfile
+from farms import report_cache
 from livestock.models import Cow
+from livestock.views import COW_SUMMARY
+from common.access import get_access_scope
+from common.bulk import bulk_response, bulk_rows
+from common.export import EXPORT_RENDERERS, export_response, filter_by_cow_and_dates
+from common.lean import LeanListMixin, related
+from common.routers import ReplicaReadsMixin
 
+MILK_EXPORT_COLUMNS = {
+    "id": "id",
+    "cow_id": "cow_id",
+    "cow_tag": "cow__tag",
+    "farm_id": "cow__farm_id",
+    "date": "date",
+    "liters": "liters",
+}
 
-class MilkRecordViewSet(viewsets.ModelViewSet):
+
+class MilkRecordViewSet(ReplicaReadsMixin, LeanListMixin, viewsets.ModelViewSet):
     queryset = MilkRecord.objects.select_related("cow").all().order_by("-date")
     serializer_class = MilkRecordSerializer
+    keyset_ordering = ("-date", "-id")
+    list_fields = {"id": "id", "cow_id": "cow_id", "date": "date", "liters": "liters"}
+    list_expansions = {"cow": related("cow", COW_SUMMARY)}
     permission_classes = [
         IsAuthenticated,
         (IsSuperAdmin | IsFarmerAndCowOwner | IsAgentForRelatedFarm),
@@ -20,6 +46,9 @@ class MilkRecordViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         qs = MilkRecord.objects.select_related("cow").all().order_by("-date")
+        if self.detail:
+            # Object permissions read farm agent / owner from the fetched row.
+            qs = qs.annotate(**OWNERSHIP_ANNOTATIONS)
         user = self.request.user
         if getattr(user, "is_superuser", False) or getattr(user, "is_staff", False):
             return qs
@@ -48,17 +77,16 @@ class MilkRecordViewSet(viewsets.ModelViewSet):
                 headers=headers,
             )
 
+        scope = get_access_scope(request)
         if Roles and role == Roles.AGENT:
-            if not Cow.objects.filter(id=cow_id, farm__agent_id=user.id).exists():
+            if not scope.can_access_cow(cow_id):
                 raise PermissionDenied(
                     "You can only record milk for cows in your farms."
                 )
         elif Roles and role == Roles.FARMER:
-            try:
-                fp = FarmerProfile.objects.get(user_id=user.id)
-            except FarmerProfile.DoesNotExist:
-                raise PermissionDenied("You do not have a farmer profile.")
-            if not Cow.objects.filter(id=cow_id, owner_id=fp.id).exists():
+            if not scope.can_access_cow(cow_id):
+                if scope.farmer_profile_id is None:
+                    raise PermissionDenied("You do not have a farmer profile.")
                 raise PermissionDenied("You can only record milk for your own cows.")
         else:
             raise PermissionDenied("Not allowed to create milk records.")
@@ -89,20 +117,14 @@ class MilkRecordViewSet(viewsets.ModelViewSet):
             serializer.save()
             return Response({"message": "Milk record updated", "data": serializer.data})
 
+        # get_object() has checked the record; only a new cow_id needs the scope.
         if Roles and role == Roles.AGENT:
-            if (
-                cow_id
-                and not Cow.objects.filter(id=cow_id, farm__agent_id=user.id).exists()
-            ):
+            if cow_id and not get_access_scope(request).can_access_cow(cow_id):
                 raise PermissionDenied(
                     "You can only manage milk for cows in your farms."
                 )
         elif Roles and role == Roles.FARMER:
-            try:
-                fp = FarmerProfile.objects.get(user_id=user.id)
-            except FarmerProfile.DoesNotExist:
-                raise PermissionDenied("You do not have a farmer profile.")
-            if cow_id and not Cow.objects.filter(id=cow_id, owner_id=fp.id).exists():
+            if cow_id and not get_access_scope(request).can_access_cow(cow_id):
                 raise PermissionDenied("You can only manage milk for your own cows.")
         else:
             raise PermissionDenied("Not allowed to update milk records.")
@@ -112,21 +134,92 @@ class MilkRecordViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response({"message": "Milk record updated", "data": serializer.data})
 
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        cow_id = request.query_params.get("cow_id")
-        date_from = request.query_params.get("date_from")
-        date_to = request.query_params.get("date_to")
-        if cow_id:
-            queryset = queryset.filter(cow_id=cow_id)
-        if date_from:
-            queryset = queryset.filter(date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(date__lte=date_to)
-
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action in ("list", "export"):
+            queryset = filter_by_cow_and_dates(queryset, self.request.query_params)
+        return queryset
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        renderer_classes=EXPORT_RENDERERS,
+    )
+    def export(self, request, *args, **kwargs):
+        """Stream visible milk records as CSV or NDJSON (``?output=``).
+
+        Accepts the same ``cow_id``/``date_from``/``date_to`` filters as ``list``.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(
+            request,
+            queryset.order_by("date", "id"),
+            MILK_EXPORT_COLUMNS,
+            "milk-records",
+        )
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        parser_classes=[BulkJSONParser, NDJSONParser],
+    )
+    def bulk(self, request, *args, **kwargs):
+        """Upsert many milk records on ``(cow, date)`` in one request.
+
+        Accepts a JSON array or an NDJSON stream. Ownership is checked for the
+        whole batch against the user's access scope (staff: one existence
+        query); invalid rows are reported by index and
+        the remaining rows are still saved.
+        """
+        user = request.user
+        role = getattr(user, "role", None)
+        Roles = getattr(user.__class__, "Roles", None)
+        rows = bulk_rows(request, settings.MILK_BULK_MAX_ROWS)
+
+        unrestricted = getattr(user, "is_superuser", False) or getattr(
+            user, "is_staff", False
+        )
+        if unrestricted:
+            denied = "Cow not found."
+        elif Roles and role == Roles.AGENT:
+            denied = "You can only record milk for cows in your farms."
+        elif Roles and role == Roles.FARMER:
+            denied = "You can only record milk for your own cows."
+        else:
+            raise PermissionDenied("Not allowed to create milk records.")
+
+        valid, errors = validate_bulk_rows(rows)
+        requested = {attrs["cow_id"] for _, attrs in valid}
+        if unrestricted:
+            allowed = set(
+                Cow.objects.filter(id__in=requested).values_list("id", flat=True)
+            )
+        else:
+            allowed = get_access_scope(request).accessible_cows(requested)
+
+        # Last row wins for duplicate (cow, date) keys, matching upsert semantics.
+        records = {}
+        for index, attrs in valid:
+            if attrs["cow_id"] not in allowed:
+                errors.append({"index": index, "errors": {"cow_id": [denied]}})
+                continue
+            records[(attrs["cow_id"], attrs["date"])] = MilkRecord(**attrs)
+
+        MilkRecord.objects.bulk_create(
+            records.values(),
+            batch_size=settings.MILK_BULK_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["cow", "date"],
+            update_fields=["liters"],
+        )
+        rollup.mark_days(records.keys())
+        report_cache.invalidate(cow_ids={cow_id for cow_id, _ in records})
+        errors.sort(key=lambda error: error["index"])
+        return bulk_response(
+            "Milk records ingested",
+            {"received": len(rows), "saved": len(records), "errors": errors},
+            saved=len(records),
+            noun="milk records",
+        )
@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from sync.models import PruneWatermark, Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete sync tombstones older than the retention period. Clients whose "
+        "token predates the newest pruned tombstone get 410 Gone and sync from "
+        "scratch. Run it from cron (e.g. daily)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.SYNC_TOMBSTONE_RETENTION_DAYS,
+            help="Keep tombstones of the last DAYS days.",
+        )
+
+    def handle(self, *args, **options):
+        if options["days"] < 1:
+            raise CommandError("--days must be at least 1.")
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        with transaction.atomic():
+            expired = Tombstone.objects.filter(deleted_at__lt=cutoff)
+            newest = expired.aggregate(newest=Max("version"))["newest"]
+            if newest is None:
+                self.stdout.write("No tombstones to prune.")
+                return
+            # Raise the watermark first: tokens at or below it can no longer be
+            # served a complete set of deletions.
+            mark, _ = PruneWatermark.objects.select_for_update().get_or_create(pk=1)
+            mark.version = max(mark.version, newest)
+            mark.save(update_fields=["version", "updated_at"])
+            deleted, _ = expired.delete()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {deleted} tombstones older than {options['days']} days "
+                f"(tokens up to version {mark.version} now need a full sync)."
+            )
+        )
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+from sync import triggers
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        ("farms", "0003_farmerprofile_sync_version"),
+        ("livestock", "0003_sync_version"),
+        ("production", "0006_milkrecord_sync_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model", models.CharField(max_length=32)),
+                ("object_id", models.BigIntegerField()),
+                ("farm_id", models.BigIntegerField(null=True)),
+                ("agent_id", models.BigIntegerField(null=True)),
+                ("owner_id", models.BigIntegerField(null=True)),
+                ("version", models.BigIntegerField()),
+                ("deleted_at", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["model", "version", "id"],
+                        name="sync_tombstone_model_version",
+                    )
+                ],
+            },
+        ),
+        migrations.RunSQL(triggers.INSTALL, reverse_sql=triggers.UNINSTALL),
+    ]
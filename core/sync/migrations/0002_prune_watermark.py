@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+# Where prune_sync_tombstones kept its watermark before sync had its own table.
+LEGACY_WATERMARK = "sync_tombstones"
+
+
+def move_watermark(apps, schema_editor):
+    ScanWatermark = apps.get_model("production", "ScanWatermark")
+    PruneWatermark = apps.get_model("sync", "PruneWatermark")
+    legacy = ScanWatermark.objects.filter(name=LEGACY_WATERMARK).first()
+    if legacy is not None:
+        PruneWatermark.objects.create(pk=1, version=legacy.last_id)
+        legacy.delete()
+
+
+def restore_watermark(apps, schema_editor):
+    ScanWatermark = apps.get_model("production", "ScanWatermark")
+    PruneWatermark = apps.get_model("sync", "PruneWatermark")
+    mark = PruneWatermark.objects.filter(pk=1).first()
+    if mark is not None:
+        ScanWatermark.objects.update_or_create(
+            name=LEGACY_WATERMARK, defaults={"last_id": mark.version}
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("production", "0006_milkrecord_sync_version"),
+        ("sync", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PruneWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(move_watermark, restore_watermark),
+    ]
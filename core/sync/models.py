@@ -0,0 +1,46 @@
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """A synced row that was deleted or left part of its audience.
+
+    Written by the database triggers in ``sync.triggers`` with the scope the
+    row had before the change (plain ids, so tombstones never cascade):
+    ``agent_id`` is the farm's agent and ``owner_id`` the owning
+    ``FarmerProfile`` at that time. ``model`` is the name of the feed stream
+    (``cows``, ``milk_records``, ...); ``farms`` tombstones are written when a
+    farm changes agent and stand for everything on the farm.
+    """
+
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    farm_id = models.BigIntegerField(null=True)
+    agent_id = models.BigIntegerField(null=True)
+    owner_id = models.BigIntegerField(null=True)
+    version = models.BigIntegerField()
+    deleted_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["model", "version", "id"], name="sync_tombstone_model_version"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model}:{self.object_id} v{self.version}"
+
+
+class PruneWatermark(models.Model):
+    """Newest tombstone ``version`` deleted by ``prune_sync_tombstones``.
+
+    A single row (``pk=1``). A token at or below it may have missed deletions,
+    so ``SyncView`` answers it with ``410 Gone`` and the client syncs from
+    scratch.
+    """
+
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"pruned up to v{self.version}"
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APITransactionTestCase
+
+from accounts.authentication import TokenObtainPairSerializer
+from accounts.models import User
+from farms.models import Farm, FarmerProfile
+from livestock.models import Cow
+from sync.models import Tombstone
+
+
+# Versions are transaction ids bounded by the snapshot xmin, so every write
+# has to commit on its own, as it does in production.
+class SyncFeedTests(APITransactionTestCase):
+    def setUp(self):
+        self.agent = User.objects.create_user("agent", role=User.Roles.AGENT)
+        farmer = User.objects.create_user("farmer", role=User.Roles.FARMER)
+        farm = Farm.objects.create(name="Farm", location="Sylhet", agent=self.agent)
+        profile = FarmerProfile.objects.create(user=farmer, farm=farm)
+        self.cow = Cow.objects.create(tag="C-1", farm=farm, owner=profile)
+        self.other_cow = Cow.objects.create(tag="C-2", farm=farm, owner=profile)
+        token = TokenObtainPairSerializer.get_token(self.agent).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def sync(self, since=None):
+        response = self.client.get("/api/sync/", {"since": since} if since else {})
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertFalse(response.json()["has_more"])
+        return response.json()
+
+    def test_full_sync_then_nothing_new(self):
+        full = self.sync()
+        self.assertEqual(
+            {cow["id"] for cow in full["changes"]["cows"]},
+            {self.cow.id, self.other_cow.id},
+        )
+        delta = self.sync(full["token"])
+        self.assertEqual(delta["changes"]["cows"], [])
+        self.assertEqual(delta["deleted"]["cows"], [])
+
+    def test_change_committed_after_the_token_is_issued(self):
+        # A write whose transaction is open while the token is issued and
+        # commits afterwards: its version is below the next poll's snapshot.
+        writer = connection.copy()
+        try:
+            writer.set_autocommit(False)
+            with writer.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE livestock_cow SET tag = 'late' WHERE id = %s",
+                    [self.cow.id],
+                )
+            token = self.sync()["token"]
+            writer.commit()
+        finally:
+            writer.close()
+
+        delta = self.sync(token)
+        self.assertEqual(
+            [(cow["id"], cow["tag"]) for cow in delta["changes"]["cows"]],
+            [(self.cow.id, "late")],
+        )
+
+    def test_deletions_come_back_as_tombstones(self):
+        token = self.sync()["token"]
+        cow_id = self.cow.id
+        self.cow.delete()
+
+        delta = self.sync(token)
+        self.assertEqual(delta["deleted"]["cows"], [cow_id])
+        self.assertEqual(delta["changes"]["cows"], [])
+        self.assertEqual(self.sync(delta["token"])["deleted"]["cows"], [])
+
+    def test_token_older_than_pruned_history_needs_full_resync(self):
+        token = self.sync()["token"]
+        self.cow.delete()
+        Tombstone.objects.update(deleted_at=timezone.now() - timedelta(days=100))
+        call_command("prune_sync_tombstones", days=90, stdout=StringIO())
+
+        response = self.client.get("/api/sync/", {"since": token})
+        self.assertEqual(response.status_code, 410)
+        self.assertIn("sync from scratch", response.json()["detail"])
+        # Starting over works and hands out a token past the watermark.
+        full = self.sync()
+        self.assertEqual(
+            [cow["id"] for cow in full["changes"]["cows"]], [self.other_cow.id]
+        )
+        self.assertEqual(self.sync(full["token"])["changes"]["cows"], [])
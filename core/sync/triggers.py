@@ -0,0 +1,192 @@
+"""PostgreSQL triggers behind the sync feed (installed by migration 0001).
+
+Every insert or update of a synced row stamps ``sync_version`` with the id of
+the writing transaction, so rows written by one transaction share a version
+and the bulk paths (``bulk_create``, ``QuerySet.update``, COPY) are covered
+without going through the ORM. Deletes are recorded as ``sync_tombstone``
+rows by statement-level triggers, one ``INSERT ... SELECT`` per statement.
+
+A row that moves out of a scope (a cow to another farm or owner, a record to
+another cow, a profile to another farm) also gets a tombstone carrying its old
+scope. When a cow moves, its activities and milk records are re-stamped so
+they reach the new audience; when a farm changes agent, a ``farms`` tombstone
+is written for the old agent and everything on the farm is re-stamped.
+
+Versions are compared against the snapshot ``xmin`` at read time (see
+``sync.views``), so a transaction that commits late is never skipped.
+"""
+
+SYNCED_TABLES = (
+    "farms_farmerprofile",
+    "livestock_cow",
+    "livestock_activity",
+    "production_milkrecord",
+)
+
+INSTALL = """
+CREATE FUNCTION sync_current_version() RETURNS bigint
+LANGUAGE sql VOLATILE AS $$ SELECT pg_current_xact_id()::text::bigint $$;
+
+CREATE FUNCTION sync_snapshot_version() RETURNS bigint
+LANGUAGE sql STABLE AS $$ SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint $$;
+
+CREATE FUNCTION sync_stamp() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.sync_version := sync_current_version();
+    RETURN NEW;
+END $$;
+
+-- Deletes (statement level, transition table ``gone``).
+
+CREATE FUNCTION sync_profiles_deleted() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO sync_tombstone (model, object_id, farm_id, agent_id, owner_id, version, deleted_at)
+    SELECT 'farmer_profiles', g.id, g.farm_id, f.agent_id, g.id, sync_current_version(), now()
+    FROM gone g LEFT JOIN farms_farm f ON f.id = g.farm_id;
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION sync_cows_deleted() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO sync_tombstone (model, object_id, farm_id, agent_id, owner_id, version, deleted_at)
+    SELECT 'cows', g.id, g.farm_id, f.agent_id, g.owner_id, sync_current_version(), now()
+    FROM gone g LEFT JOIN farms_farm f ON f.id = g.farm_id;
+    RETURN NULL;
+END $$;
+
+-- Activities and milk records (stream name in TG_ARGV[0]); the cow is still
+-- there when its records go first, as in Django's cascading deletes.
+CREATE FUNCTION sync_cow_records_deleted() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO sync_tombstone (model, object_id, farm_id, agent_id, owner_id, version, deleted_at)
+    SELECT TG_ARGV[0], g.id, c.farm_id, f.agent_id, c.owner_id, sync_current_version(), now()
+    FROM gone g
+    LEFT JOIN livestock_cow c ON c.id = g.cow_id
+    LEFT JOIN farms_farm f ON f.id = c.farm_id;
+    RETURN NULL;
+END $$;
+
+-- Moves (row level, only when a scope column changes).
+
+CREATE FUNCTION sync_profile_moved() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO sync_tombstone (model, object_id, farm_id, agent_id, owner_id, version, deleted_at)
+    VALUES (
+        'farmer_profiles', OLD.id, OLD.farm_id,
+        (SELECT agent_id FROM farms_farm WHERE id = OLD.farm_id),
+        OLD.id, sync_current_version(), now()
+    );
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION sync_cow_moved() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO sync_tombstone (model, object_id, farm_id, agent_id, owner_id, version, deleted_at)
+    VALUES (
+        'cows', OLD.id, OLD.farm_id,
+        (SELECT agent_id FROM farms_farm WHERE id = OLD.farm_id),
+        OLD.owner_id, sync_current_version(), now()
+    );
+    UPDATE livestock_activity SET sync_version = sync_current_version() WHERE cow_id = NEW.id;
+    UPDATE production_milkrecord SET sync_version = sync_current_version() WHERE cow_id = NEW.id;
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION sync_cow_record_moved() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO sync_tombstone (model, object_id, farm_id, agent_id, owner_id, version, deleted_at)
+    SELECT TG_ARGV[0], OLD.id, c.farm_id, f.agent_id, c.owner_id, sync_current_version(), now()
+    FROM livestock_cow c LEFT JOIN farms_farm f ON f.id = c.farm_id
+    WHERE c.id = OLD.cow_id;
+    RETURN NULL;
+END $$;
+
+CREATE FUNCTION sync_farm_reassigned() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF OLD.agent_id IS NOT NULL THEN
+        INSERT INTO sync_tombstone (model, object_id, farm_id, agent_id, owner_id, version, deleted_at)
+        VALUES ('farms', OLD.id, OLD.id, OLD.agent_id, NULL, sync_current_version(), now());
+    END IF;
+    UPDATE farms_farmerprofile SET sync_version = sync_current_version() WHERE farm_id = NEW.id;
+    UPDATE livestock_cow SET sync_version = sync_current_version() WHERE farm_id = NEW.id;
+    UPDATE livestock_activity a SET sync_version = sync_current_version()
+    FROM livestock_cow c WHERE a.cow_id = c.id AND c.farm_id = NEW.id;
+    UPDATE production_milkrecord m SET sync_version = sync_current_version()
+    FROM livestock_cow c WHERE m.cow_id = c.id AND c.farm_id = NEW.id;
+    RETURN NULL;
+END $$;
+
+CREATE TRIGGER sync_stamp_insert BEFORE INSERT ON farms_farmerprofile
+    FOR EACH ROW EXECUTE FUNCTION sync_stamp();
+CREATE TRIGGER sync_stamp_update BEFORE UPDATE ON farms_farmerprofile
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION sync_stamp();
+CREATE TRIGGER sync_deleted AFTER DELETE ON farms_farmerprofile
+    REFERENCING OLD TABLE AS gone
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_profiles_deleted();
+CREATE TRIGGER sync_moved AFTER UPDATE OF farm_id ON farms_farmerprofile
+    FOR EACH ROW WHEN (OLD.farm_id IS DISTINCT FROM NEW.farm_id)
+    EXECUTE FUNCTION sync_profile_moved();
+
+CREATE TRIGGER sync_stamp_insert BEFORE INSERT ON livestock_cow
+    FOR EACH ROW EXECUTE FUNCTION sync_stamp();
+CREATE TRIGGER sync_stamp_update BEFORE UPDATE ON livestock_cow
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION sync_stamp();
+CREATE TRIGGER sync_deleted AFTER DELETE ON livestock_cow
+    REFERENCING OLD TABLE AS gone
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_cows_deleted();
+CREATE TRIGGER sync_moved AFTER UPDATE OF farm_id, owner_id ON livestock_cow
+    FOR EACH ROW
+    WHEN (OLD.farm_id IS DISTINCT FROM NEW.farm_id OR OLD.owner_id IS DISTINCT FROM NEW.owner_id)
+    EXECUTE FUNCTION sync_cow_moved();
+
+CREATE TRIGGER sync_stamp_insert BEFORE INSERT ON livestock_activity
+    FOR EACH ROW EXECUTE FUNCTION sync_stamp();
+CREATE TRIGGER sync_stamp_update BEFORE UPDATE ON livestock_activity
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION sync_stamp();
+CREATE TRIGGER sync_deleted AFTER DELETE ON livestock_activity
+    REFERENCING OLD TABLE AS gone
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_cow_records_deleted('activities');
+CREATE TRIGGER sync_moved AFTER UPDATE OF cow_id ON livestock_activity
+    FOR EACH ROW WHEN (OLD.cow_id IS DISTINCT FROM NEW.cow_id)
+    EXECUTE FUNCTION sync_cow_record_moved('activities');
+
+CREATE TRIGGER sync_stamp_insert BEFORE INSERT ON production_milkrecord
+    FOR EACH ROW EXECUTE FUNCTION sync_stamp();
+CREATE TRIGGER sync_stamp_update BEFORE UPDATE ON production_milkrecord
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*) EXECUTE FUNCTION sync_stamp();
+CREATE TRIGGER sync_deleted AFTER DELETE ON production_milkrecord
+    REFERENCING OLD TABLE AS gone
+    FOR EACH STATEMENT EXECUTE FUNCTION sync_cow_records_deleted('milk_records');
+CREATE TRIGGER sync_moved AFTER UPDATE OF cow_id ON production_milkrecord
+    FOR EACH ROW WHEN (OLD.cow_id IS DISTINCT FROM NEW.cow_id)
+    EXECUTE FUNCTION sync_cow_record_moved('milk_records');
+
+CREATE TRIGGER sync_reassigned AFTER UPDATE OF agent_id ON farms_farm
+    FOR EACH ROW WHEN (OLD.agent_id IS DISTINCT FROM NEW.agent_id)
+    EXECUTE FUNCTION sync_farm_reassigned();
+"""
+
+UNINSTALL = (
+    "".join(
+        f"""
+DROP TRIGGER IF EXISTS sync_stamp_insert ON {table};
+DROP TRIGGER IF EXISTS sync_stamp_update ON {table};
+DROP TRIGGER IF EXISTS sync_deleted ON {table};
+DROP TRIGGER IF EXISTS sync_moved ON {table};
+"""
+        for table in SYNCED_TABLES
+    )
+    + """
+DROP TRIGGER IF EXISTS sync_reassigned ON farms_farm;
+DROP FUNCTION IF EXISTS sync_farm_reassigned();
+DROP FUNCTION IF EXISTS sync_cow_record_moved();
+DROP FUNCTION IF EXISTS sync_cow_moved();
+DROP FUNCTION IF EXISTS sync_profile_moved();
+DROP FUNCTION IF EXISTS sync_cow_records_deleted();
+DROP FUNCTION IF EXISTS sync_cows_deleted();
+DROP FUNCTION IF EXISTS sync_profiles_deleted();
+DROP FUNCTION IF EXISTS sync_stamp();
+DROP FUNCTION IF EXISTS sync_snapshot_version();
+DROP FUNCTION IF EXISTS sync_current_version();
+"""
+)
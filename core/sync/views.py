@@ -0,0 +1,233 @@
+"""Delta feed for offline clients: ``GET /api/sync/?since=<token>``.
+
+A client keeps a local copy of the farmer profiles, cows, activities and milk
+records it can see and asks for what changed since its last token. Without a
+token it gets everything (a full sync). Rows are selected with an index range
+scan on ``sync_version``, so the work and the response size follow the amount
+of change rather than the size of the farm.
+
+Responses are ``{"token", "has_more", "changes": {...}, "deleted": {...}}``.
+``changes`` holds upserts in the list-endpoint shape and ``deleted`` holds ids
+to drop. A deleted id also covers what hangs off the row: drop a cow's
+activities and milk records with it, and for a ``farms`` id drop the profiles
+and cows of that farm (the farm was handed to another agent). While
+``has_more`` is true, call again with the returned token; the last page's
+token is the one to store.
+
+A round is bounded by the snapshot ``xmin`` when it started, so rows written
+by transactions still in flight come with the next round. Tokens older than
+the tombstone retention (``manage.py prune_sync_tombstones``) get ``410 Gone``
+and the client starts over with a full sync.
+"""
+
+import base64
+import json
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Exists, OuterRef, Q
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from common.metrics import serializing
+from common.routers import ReplicaReadsMixin
+from farms.models import FarmerProfile
+from farms.views import FarmerProfileViewSet, FarmViewSet
+from livestock.views import ActivityViewSet, CowViewSet
+from production.views import MilkRecordViewSet
+
+from .models import PruneWatermark, Tombstone
+
+# Upserts go out parents first, deletes after all upserts.
+CHANGE_STREAMS = (
+    ("farmer_profiles", FarmerProfileViewSet),
+    ("cows", CowViewSet),
+    ("activities", ActivityViewSet),
+    ("milk_records", MilkRecordViewSet),
+)
+DELETE_STREAMS = (("farms", FarmViewSet),) + CHANGE_STREAMS
+STREAMS = [("changes", *stream) for stream in CHANGE_STREAMS] + [
+    ("deleted", *stream) for stream in DELETE_STREAMS
+]
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync token is older than the retained history; sync from scratch."
+    default_code = "sync_token_expired"
+
+
+def encode_token(payload):
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        since = int(payload["v"])
+        upper = payload.get("u")
+        stream = int(payload.get("s", 0))
+        cursor = payload.get("c")
+        if upper is not None:
+            upper = int(upper)
+        if cursor is not None:
+            cursor = [int(cursor[0]), int(cursor[1])]
+    except (TypeError, ValueError, KeyError, IndexError, AttributeError):
+        raise ValidationError({"since": "Invalid sync token."})
+    if since < 0 or not 0 <= stream < len(STREAMS):
+        raise ValidationError({"since": "Invalid sync token."})
+    return since, upper, stream, cursor
+
+
+def scoped_queryset(viewset_class, request):
+    """The rows ``request.user`` sees in the viewset's list endpoint."""
+    view = viewset_class(
+        request=request,
+        args=(),
+        kwargs={},
+        format_kwarg=None,
+        action="list",
+        detail=False,
+    )
+    return view.get_queryset()
+
+
+def tombstone_queryset(user):
+    qs = Tombstone.objects.all()
+    if getattr(user, "is_superuser", False) or getattr(user, "is_staff", False):
+        # Their cows and profiles do not depend on farm assignments.
+        return qs.exclude(model="farms")
+    role = getattr(user, "role", None)
+    Roles = getattr(user.__class__, "Roles", None)
+    if Roles and role == Roles.AGENT:
+        return qs.filter(agent_id=user.id)
+    if Roles and role == Roles.FARMER:
+        return qs.filter(
+            owner_id__in=FarmerProfile.objects.filter(user_id=user.id).values("id")
+        )
+    return qs.none()
+
+
+def _after(version_field, cursor):
+    version, pk = cursor
+    return Q(**{f"{version_field}__gt": version}) | Q(
+        **{version_field: version, "id__gt": pk}
+    )
+
+
+class SyncView(ReplicaReadsMixin, APIView):
+    """Changes and deletions since ``?since=`` (see the module docstring).
+
+    ``?limit=`` caps the rows per response (``SYNC_PAGE_SIZE`` by default, at
+    most ``SYNC_MAX_PAGE_SIZE``).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_limit(self, request):
+        limit = settings.SYNC_PAGE_SIZE
+        requested = request.query_params.get("limit")
+        if requested:
+            try:
+                limit = int(requested)
+            except ValueError:
+                pass
+        return max(1, min(limit, settings.SYNC_MAX_PAGE_SIZE))
+
+    def get(self, request):
+        token = request.query_params.get("since")
+        since, upper, stream, cursor = (
+            decode_token(token) if token else (0, None, 0, None)
+        )
+        if since:
+            pruned = (
+                PruneWatermark.objects.filter(pk=1)
+                .values_list("version", flat=True)
+                .first()
+            )
+            if pruned is not None and since <= pruned:
+                raise SyncTokenExpired()
+        if upper is None:
+            alias = router.db_for_read(Tombstone)
+            with connections[alias].cursor() as db:
+                db.execute("SELECT sync_snapshot_version()")
+                (upper,) = db.fetchone()
+            # A replica behind the server that served the last token.
+            upper = max(upper, since)
+
+        body = {
+            "changes": {name: [] for name, _ in CHANGE_STREAMS},
+            "deleted": {name: [] for name, _ in DELETE_STREAMS},
+        }
+        remaining = self.get_limit(request)
+        while stream < len(STREAMS) and remaining:
+            kind, name, viewset_class = STREAMS[stream]
+            fetch = self.fetch_changes if kind == "changes" else self.fetch_deleted
+            items, cursor = fetch(
+                request, name, viewset_class, since, upper, cursor, remaining
+            )
+            body[kind][name] += items
+            remaining -= len(items)
+            if cursor is None:
+                stream += 1
+
+        has_more = stream < len(STREAMS)
+        payload = {"v": since, "u": upper, "s": stream, "c": cursor}
+        return Response(
+            {
+                "token": encode_token(payload if has_more else {"v": upper}),
+                "has_more": has_more,
+                **body,
+            }
+        )
+
+    def fetch_changes(self, request, name, viewset_class, since, upper, cursor, limit):
+        """Up to ``limit`` changed rows and the cursor to continue from (or ``None``)."""
+        fields = viewset_class.list_fields
+        queryset = scoped_queryset(viewset_class, request).filter(
+            sync_version__gte=since, sync_version__lt=upper
+        )
+        if cursor is not None:
+            queryset = queryset.filter(_after("sync_version", cursor))
+        rows = list(
+            queryset.order_by("sync_version", "id").values(
+                *set(fields.values()), "sync_version"
+            )[: limit + 1]
+        )
+        more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = [rows[-1]["sync_version"], rows[-1]["id"]] if more else None
+        with serializing():
+            data = viewset_class.lean_rows(rows, queryset.model, fields, {})
+        return data, next_cursor
+
+    def fetch_deleted(self, request, name, viewset_class, since, upper, cursor, limit):
+        """Ids gone from the user's view since ``since``, like ``fetch_changes``.
+
+        Tombstones of rows the user can still see (moved within their scope,
+        or back into it) are left out.
+        """
+        queryset = tombstone_queryset(request.user).filter(
+            model=name,
+            version__gte=since,
+            version__lt=upper,
+        )
+        if cursor is not None:
+            queryset = queryset.filter(_after("version", cursor))
+        visible = scoped_queryset(viewset_class, request).filter(
+            pk=OuterRef("object_id")
+        )
+        rows = list(
+            queryset.exclude(Exists(visible))
+            .order_by("version", "id")
+            .values_list("version", "id", "object_id")[: limit + 1]
+        )
+        more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = [rows[-1][0], rows[-1][1]] if more else None
+        return [object_id for _, _, object_id in rows], next_cursor
@@ -0,0 +1,127 @@
+"""
+Per-cow milk analytics computed with NumPy.
+
+``COW_ANALYTICS_SQL`` returns one row per cow with its records packed into a
+byte string of ``(day offset, centiliters)`` pairs. They are decoded with
+``numpy.frombuffer`` and scattered into a cows x days matrix (``NaN`` where a
+day has no record), so every metric below is a whole-matrix operation rather
+than a Python loop over milk records.
+Missing days are left out of averages instead of being counted as zero.
+"""
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Trailing windows for the rolling averages (days, including the end date).
+ROLLING_WINDOWS = (7, 30)
+
+
+def history_start(start_date: date, end_date: date) -> date:
+    """First day to fetch so the rolling averages at ``end_date`` are complete."""
+    return min(start_date, end_date - timedelta(days=max(ROLLING_WINDOWS) - 1))
+
+
+def milk_matrix(rows, days: int) -> Tuple[np.ndarray, int]:
+    """Cows x days matrix of liters with ``NaN`` for days without a record.
+
+    The matrix starts at the earliest recorded day (the last of ``days`` if
+    nothing was recorded), so a long range over a recent herd stays small.
+    Returns the matrix and the day offset of its first column.
+    """
+    packed = [row.records or b"" for row in rows]
+    counts = np.fromiter((len(records) // 8 for records in packed), np.int64)
+    pairs = np.frombuffer(b"".join(packed), dtype=">i4").reshape(-1, 2)
+    origin = int(pairs[:, 0].min()) if len(pairs) else days - 1
+    matrix = np.full((len(rows), days - origin), np.nan)
+    matrix[np.repeat(np.arange(len(rows)), counts), pairs[:, 0] - origin] = (
+        pairs[:, 1] / 100
+    )
+    return matrix, origin
+
+
+def trailing_mean(values: np.ndarray, recorded: np.ndarray, window: int):
+    """Mean of the recorded days in the last ``window`` columns (``NaN`` if none)."""
+    totals = values[:, -window:].sum(axis=1)
+    counts = recorded[:, -window:].sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+def _optional(values) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), 2) for v in values]
+
+
+def _dates(first: date, offsets, present) -> List[Optional[date]]:
+    return [
+        first + timedelta(days=int(offset)) if ok else None
+        for offset, ok in zip(offsets, present)
+    ]
+
+
+def cow_analytics(
+    rows, start_date: date, end_date: date, fetched_from: date, drop_pct: float
+) -> List[dict]:
+    """Metrics per cow for ``start_date``..``end_date``.
+
+    ``rows`` come from ``COW_ANALYTICS_SQL`` run with ``start_date`` set to
+    ``fetched_from`` (see :func:`history_start`). Rolling averages cover the
+    windows ending on ``end_date``; peak, totals and drops cover the
+    requested window. A drop is a recorded day at least ``drop_pct`` percent
+    below the recorded day before it.
+    """
+    matrix, origin = milk_matrix(rows, (end_date - fetched_from).days + 1)
+    matrix_start = fetched_from + timedelta(days=origin)
+    recorded = ~np.isnan(matrix)
+    values = np.where(recorded, matrix, 0.0)
+
+    first = max((start_date - matrix_start).days, 0)
+    window, in_window = values[:, first:], recorded[:, first:]
+    record_count = in_window.sum(axis=1)
+    total = window.sum(axis=1)
+    averages = {n: trailing_mean(values, recorded, n) for n in ROLLING_WINDOWS}
+
+    masked = np.where(in_window, window, -np.inf)
+    peak_offset = masked.argmax(axis=1)
+    peak = np.where(record_count > 0, masked.max(axis=1), np.nan)
+
+    # Day-over-day drops; comparisons involving NaN are False, so gaps never count.
+    previous, current = matrix[:, :-1], matrix[:, 1:]
+    with np.errstate(invalid="ignore"):
+        drops = (previous > 0) & (current <= previous * (1 - drop_pct / 100))
+    drops[:, : max(first - 1, 0)] = False
+    drop_count = drops.sum(axis=1)
+    # Column index of the last drop: reverse argmax over the drop mask.
+    if drops.shape[1]:
+        last_drop = drops.shape[1] - 1 - drops[:, ::-1].argmax(axis=1) + 1
+    else:
+        last_drop = np.zeros(len(rows), dtype=np.int64)
+
+    last_births = [row.last_birth for row in rows]
+    peak_dates = _dates(
+        matrix_start + timedelta(days=first), peak_offset, record_count > 0
+    )
+    drop_dates = _dates(matrix_start, last_drop, drop_count > 0)
+    avg_7d, avg_30d = (_optional(averages[n]) for n in ROLLING_WINDOWS)
+    peak_liters = _optional(peak)
+
+    return [
+        {
+            "cow_id": row.cow_id,
+            "cow_tag": row.tag,
+            "cow_breed": row.breed,
+            "record_count": int(record_count[i]),
+            "total_liters": round(float(total[i]), 2),
+            "avg_7d": avg_7d[i],
+            "avg_30d": avg_30d[i],
+            "peak_liters": peak_liters[i],
+            "peak_date": peak_dates[i],
+            "last_birth": last_births[i],
+            "days_in_milk": (
+                (end_date - last_births[i]).days if last_births[i] else None
+            ),
+            "drop_count": int(drop_count[i]),
+            "last_drop_date": drop_dates[i],
+        }
+        for i, row in enumerate(rows)
+    ]
@@ -0,0 +1,79 @@
+"""
+Caller identity for reporting endpoints that expose rows rather than totals.
+
+Clients send the access token they got from the API (``POST /auth/token/``)
+as ``Authorization: Bearer <token>``. It is verified with the API's signing key
+(``DJANGO_SECRET_KEY``, HS256 as configured by SimpleJWT), and the user row is
+read on every call, so deactivated users and revoked tokens (``token_version``,
+see ``accounts.authentication``) are refused immediately. The role comes from
+that row, not from the token.
+"""
+from dataclasses import dataclass
+from typing import Dict
+
+import jwt
+from fastapi import HTTPException
+from sqlalchemy import text
+
+API_USER_SQL = text(
+    """
+    SELECT id, role, is_staff, is_superuser, is_active, token_version
+    FROM accounts_user
+    WHERE id = :user_id
+"""
+)
+
+
+@dataclass(frozen=True)
+class ApiUser:
+    id: int
+    role: str
+    is_staff: bool
+    is_superuser: bool
+
+    def scope_params(self) -> Dict[str, int]:
+        """Export filters limiting rows to what the API's list querysets show."""
+        if self.is_superuser or self.is_staff:
+            return {}
+        if self.role == "AGENT":
+            return {"agent_id": self.id}
+        if self.role == "FARMER":
+            return {"owner_user_id": self.id}
+        raise HTTPException(status_code=403, detail="Not allowed to export records")
+
+
+def _unauthorized(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+def decode_access_token(authorization: str, signing_key: str) -> dict:
+    """Claims of a valid API access token from an ``Authorization`` header."""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise _unauthorized("Authentication credentials were not provided")
+    try:
+        claims = jwt.decode(token, signing_key, algorithms=["HS256"])
+        user_id = int(claims["user_id"])
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        raise _unauthorized("Token is invalid or expired")
+    if claims.get("token_type") != "access":
+        raise _unauthorized("Token is invalid or expired")
+    return {**claims, "user_id": user_id}
+
+
+async def load_api_user(connection, claims: dict) -> ApiUser:
+    row = (
+        await connection.execute(API_USER_SQL, {"user_id": claims["user_id"]})
+    ).fetchone()
+    if row is None or not row.is_active:
+        raise _unauthorized("User not found or inactive")
+    if "ver" in claims and claims["ver"] != row.token_version:
+        raise _unauthorized("Token has been revoked")
+    return ApiUser(
+        id=row.id,
+        role=row.role,
+        is_staff=row.is_staff,
+        is_superuser=row.is_superuser,
+    )
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark: blocking (sync engine inside async handlers) vs async engine.
+
+The "blocking" mode reproduces how the reporting endpoints used to run: an
+``async def`` handler calling a synchronous SQLAlchemy connection, which stalls
+the event loop for the whole query. The "async" mode uses the service's own
+async engine. Both run the same farm summary query with the same concurrency.
+
+Usage (from the reporting folder):
+    python bench_concurrency.py --requests 400 --concurrency 50 --latency-ms 5
+
+``--latency-ms`` adds ``pg_sleep`` to every query to simulate a remote DB.
+"""
+import argparse
+import asyncio
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from sqlalchemy import create_engine, text
+
+import main
+
+QUERY = text(
+    """
+    SELECT f.id, f.name,
+           (SELECT COUNT(*) FROM livestock_cow c WHERE c.farm_id = f.id) AS cow_count,
+           pg_sleep(:latency)
+    FROM farms_farm f
+    WHERE f.id = :farm_id
+    """
+)
+
+
+async def run_blocking(engine, params, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handler():
+        async with semaphore:
+            with engine.connect() as connection:
+                connection.execute(QUERY, params).fetchone()
+
+    await asyncio.gather(*(handler() for _ in range(requests)))
+
+
+async def run_async(engine, params, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handler():
+        async with semaphore:
+            async with engine.connect() as connection:
+                (await connection.execute(QUERY, params)).fetchone()
+
+    await asyncio.gather(*(handler() for _ in range(requests)))
+
+
+async def measure(label, runner, engine, params, args):
+    # Warm up the pool so connection setup is not part of the measurement.
+    await runner(engine, params, args.concurrency, args.concurrency)
+    started = time.perf_counter()
+    await runner(engine, params, args.requests, args.concurrency)
+    elapsed = time.perf_counter() - started
+    throughput = args.requests / elapsed
+    print(f"  {label:<9} {elapsed:8.3f}s  {throughput:10.1f} req/s")
+    return throughput
+
+
+async def main_async(args):
+    params = {"farm_id": args.farm_id, "latency": args.latency_ms / 1000}
+    sync_url = main.DATABASE_URL
+    blocking_engine = create_engine(
+        sync_url, pool_size=args.concurrency, max_overflow=0, pool_pre_ping=True
+    )
+    async_engine = main.get_engine()
+    try:
+        print(
+            f"{args.requests} requests, concurrency {args.concurrency}, "
+            f"simulated latency {args.latency_ms} ms"
+        )
+        blocking = await measure(
+            "blocking", run_blocking, blocking_engine, params, args
+        )
+        concurrent = await measure("async", run_async, async_engine, params, args)
+        print(f"  speedup   {concurrent / blocking:8.2f}x")
+    finally:
+        blocking_engine.dispose()
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--farm-id", type=int, default=1)
+    asyncio.run(main_async(parser.parse_args()))
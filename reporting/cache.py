@@ -0,0 +1,270 @@
+"""
+Response cache for the reporting endpoints.
+
+Entries carry tags such as ``("farm", 1)``, ``("farmer", 5)`` or ``("global", 0)``.
+The Django app records writes in ``farms_reportcacheinvalidation`` (one row per
+tag with a version that increases on every write); :class:`InvalidationPoller`
+reads that table and evicts entries whose tags changed.
+"""
+import asyncio
+import functools
+import importlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_TAG = ("global", 0)
+MISSING = object()
+
+Tag = Tuple[str, int]
+
+
+class CacheBackend(ABC):
+    """Interface for report cache backends.
+
+    Backends must count hits/misses in :meth:`get` and support evicting every
+    entry that carries one of a set of tags.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable):
+        """Return the cached value or ``MISSING``."""
+
+    @abstractmethod
+    def set(self, key: Hashable, value, tags: Iterable[Tag]) -> None:
+        """Store ``value`` under ``key`` tagged with ``tags``."""
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[Tag]) -> int:
+        """Evict entries carrying any of ``tags``; returns the number evicted."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Counters exposed on ``/cache/stats``."""
+
+
+class InMemoryCache(CacheBackend):
+    """Per-process cache with a TTL and LRU eviction once ``max_entries`` is reached."""
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, object, Set[Tag]]]" = (
+            OrderedDict()
+        )
+        self._tags: Dict[Tag, Set[Hashable]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, tags):
+        tags = set(tags)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+            self.invalidations += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self).__name__,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def load_backend(path: str, **options) -> CacheBackend:
+    """Instantiate a backend from a dotted path such as ``cache.InMemoryCache``."""
+    module_name, _, class_name = path.rpartition(".")
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    return backend_class(**options)
+
+
+def cached(
+    backend: Callable[[], Optional[CacheBackend]],
+    tags: Callable[[dict, object], Iterable[Tag]],
+):
+    """Cache an async FastAPI handler's result keyed by its arguments.
+
+    ``backend`` returns the active backend (``None`` disables caching) and
+    ``tags`` maps ``(kwargs, result)`` to the tags stored with the entry; only
+    reports that aggregate across farms should include ``GLOBAL_TAG``.
+    Exceptions (including 404s) are never cached.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            cache = backend()
+            if cache is None:
+                return await func(**kwargs)
+            key = (func.__name__, tuple(sorted(kwargs.items())))
+            value = cache.get(key)
+            if value is not MISSING:
+                return value
+            value = await func(**kwargs)
+            cache.set(key, value, tags(kwargs, value))
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+class InvalidationPoller:
+    """Evicts cache entries for tags bumped in ``farms_reportcacheinvalidation``.
+
+    Each poll re-reads rows updated shortly before the previous poll (``overlap``)
+    so bumps committed out of order are not missed; a tag is only evicted when
+    its version is newer than the one already seen. Writers do not bump
+    ``GLOBAL_TAG``; it is evicted along with any other change, so cross-farm
+    reports are dropped at most once per poll.
+    """
+
+    QUERY = text(
+        """
+        SELECT scope, object_id, version, now() AS polled_at
+        FROM farms_reportcacheinvalidation
+        WHERE updated_at > :since
+        """
+    )
+    NOW = text("SELECT now() AS polled_at")
+
+    def __init__(self, engine_factory, backend: CacheBackend, interval: float):
+        self.engine_factory = engine_factory
+        self.backend = backend
+        self.interval = interval
+        self.overlap = max(5.0, interval * 2)
+        self._seen: Dict[Tag, int] = {}
+        self._since = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def poll_once(self) -> int:
+        since = self._since
+        async with self.engine_factory().connect() as connection:
+            if since is None:
+                # First poll: remember current versions; the cache starts empty.
+                rows = (
+                    await connection.execute(
+                        text(
+                            "SELECT scope, object_id, version "
+                            "FROM farms_reportcacheinvalidation"
+                        )
+                    )
+                ).fetchall()
+                polled_at = (await connection.execute(self.NOW)).scalar_one()
+                self._seen = {(row.scope, row.object_id): row.version for row in rows}
+                self._since = polled_at - timedelta(seconds=self.overlap)
+                return 0
+            rows = (await connection.execute(self.QUERY, {"since": since})).fetchall()
+            if not rows:
+                polled_at = (await connection.execute(self.NOW)).scalar_one()
+            else:
+                polled_at = rows[0].polled_at
+        changed = set()
+        for row in rows:
+            tag = (row.scope, row.object_id)
+            if row.version > self._seen.get(tag, 0):
+                self._seen[tag] = row.version
+                changed.add(tag)
+        self._since = polled_at - timedelta(seconds=self.overlap)
+        if changed:
+            return self.backend.invalidate(changed | {GLOBAL_TAG})
+        return 0
+
+    async def run(self):
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Missing table or DB hiccup: drop everything rather than serve stale data.
+                logger.warning("Report cache invalidation poll failed: %s", e)
+                self.backend.clear()
+                self._since = None
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
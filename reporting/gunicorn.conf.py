@@ -0,0 +1,70 @@
+"""Gunicorn settings for the reporting service (uvicorn workers).
+
+    gunicorn -c reporting/gunicorn.conf.py
+
+Read from the environment / ``.env`` like ``main.py``. Handlers are async, so
+one worker per core (``REPORTING_WORKERS``) is enough to keep the CPUs busy;
+each worker has its own event loop, SQLAlchemy pool
+(``REPORTING_DB_POOL_SIZE`` + ``REPORTING_DB_MAX_OVERFLOW`` connections),
+response cache and invalidation poller, all created after the fork.
+
+Recycling, timeouts and reloads work as for the API (see
+``core/gunicorn.conf.py``): ``kill -HUP`` replaces the workers gracefully,
+``kill -USR2`` then ``kill -TERM`` of the old master deploys new code while
+``REPORTING_PRELOAD`` is on.
+"""
+
+import multiprocessing
+import os
+from pathlib import Path
+
+from decouple import AutoConfig
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# ``config`` is itself a gunicorn setting name.
+env = AutoConfig(search_path=str(REPO_ROOT))
+
+chdir = str(Path(__file__).resolve().parent)
+wsgi_app = "main:app"
+worker_class = "uvicorn.workers.UvicornWorker"
+
+bind = env("REPORTING_BIND", default="0.0.0.0:8001")
+workers = env("REPORTING_WORKERS", cast=int, default=multiprocessing.cpu_count())
+preload_app = env("REPORTING_PRELOAD", cast=bool, default=True)
+
+max_requests = env("REPORTING_MAX_REQUESTS", cast=int, default=5000)
+max_requests_jitter = env("REPORTING_MAX_REQUESTS_JITTER", cast=int, default=500)
+timeout = env("REPORTING_TIMEOUT", cast=int, default=60)
+graceful_timeout = env("REPORTING_GRACEFUL_TIMEOUT", cast=int, default=30)
+keepalive = env("REPORTING_KEEPALIVE", cast=int, default=5)
+
+accesslog = env("REPORTING_ACCESS_LOG", default="") or None
+errorlog = "-"
+loglevel = env("REPORTING_LOG_LEVEL", default="info")
+
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+# Workers share request metrics through REPORTING_METRICS_DIR (see metrics.py).
+METRICS_DIR = env("REPORTING_METRICS_DIR", default="")
+
+
+def on_starting(server):
+    if METRICS_DIR:
+        from metrics import clear_dir
+
+        clear_dir(METRICS_DIR)
+
+
+def worker_exit(server, worker):
+    if METRICS_DIR:
+        from main import metrics_registry
+
+        metrics_registry.flush()
+
+
+def child_exit(server, worker):
+    if METRICS_DIR:
+        from metrics import merge_dead_process
+
+        merge_dead_process(METRICS_DIR, worker.pid)
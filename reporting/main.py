@@ -1,10 +1,43 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from analytics import cow_analytics, history_start
+from auth import ApiUser, decode_access_token, load_api_user
+from cache import GLOBAL_TAG, InvalidationPoller, cached, load_backend
+from metrics import (
+    CONTENT_TYPE,
+    Registry,
+    RequestMetricsMiddleware,
+    TimedJSONResponse,
+    instrument_engine,
+    render,
+)
+from queries import (
+    ACTIVITY_EXPORT_COLUMNS,
+    COW_ANALYTICS_SQL,
+    FARM_DAILY_MILK_SQL,
+    FARM_MILK_ANOMALIES_SQL,
+    FARM_MILK_PRODUCTION_SQL,
+    FARM_SUMMARY_SQL,
+    FARMER_SUMMARY_SQL,
+    GENERAL_SUMMARY_SQL,
+    MILK_EXPORT_COLUMNS,
+    RECENT_ACTIVITIES_SQL,
+    RECENT_FARM_ACTIVITIES_SQL,
+    activity_export_sql,
+    milk_export_sql,
+)
 from pydantic import BaseModel
 from decouple import AutoConfig
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
 from datetime import datetime, date, timedelta
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pathlib import Path
+import csv
+import hmac
+import io
+import json
 
 
 # Ensure we can read the .env from the repo root even when running from the reporting folder
@@ -17,8 +50,53 @@ DB_PASSWORD = config("DB_PASSWORD")
 DB_HOST = config("DB_HOST", default="localhost")
 DB_PORT = config("DB_PORT", cast=int, default=5432)
 
+# Reports only read, so they (and the cache poller) use the read replica when
+# one is configured; same variables as the Django app.
+DB_REPLICA_HOST = config("DB_REPLICA_HOST", default="")
+if DB_REPLICA_HOST:
+    DB_HOST = DB_REPLICA_HOST
+    DB_PORT = config("DB_REPLICA_PORT", cast=int, default=DB_PORT)
+    DB_NAME = config("DB_REPLICA_NAME", default=DB_NAME)
+    DB_USER = config("DB_REPLICA_USER", default=DB_USER)
+    DB_PASSWORD = config("DB_REPLICA_PASSWORD", default=DB_PASSWORD)
+
+# Connection pool sizing for the async engine (per worker process).
+DB_POOL_SIZE = config("REPORTING_DB_POOL_SIZE", cast=int, default=10)
+DB_MAX_OVERFLOW = config("REPORTING_DB_MAX_OVERFLOW", cast=int, default=20)
+DB_POOL_TIMEOUT = config("REPORTING_DB_POOL_TIMEOUT", cast=float, default=30.0)
+DB_POOL_RECYCLE = config("REPORTING_DB_POOL_RECYCLE", cast=int, default=1800)
+
+# Report response cache (see cache.py); invalidated from farms_reportcacheinvalidation.
+REPORT_CACHE_ENABLED = config("REPORT_CACHE_ENABLED", cast=bool, default=True)
+REPORT_CACHE_BACKEND = config("REPORT_CACHE_BACKEND", default="cache.InMemoryCache")
+REPORT_CACHE_TTL = config("REPORT_CACHE_TTL", cast=float, default=60.0)
+REPORT_CACHE_MAX_ENTRIES = config("REPORT_CACHE_MAX_ENTRIES", cast=int, default=1024)
+REPORT_CACHE_POLL_SECONDS = config("REPORT_CACHE_POLL_SECONDS", cast=float, default=2.0)
+
+# Rows fetched per server-side cursor round trip by the /exports endpoints.
+EXPORT_CHUNK_SIZE = config("REPORTING_EXPORT_CHUNK_SIZE", cast=int, default=2000)
+
+# Longest start_date..end_date range /cow-analytics accepts (its matrix is
+# cows x days).
+ANALYTICS_MAX_DAYS = config("REPORTING_ANALYTICS_MAX_DAYS", cast=int, default=400)
+
+# Exports authenticate with the API's access tokens (see auth.py).
+JWT_SIGNING_KEY = config("DJANGO_SECRET_KEY", default="dev-secret-not-for-production")
+
+# Request metrics (see metrics.py); scraped from /internal/metrics with
+# "Authorization: Bearer <METRICS_TOKEN>" or from METRICS_ALLOWED_IPS.
+METRICS_ENABLED = config("METRICS_ENABLED", cast=bool, default=True)
+METRICS_SERVER_TIMING = config("METRICS_SERVER_TIMING", cast=bool, default=True)
+METRICS_DIR = config("REPORTING_METRICS_DIR", default="")
+METRICS_FLUSH_SECONDS = config("METRICS_FLUSH_SECONDS", cast=float, default=1.0)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+METRICS_ALLOWED_IPS = [
+    ip for ip in config("METRICS_ALLOWED_IPS", default="127.0.0.1,::1").split(",") if ip
+]
+
+# psycopg 3 provides the asyncio driver (same package the Django app uses).
 DATABASE_URL = (
-    f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    f"postgresql+psycopg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 )
 
 # Lazily create the engine so startup doesn't fail if env isn't loaded yet.
@@ -29,11 +107,64 @@ def get_engine():
     global _engine
     if _engine is None:
         # Read-only note: use a DB user with only SELECT privileges for this service.
-        _engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True)
+        _engine = create_async_engine(
+            DATABASE_URL,
+            pool_pre_ping=True,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+        if METRICS_ENABLED:
+            instrument_engine(_engine)
     return _engine
 
 
-app = FastAPI(title="FarmHub Reporting Service", version="0.1.0")
+_report_cache = None
+
+
+def get_report_cache():
+    global _report_cache
+    if _report_cache is None and REPORT_CACHE_ENABLED:
+        _report_cache = load_backend(
+            REPORT_CACHE_BACKEND,
+            ttl=REPORT_CACHE_TTL,
+            max_entries=REPORT_CACHE_MAX_ENTRIES,
+        )
+    return _report_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    poller = None
+    if REPORT_CACHE_ENABLED:
+        poller = InvalidationPoller(
+            get_engine, get_report_cache(), REPORT_CACHE_POLL_SECONDS
+        )
+        poller.start()
+    yield
+    if poller is not None:
+        await poller.stop()
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
+
+
+metrics_registry = Registry(METRICS_DIR, METRICS_FLUSH_SECONDS)
+
+app = FastAPI(
+    title="FarmHub Reporting Service",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=TimedJSONResponse,
+)
+if METRICS_ENABLED:
+    app.add_middleware(
+        RequestMetricsMiddleware,
+        registry=metrics_registry,
+        server_timing=METRICS_SERVER_TIMING,
+    )
 
 
 # Pydantic response models
@@ -58,6 +189,32 @@ class DailyMilkResponse(BaseModel):
     cow_count: int
 
 
+class CowAnalyticsResponse(BaseModel):
+    cow_id: int
+    cow_tag: str
+    cow_breed: str
+    record_count: int
+    total_liters: float
+    avg_7d: Optional[float]
+    avg_30d: Optional[float]
+    peak_liters: Optional[float]
+    peak_date: Optional[date]
+    last_birth: Optional[date]
+    days_in_milk: Optional[int]
+    drop_count: int
+    last_drop_date: Optional[date]
+
+
+class MilkAnomalyResponse(BaseModel):
+    cow_id: int
+    cow_tag: str
+    date: date
+    liters: float
+    baseline: float
+    score: float
+    health_date: Optional[date]
+
+
 class GeneralSummaryResponse(BaseModel):
     total_farms: int
     total_farmers: int
@@ -74,37 +231,101 @@ class FarmerSummaryResponse(BaseModel):
     total_milk_production: float
 
 
-@app.get("/summary", response_model=GeneralSummaryResponse)
-async def get_general_summary():
-    """Get overall system summary with totals across all farms."""
+# Maximum number of ids accepted by the batched summary endpoints.
+MAX_BATCH_IDS = 200
 
+
+def parse_ids(raw: str, name: str) -> List[int]:
+    """Parse a comma-separated id list such as ``1,2,3`` (duplicates dropped)."""
     try:
-        with get_engine().connect() as connection:
-            # Count total farms
-            farms_query = text("SELECT COUNT(*) as farm_count FROM farms_farm")
-            farms_result = connection.execute(farms_query).fetchone()
-
-            # Count total farmers
-            farmers_query = text(
-                "SELECT COUNT(*) as farmer_count FROM farms_farmerprofile"
-            )
-            farmers_result = connection.execute(farmers_query).fetchone()
+        ids = sorted({int(part) for part in raw.split(",") if part.strip()})
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail=f"{name} must be a comma-separated list of ids"
+        )
+    if not ids:
+        raise HTTPException(status_code=400, detail=f"{name} must not be empty")
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_BATCH_IDS} {name} per request"
+        )
+    return ids
 
-            # Count total cows
-            cows_query = text("SELECT COUNT(*) as cow_count FROM livestock_cow")
-            cows_result = connection.execute(cows_query).fetchone()
 
-            # Sum total milk production
-            milk_query = text(
-                "SELECT COALESCE(SUM(liters), 0) as total_milk FROM production_milkrecord"
-            )
-            milk_result = connection.execute(milk_query).fetchone()
+def farm_summary_from_row(row) -> FarmSummaryResponse:
+    return FarmSummaryResponse(
+        farm_id=row.id,
+        farm_name=row.name,
+        total_farmers=row.farmer_count,
+        total_cows=row.cow_count,
+        total_milk_production=float(row.total_milk),
+    )
+
+
+def farmer_summary_from_row(row) -> FarmerSummaryResponse:
+    return FarmerSummaryResponse(
+        farmer_user_id=row.user_id,
+        farmer_username=row.username,
+        farm_id=row.farm_id,
+        farm_name=row.farm_name,
+        total_cows=row.cow_count,
+        total_milk_production=float(row.total_milk),
+    )
+
+
+def farmer_date_window(start_date: Optional[date], end_date: Optional[date]):
+    # Default date window to full range if not provided
+    if start_date is None:
+        start_date = date.min.replace(year=1970)
+    if end_date is None:
+        end_date = date.max.replace(year=9999)
+    return start_date, end_date
+
+
+# Cache tags per report (see cache.cached); farmer reports also depend on their farm.
+def global_tags(kwargs, result):
+    return [GLOBAL_TAG]
+
+
+def farm_tags(kwargs, result):
+    return [("farm", kwargs["farm_id"])]
+
+
+def farm_summaries_tags(kwargs, result):
+    return [("farm", farm_id) for farm_id in parse_ids(kwargs["ids"], "ids")]
+
+
+def farmer_tags(kwargs, result):
+    return [("farmer", kwargs["user_id"]), ("farm", result.farm_id)]
+
+
+def farmer_summaries_tags(kwargs, result):
+    tags = [
+        ("farmer", user_id) for user_id in parse_ids(kwargs["user_ids"], "user_ids")
+    ]
+    return tags + [("farm", farmer.farm_id) for farmer in result]
+
+
+def recent_activities_tags(kwargs, result):
+    if kwargs["farm_id"] is None:
+        return [GLOBAL_TAG]
+    return [("farm", kwargs["farm_id"])]
+
+
+@app.get("/summary", response_model=GeneralSummaryResponse)
+@cached(get_report_cache, global_tags)
+async def get_general_summary():
+    """Get overall system summary with totals across all farms (one query)."""
+
+    try:
+        async with get_engine().connect() as connection:
+            row = (await connection.execute(GENERAL_SUMMARY_SQL)).fetchone()
 
             return GeneralSummaryResponse(
-                total_farms=farms_result.farm_count,
-                total_farmers=farmers_result.farmer_count,
-                total_cows=cows_result.cow_count,
-                total_milk_production=float(milk_result.total_milk),
+                total_farms=row.farm_count,
+                total_farmers=row.farmer_count,
+                total_cows=row.cow_count,
+                total_milk_production=float(row.total_milk),
             )
 
     except Exception as e:
@@ -114,72 +335,22 @@ async def get_general_summary():
 
 
 @app.get("/reports/farm/{farm_id}/summary", response_model=FarmSummaryResponse)
+@cached(get_report_cache, farm_tags)
 async def get_farm_summary(farm_id: int):
     """Get comprehensive summary for a specific farm including farmers, cows, and milk production."""
 
     try:
-        with get_engine().connect() as connection:
-            # Query farm details
-            farm_query = text(
-                """
-                SELECT id, name 
-                FROM farms_farm 
-                WHERE id = :farm_id
-            """
-            )
-            farm_result = connection.execute(
-                farm_query, {"farm_id": farm_id}
+        async with get_engine().connect() as connection:
+            row = (
+                await connection.execute(FARM_SUMMARY_SQL, {"farm_ids": [farm_id]})
             ).fetchone()
 
-            if not farm_result:
+            if not row:
                 raise HTTPException(
                     status_code=404, detail=f"Farm with ID {farm_id} not found"
                 )
 
-            # Count farmers for this farm (via FarmerProfile)
-            farmers_query = text(
-                """
-                SELECT COUNT(*) as farmer_count
-                FROM farms_farmerprofile 
-                WHERE farm_id = :farm_id
-            """
-            )
-            farmers_result = connection.execute(
-                farmers_query, {"farm_id": farm_id}
-            ).fetchone()
-
-            # Count cows for this farm
-            cows_query = text(
-                """
-                SELECT COUNT(*) as cow_count
-                FROM livestock_cow 
-                WHERE farm_id = :farm_id
-            """
-            )
-            cows_result = connection.execute(
-                cows_query, {"farm_id": farm_id}
-            ).fetchone()
-
-            # Sum milk production for this farm's cows
-            milk_query = text(
-                """
-                SELECT COALESCE(SUM(mr.liters), 0) as total_milk
-                FROM production_milkrecord mr
-                JOIN livestock_cow c ON mr.cow_id = c.id
-                WHERE c.farm_id = :farm_id
-            """
-            )
-            milk_result = connection.execute(
-                milk_query, {"farm_id": farm_id}
-            ).fetchone()
-
-            return FarmSummaryResponse(
-                farm_id=farm_result.id,
-                farm_name=farm_result.name,
-                total_farmers=farmers_result.farmer_count,
-                total_cows=cows_result.cow_count,
-                total_milk_production=float(milk_result.total_milk),
-            )
+            return farm_summary_from_row(row)
 
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -189,31 +360,41 @@ async def get_farm_summary(farm_id: int):
         )
 
 
+@app.get("/reports/farms/summary", response_model=List[FarmSummaryResponse])
+@cached(get_report_cache, farm_summaries_tags)
+async def get_farm_summaries(ids: str):
+    """Get summaries for many farms in one query, e.g. ``?ids=1,2,3``.
+
+    Unknown farm ids are omitted from the result.
+    """
+
+    farm_ids = parse_ids(ids, "ids")
+    try:
+        async with get_engine().connect() as connection:
+            rows = (
+                await connection.execute(FARM_SUMMARY_SQL, {"farm_ids": farm_ids})
+            ).fetchall()
+            return [farm_summary_from_row(row) for row in rows]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving farm summaries: {str(e)}"
+        )
+
+
 @app.get(
     "/reports/farm/{farm_id}/milk-production",
     response_model=List[MilkProductionResponse],
 )
+@cached(get_report_cache, farm_tags)
 async def get_farm_milk_production(farm_id: int):
     """Get milk production breakdown by cow for a specific farm."""
 
     try:
-        with get_engine().connect() as connection:
-            query = text(
-                """
-                SELECT 
-                    c.tag as cow_tag,
-                    c.breed,
-                    COALESCE(SUM(mr.liters), 0) as total_liters,
-                    COUNT(mr.id) as record_count
-                FROM livestock_cow c
-                LEFT JOIN production_milkrecord mr ON c.id = mr.cow_id
-                WHERE c.farm_id = :farm_id
-                GROUP BY c.id, c.tag, c.breed
-                ORDER BY total_liters DESC
-            """
-            )
-
-            result = connection.execute(query, {"farm_id": farm_id}).fetchall()
+        async with get_engine().connect() as connection:
+            result = (
+                await connection.execute(FARM_MILK_PRODUCTION_SQL, {"farm_id": farm_id})
+            ).fetchall()
 
             return [
                 MilkProductionResponse(
@@ -232,6 +413,7 @@ async def get_farm_milk_production(farm_id: int):
 
 
 @app.get("/reports/farm/{farm_id}/daily-milk", response_model=List[DailyMilkResponse])
+@cached(get_report_cache, farm_tags)
 async def get_farm_daily_milk(
     farm_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None
 ):
@@ -244,26 +426,16 @@ async def get_farm_daily_milk(
         if not end_date:
             end_date = datetime.now().date()
 
-        with get_engine().connect() as connection:
-            query = text(
-                """
-                SELECT 
-                    mr.date,
-                    SUM(mr.liters) as total_liters,
-                    COUNT(DISTINCT mr.cow_id) as cow_count
-                FROM production_milkrecord mr
-                JOIN livestock_cow c ON mr.cow_id = c.id
-                WHERE c.farm_id = :farm_id 
-                    AND mr.date >= :start_date 
-                    AND mr.date <= :end_date
-                GROUP BY mr.date
-                ORDER BY mr.date DESC
-            """
-            )
-
-            result = connection.execute(
-                query,
-                {"farm_id": farm_id, "start_date": start_date, "end_date": end_date},
+        async with get_engine().connect() as connection:
+            result = (
+                await connection.execute(
+                    FARM_DAILY_MILK_SQL,
+                    {
+                        "farm_id": farm_id,
+                        "start_date": start_date,
+                        "end_date": end_date,
+                    },
+                )
             ).fetchall()
 
             return [
@@ -281,83 +453,157 @@ async def get_farm_daily_milk(
         )
 
 
+@app.get(
+    "/reports/farm/{farm_id}/cow-analytics",
+    response_model=List[CowAnalyticsResponse],
+)
+@cached(get_report_cache, farm_tags)
+async def get_farm_cow_analytics(
+    farm_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    drop_pct: float = 20.0,
+):
+    """Per-cow rolling averages, peak yield, days in milk and yield drops.
+
+    Defaults to the last 90 days. ``avg_7d``/``avg_30d`` are the averages of
+    the recorded days in the 7/30 days ending on ``end_date``; a drop is a day
+    at least ``drop_pct`` percent below the day before.
+    """
+    if not end_date:
+        end_date = datetime.now().date()
+    if not start_date:
+        start_date = end_date - timedelta(days=90)
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=400, detail="start_date must not be after end_date"
+        )
+    if (end_date - start_date).days + 1 > ANALYTICS_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The date range may span at most {ANALYTICS_MAX_DAYS} days",
+        )
+    if not 0 < drop_pct < 100:
+        raise HTTPException(
+            status_code=400, detail="drop_pct must be between 0 and 100"
+        )
+
+    try:
+        fetched_from = history_start(start_date, end_date)
+        async with get_engine().connect() as connection:
+            rows = (
+                await connection.execute(
+                    COW_ANALYTICS_SQL,
+                    {
+                        "farm_id": farm_id,
+                        "start_date": fetched_from,
+                        "end_date": end_date,
+                    },
+                )
+            ).fetchall()
+
+        return [
+            CowAnalyticsResponse(**item)
+            for item in cow_analytics(
+                rows, start_date, end_date, fetched_from, drop_pct
+            )
+        ]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving cow analytics: {str(e)}"
+        )
+
+
+@app.get(
+    "/reports/farm/{farm_id}/milk-anomalies",
+    response_model=List[MilkAnomalyResponse],
+)
+@cached(get_report_cache, farm_tags)
+async def get_farm_milk_anomalies(
+    farm_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    followup_days: int = 14,
+    limit: int = 100,
+):
+    """Yield drops flagged by ``manage.py detect_milk_anomalies``, newest first.
+
+    ``health_date`` is the first ``health`` activity of the cow within
+    ``followup_days`` of the drop. Defaults to the last 30 days.
+    """
+    if not end_date:
+        end_date = datetime.now().date()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
+    limit = max(1, min(limit, 1000))
+
+    try:
+        async with get_engine().connect() as connection:
+            result = (
+                await connection.execute(
+                    FARM_MILK_ANOMALIES_SQL,
+                    {
+                        "farm_id": farm_id,
+                        "start_date": start_date,
+                        "end_date": end_date,
+                        "followup_days": followup_days,
+                        "limit": limit,
+                    },
+                )
+            ).fetchall()
+
+            return [
+                MilkAnomalyResponse(
+                    cow_id=row.cow_id,
+                    cow_tag=row.cow_tag,
+                    date=row.date,
+                    liters=float(row.liters),
+                    baseline=float(row.baseline),
+                    score=row.score,
+                    health_date=row.health_date,
+                )
+                for row in result
+            ]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving milk anomalies: {str(e)}"
+        )
+
+
 @app.get(
     "/reports/farmer/{user_id}/summary",
     response_model=FarmerSummaryResponse,
 )
+@cached(get_report_cache, farmer_tags)
 async def get_farmer_summary(
     user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None
 ):
     """Get a farmer's summary: cows owned and total milk (optional date range)."""
 
     try:
-        # Default date window to full range if not provided
-        if start_date is None:
-            start_date = date.min.replace(year=1970)
-        if end_date is None:
-            end_date = date.max.replace(year=9999)
-
-        with get_engine().connect() as connection:
-            # Find FarmerProfile and farm details for the given user
-            farmer_query = text(
-                """
-                SELECT fp.id as farmer_profile_id, f.id as farm_id, f.name as farm_name,
-                       u.username as username
-                FROM farms_farmerprofile fp
-                JOIN farms_farm f ON fp.farm_id = f.id
-                JOIN accounts_user u ON fp.user_id = u.id
-                WHERE fp.user_id = :user_id
-                LIMIT 1
-                """
-            )
-            farmer_row = connection.execute(
-                farmer_query, {"user_id": user_id}
+        start_date, end_date = farmer_date_window(start_date, end_date)
+
+        async with get_engine().connect() as connection:
+            row = (
+                await connection.execute(
+                    FARMER_SUMMARY_SQL,
+                    {
+                        "user_ids": [user_id],
+                        "start_date": start_date,
+                        "end_date": end_date,
+                    },
+                )
             ).fetchone()
 
-            if not farmer_row:
+            if not row:
                 raise HTTPException(
                     status_code=404,
                     detail=f"Farmer profile for user {user_id} not found",
                 )
 
-            # Count cows owned by this farmer
-            cow_count_row = connection.execute(
-                text(
-                    """
-                    SELECT COUNT(*) AS cow_count
-                    FROM livestock_cow
-                    WHERE owner_id = :farmer_profile_id
-                    """
-                ),
-                {"farmer_profile_id": farmer_row.farmer_profile_id},
-            ).fetchone()
-
-            # Sum milk for cows owned by this farmer within date range
-            milk_sum_row = connection.execute(
-                text(
-                    """
-                    SELECT COALESCE(SUM(mr.liters), 0) AS total_milk
-                    FROM production_milkrecord mr
-                    JOIN livestock_cow c ON mr.cow_id = c.id
-                    WHERE c.owner_id = :farmer_profile_id
-                      AND mr.date >= :start_date AND mr.date <= :end_date
-                    """
-                ),
-                {
-                    "farmer_profile_id": farmer_row.farmer_profile_id,
-                    "start_date": start_date,
-                    "end_date": end_date,
-                },
-            ).fetchone()
-
-            return FarmerSummaryResponse(
-                farmer_user_id=user_id,
-                farmer_username=farmer_row.username,
-                farm_id=farmer_row.farm_id,
-                farm_name=farmer_row.farm_name,
-                total_cows=cow_count_row.cow_count,
-                total_milk_production=float(milk_sum_row.total_milk),
-            )
+            return farmer_summary_from_row(row)
 
     except Exception as e:
         if isinstance(e, HTTPException):
@@ -367,6 +613,35 @@ async def get_farmer_summary(
         )
 
 
+@app.get("/reports/farmers/summary", response_model=List[FarmerSummaryResponse])
+@cached(get_report_cache, farmer_summaries_tags)
+async def get_farmer_summaries(
+    user_ids: str, start_date: Optional[date] = None, end_date: Optional[date] = None
+):
+    """Get summaries for many farmers in one query, e.g. ``?user_ids=4,5``.
+
+    Users without a farmer profile are omitted from the result.
+    """
+
+    ids = parse_ids(user_ids, "user_ids")
+    try:
+        start_date, end_date = farmer_date_window(start_date, end_date)
+
+        async with get_engine().connect() as connection:
+            rows = (
+                await connection.execute(
+                    FARMER_SUMMARY_SQL,
+                    {"user_ids": ids, "start_date": start_date, "end_date": end_date},
+                )
+            ).fetchall()
+            return [farmer_summary_from_row(row) for row in rows]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error retrieving farmer summaries: {str(e)}"
+        )
+
+
 class RecentActivity(BaseModel):
     id: int
     date: date
@@ -381,31 +656,21 @@ class RecentActivity(BaseModel):
     "/reports/activities/recent",
     response_model=List[RecentActivity],
 )
+@cached(get_report_cache, recent_activities_tags)
 async def get_recent_activities(farm_id: Optional[int] = None, limit: int = 20):
     """Get recent activities across the platform, optionally filtered by farm."""
 
     try:
         limit = max(1, min(limit, 200))  # clamp for safety
-        with get_engine().connect() as connection:
-            base_sql = """
-                SELECT a.id, a.date, a.type,
-                       c.tag as cow_tag, c.breed as cow_breed,
-                       f.id as farm_id, f.name as farm_name
-                FROM livestock_activity a
-                JOIN livestock_cow c ON a.cow_id = c.id
-                JOIN farms_farm f ON c.farm_id = f.id
-                {where}
-                ORDER BY a.date DESC, a.id DESC
-                LIMIT :limit
-                """
+        async with get_engine().connect() as connection:
             params = {"limit": limit}
             if farm_id is not None:
-                sql = text(base_sql.format(where="WHERE f.id = :farm_id"))
+                sql = RECENT_FARM_ACTIVITIES_SQL
                 params["farm_id"] = farm_id
             else:
-                sql = text(base_sql.format(where=""))
+                sql = RECENT_ACTIVITIES_SQL
 
-            rows = connection.execute(sql, params).fetchall()
+            rows = (await connection.execute(sql, params)).fetchall()
             return [
                 RecentActivity(
                     id=row.id,
@@ -424,26 +689,161 @@ async def get_recent_activities(farm_id: Optional[int] = None, limit: int = 20):
         )
 
 
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def encode_rows(columns, rows, output):
+    """Encode one partition of rows as CSV lines or NDJSON."""
+    if output == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(columns, row)), default=str, separators=(",", ":"))
+            + "\n"
+            for row in rows
+        )
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+def export_response(sql, params, columns, output, filename):
+    """Stream a query through a server-side cursor, one partition at a time."""
+
+    async def body():
+        if output == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(columns)
+            yield buffer.getvalue()
+        async with get_engine().connect() as connection:
+            result = await connection.stream(
+                sql, params, execution_options={"yield_per": EXPORT_CHUNK_SIZE}
+            )
+            async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+                yield encode_rows(columns, rows, output)
+
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[output],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{output}"'},
+    )
+
+
+async def api_user(request: Request) -> ApiUser:
+    """The API user behind the request's bearer token (401 without one)."""
+    claims = decode_access_token(
+        request.headers.get("authorization", ""), JWT_SIGNING_KEY
+    )
+    async with get_engine().connect() as connection:
+        return await load_api_user(connection, claims)
+
+
+@app.get("/exports/milk-records")
+async def export_milk_records(
+    farm_id: Optional[int] = None,
+    cow_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    output: Literal["csv", "ndjson"] = "csv",
+    user: ApiUser = Depends(api_user),
+):
+    """Stream the caller's milk records (oldest first) as CSV or NDJSON.
+
+    Rows are limited like ``/api/milk-records/``: agents get their farms,
+    farmers their own cows. Memory stays flat.
+    """
+    params = {
+        "farm_id": farm_id,
+        "cow_id": cow_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        **user.scope_params(),
+    }
+    return export_response(
+        milk_export_sql(params),
+        {k: v for k, v in params.items() if v is not None},
+        MILK_EXPORT_COLUMNS,
+        output,
+        "milk-records",
+    )
+
+
+@app.get("/exports/activities")
+async def export_activities(
+    farm_id: Optional[int] = None,
+    cow_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    output: Literal["csv", "ndjson"] = "csv",
+    user: ApiUser = Depends(api_user),
+):
+    """Stream the caller's activities (oldest first) as CSV or NDJSON.
+
+    Scoped like :func:`export_milk_records`.
+    """
+    params = {
+        "farm_id": farm_id,
+        "cow_id": cow_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        **user.scope_params(),
+    }
+    return export_response(
+        activity_export_sql(params),
+        {k: v for k, v in params.items() if v is not None},
+        ACTIVITY_EXPORT_COLUMNS,
+        output,
+        "activities",
+    )
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Report cache hit/miss counters for this worker process."""
+    cache = get_report_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@app.get("/internal/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint: per-route latency, query and serializer histograms."""
+    if METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "")
+        allowed = hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}")
+    else:
+        allowed = (
+            request.client is not None and request.client.host in METRICS_ALLOWED_IPS
+        )
+    if not allowed:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return PlainTextResponse(
+        render(metrics_registry.collect()), media_type=CONTENT_TYPE
+    )
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
 @app.get("/health/db")
-def health_db():
+async def health_db():
     """Lightweight DB connectivity check for diagnostics."""
     try:
-        with get_engine().connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with get_engine().connect() as conn:
+            await conn.execute(text("SELECT 1"))
         return {"status": "ok"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"db_error: {e}")
 
 
 @app.get("/report/summary")
-def summary():
+async def summary():
     """Simple aggregated counts. Expand later with proper ORM models."""
-    with get_engine().connect() as conn:
+    async with get_engine().connect() as conn:
         counts = {}
         for table in [
             "accounts_user",
@@ -454,7 +854,7 @@ def summary():
             "production_milkrecord",
         ]:
             try:
-                result = conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
+                result = await conn.execute(text(f"SELECT COUNT(*) FROM {table}"))
                 counts[table] = result.scalar_one()
             except Exception as e:
                 counts[table] = f"error: {e}"  # helpful during setup
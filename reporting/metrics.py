@@ -0,0 +1,118 @@
+"""
+Per-request SQL and latency metrics for the reporting service.
+
+The registry, histograms and Prometheus rendering are shared with the Django
+app (``shared/metrics.py``), so one dashboard covers both services; this
+module only hooks them into FastAPI: :class:`RequestMetricsMiddleware` times
+each request, SQLAlchemy cursor events registered by :func:`instrument_engine`
+count its queries and their time, and :class:`TimedJSONResponse` measures
+the JSON rendering of the response as serializer time. Totals are returned in
+a ``Server-Timing`` header and added to histograms labelled by method and
+route template (``/reports/farm/{farm_id}/summary``). Cache hits show up as
+requests without queries.
+
+With several workers, set ``REPORTING_METRICS_DIR`` to a directory they share:
+each worker writes its totals there every ``METRICS_FLUSH_SECONDS``, scrapes
+add up the files, and ``gunicorn.conf.py`` folds the files of exited workers
+into an archive.
+"""
+import sys
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+REPO_ROOT = str(Path(__file__).resolve().parents[1])
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+# Re-exported for main.py and gunicorn.conf.py.
+from shared.metrics import (  # noqa: E402, F401
+    CONTENT_TYPE,
+    Registry,
+    RequestStats,
+    clear_dir,
+    merge_dead_process,
+    render,
+)
+
+_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_metrics", default=None)
+
+
+def instrument_engine(engine) -> None:
+    """Count the queries of an (async) engine towards the current request."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after(conn, cursor, statement, parameters, context, executemany):
+        stats = _stats.get()
+        started = getattr(context, "_metrics_started", None)
+        if stats is not None and started is not None:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - started
+
+
+class TimedJSONResponse(JSONResponse):
+    """``JSONResponse`` counting its rendering as serializer time."""
+
+    def render(self, content) -> bytes:
+        started = time.perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            stats = _stats.get()
+            if stats is not None:
+                stats.serializer_time += time.perf_counter() - started
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording every HTTP request in ``registry``.
+
+    The ``Server-Timing`` header covers the work done before the response
+    starts; the histograms also include streamed bodies (the exports).
+    """
+
+    def __init__(self, app, registry: Registry, server_timing: bool = True):
+        self.app = app
+        self.registry = registry
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats()
+        token = _stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    value = stats.server_timing(time.perf_counter() - started)
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", value.encode("latin-1")),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _stats.reset(token)
+            route = scope.get("route")
+            self.registry.observe(
+                (scope["method"], getattr(route, "path", "unmatched")),
+                status,
+                stats.observations(time.perf_counter() - started),
+            )
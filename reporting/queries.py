@@ -0,0 +1,222 @@
+"""
+SQL used by the reporting endpoints.
+
+Kept apart from ``main`` so tooling (e.g. ``manage.py explain_queries``) can
+inspect the exact statements the service runs without importing the app.
+"""
+from sqlalchemy import text
+
+GENERAL_SUMMARY_SQL = text(
+    """
+    SELECT
+        (SELECT COUNT(*) FROM farms_farm) AS farm_count,
+        (SELECT COUNT(*) FROM farms_farmerprofile) AS farmer_count,
+        (SELECT COUNT(*) FROM livestock_cow) AS cow_count,
+        (SELECT COALESCE(SUM(total_liters), 0) FROM production_dailymilkrollup)
+            AS total_milk
+"""
+)
+
+FARM_SUMMARY_SQL = text(
+    """
+    SELECT
+        f.id,
+        f.name,
+        (SELECT COUNT(*) FROM farms_farmerprofile fp WHERE fp.farm_id = f.id)
+            AS farmer_count,
+        (SELECT COUNT(*) FROM livestock_cow c WHERE c.farm_id = f.id) AS cow_count,
+        (SELECT COALESCE(SUM(r.total_liters), 0)
+           FROM production_dailymilkrollup r
+          WHERE r.farm_id = f.id) AS total_milk
+    FROM farms_farm f
+    WHERE f.id = ANY(:farm_ids)
+    ORDER BY f.id
+"""
+)
+
+FARMER_SUMMARY_SQL = text(
+    """
+    SELECT
+        fp.user_id,
+        u.username,
+        f.id AS farm_id,
+        f.name AS farm_name,
+        (SELECT COUNT(*) FROM livestock_cow c WHERE c.owner_id = fp.id) AS cow_count,
+        (SELECT COALESCE(SUM(r.total_liters), 0)
+           FROM production_dailymilkrollup r
+          WHERE r.owner_id = fp.id
+            AND r.date >= :start_date AND r.date <= :end_date) AS total_milk
+    FROM farms_farmerprofile fp
+    JOIN farms_farm f ON fp.farm_id = f.id
+    JOIN accounts_user u ON fp.user_id = u.id
+    WHERE fp.user_id = ANY(:user_ids)
+    ORDER BY fp.user_id
+"""
+)
+
+
+FARM_MILK_PRODUCTION_SQL = text(
+    """
+    SELECT
+        c.tag AS cow_tag,
+        c.breed,
+        COALESCE(SUM(mr.liters), 0) AS total_liters,
+        COUNT(mr.id) AS record_count
+    FROM livestock_cow c
+    LEFT JOIN production_milkrecord mr ON c.id = mr.cow_id
+    WHERE c.farm_id = :farm_id
+    GROUP BY c.id, c.tag, c.breed
+    ORDER BY total_liters DESC
+"""
+)
+
+FARM_DAILY_MILK_SQL = text(
+    """
+    SELECT
+        r.date,
+        SUM(r.total_liters) AS total_liters,
+        SUM(r.cow_count) AS cow_count
+    FROM production_dailymilkrollup r
+    WHERE r.farm_id = :farm_id
+        AND r.date >= :start_date
+        AND r.date <= :end_date
+    GROUP BY r.date
+    ORDER BY r.date DESC
+"""
+)
+
+_RECENT_ACTIVITIES = """
+    SELECT a.id, a.date, a.type,
+           c.tag AS cow_tag, c.breed AS cow_breed,
+           f.id AS farm_id, f.name AS farm_name
+    FROM livestock_activity a
+    JOIN livestock_cow c ON a.cow_id = c.id
+    JOIN farms_farm f ON c.farm_id = f.id
+    {where}
+    ORDER BY a.date DESC, a.id DESC
+    LIMIT :limit
+"""
+
+RECENT_ACTIVITIES_SQL = text(_RECENT_ACTIVITIES.format(where=""))
+RECENT_FARM_ACTIVITIES_SQL = text(
+    _RECENT_ACTIVITIES.format(where="WHERE c.farm_id = :farm_id")
+)
+
+# One row per cow; its records in the window are packed into one bytea of
+# big-endian int4 pairs (day offset from :start_date, centiliters) so NumPy can
+# decode a whole farm with ``frombuffer`` instead of a Python row per record.
+COW_ANALYTICS_SQL = text(
+    """
+    SELECT
+        c.id AS cow_id,
+        c.tag,
+        c.breed,
+        (SELECT MAX(a.date)
+           FROM livestock_activity a
+          WHERE a.cow_id = c.id AND a.type = 'birth' AND a.date <= :end_date)
+            AS last_birth,
+        m.records
+    FROM livestock_cow c
+    LEFT JOIN (
+        SELECT
+            mr.cow_id,
+            string_agg(
+                int4send(mr.date - CAST(:start_date AS date))
+                    || int4send((mr.liters * 100)::int4),
+                ''::bytea
+            ) AS records
+        FROM production_milkrecord mr
+        JOIN livestock_cow fc ON fc.id = mr.cow_id
+        WHERE fc.farm_id = :farm_id
+          AND mr.date BETWEEN :start_date AND :end_date
+        GROUP BY mr.cow_id
+    ) m ON m.cow_id = c.id
+    WHERE c.farm_id = :farm_id
+    ORDER BY c.id
+"""
+)
+
+# Flagged yield drops (written by the Django ``detect_milk_anomalies`` job) with
+# the first ``health`` activity recorded in the follow-up window, if any.
+FARM_MILK_ANOMALIES_SQL = text(
+    """
+    SELECT
+        a.cow_id,
+        c.tag AS cow_tag,
+        a.date,
+        a.liters,
+        a.baseline,
+        a.score,
+        (SELECT MIN(h.date)
+           FROM livestock_activity h
+          WHERE h.cow_id = a.cow_id AND h.type = 'health'
+            AND h.date BETWEEN a.date AND a.date + :followup_days) AS health_date
+    FROM production_milkanomaly a
+    JOIN livestock_cow c ON c.id = a.cow_id
+    WHERE c.farm_id = :farm_id
+      AND a.date BETWEEN :start_date AND :end_date
+    ORDER BY a.date DESC, a.score
+    LIMIT :limit
+"""
+)
+
+# Exports: WHERE is assembled from fixed fragments for the filters supplied.
+MILK_EXPORT_COLUMNS = ["id", "cow_id", "cow_tag", "farm_id", "date", "liters"]
+_MILK_EXPORT = """
+    SELECT mr.id, mr.cow_id, c.tag AS cow_tag, c.farm_id, mr.date, mr.liters
+    FROM production_milkrecord mr
+    JOIN livestock_cow c ON c.id = mr.cow_id
+    {where}
+    ORDER BY mr.date, mr.id
+"""
+_MILK_EXPORT_FILTERS = {
+    "farm_id": "c.farm_id = :farm_id",
+    "cow_id": "mr.cow_id = :cow_id",
+    "date_from": "mr.date >= :date_from",
+    "date_to": "mr.date <= :date_to",
+    # Role scoping (see auth.ApiUser.scope_params).
+    "agent_id": "c.farm_id IN (SELECT id FROM farms_farm WHERE agent_id = :agent_id)",
+    "owner_user_id": (
+        "c.owner_id IN "
+        "(SELECT id FROM farms_farmerprofile WHERE user_id = :owner_user_id)"
+    ),
+}
+
+ACTIVITY_EXPORT_COLUMNS = [
+    "id",
+    "cow_id",
+    "cow_tag",
+    "farm_id",
+    "type",
+    "date",
+    "notes",
+]
+_ACTIVITY_EXPORT = """
+    SELECT a.id, a.cow_id, c.tag AS cow_tag, c.farm_id, a.type, a.date, a.notes
+    FROM livestock_activity a
+    JOIN livestock_cow c ON c.id = a.cow_id
+    {where}
+    ORDER BY a.date, a.id
+"""
+_ACTIVITY_EXPORT_FILTERS = {
+    "farm_id": "c.farm_id = :farm_id",
+    "cow_id": "a.cow_id = :cow_id",
+    "date_from": "a.date >= :date_from",
+    "date_to": "a.date <= :date_to",
+    "agent_id": _MILK_EXPORT_FILTERS["agent_id"],
+    "owner_user_id": _MILK_EXPORT_FILTERS["owner_user_id"],
+}
+
+
+def _export_sql(template, fragments, params):
+    conditions = [fragments[name] for name in fragments if params.get(name) is not None]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return text(template.format(where=where))
+
+
+def milk_export_sql(params):
+    return _export_sql(_MILK_EXPORT, _MILK_EXPORT_FILTERS, params)
+
+
+def activity_export_sql(params):
+    return _export_sql(_ACTIVITY_EXPORT, _ACTIVITY_EXPORT_FILTERS, params)
@@ -2,12 +2,16 @@
 """
 Test script for FarmHub Reporting API endpoints
 """
+import json
 import sys
 import os
+import time
+
+import jwt
 
 sys.path.append(os.path.dirname(__file__))
 
-from main import app
+from main import JWT_SIGNING_KEY, app
 from fastapi.testclient import TestClient
 
 # Create test client
@@ -44,6 +48,18 @@ def test_farm_summary_endpoint():
     return response.status_code == 200
 
 
+def test_farm_summaries_batch_endpoint():
+    """Test the batched farm summary endpoint"""
+    response = client.get("/reports/farms/summary?ids=1,2,3")
+    print(f"Farm summaries (batch): {response.status_code}")
+    if response.status_code == 200:
+        for farm in response.json():
+            print(f"  {farm['farm_id']}: {farm['farm_name']}")
+    else:
+        print(f"  Error: {response.text}")
+    return response.status_code == 200
+
+
 def test_farm_milk_production_endpoint():
     """Test the farm milk production endpoint"""
     farm_id = 1
@@ -78,6 +94,78 @@ def test_farm_daily_milk_endpoint():
     return response.status_code == 200
 
 
+COW_ANALYTICS_KEYS = {
+    "cow_id",
+    "cow_tag",
+    "cow_breed",
+    "record_count",
+    "total_liters",
+    "avg_7d",
+    "avg_30d",
+    "peak_liters",
+    "peak_date",
+    "last_birth",
+    "days_in_milk",
+    "drop_count",
+    "last_drop_date",
+}
+
+
+def test_farm_cow_analytics_endpoint():
+    """Test the per-cow analytics endpoint"""
+    farm_id = 1
+    response = client.get(f"/reports/farm/{farm_id}/cow-analytics")
+    print(f"Farm {farm_id} cow analytics: {response.status_code}")
+    assert response.status_code == 200, response.text
+    cows = response.json()
+    assert isinstance(cows, list)
+    for cow in cows:
+        assert set(cow) == COW_ANALYTICS_KEYS
+        assert cow["record_count"] >= cow["drop_count"] >= 0
+        print(
+            f"    {cow['cow_tag']}: 7d avg {cow['avg_7d']}, 30d avg {cow['avg_30d']}, "
+            f"peak {cow['peak_liters']}, {cow['drop_count']} drops"
+        )
+
+    invalid = client.get(
+        f"/reports/farm/{farm_id}/cow-analytics?start_date=2025-02-01&end_date=2025-01-01"
+    )
+    assert invalid.status_code == 400, invalid.text
+    too_long = client.get(
+        f"/reports/farm/{farm_id}/cow-analytics?start_date=1900-01-01&end_date=2025-01-01"
+    )
+    assert too_long.status_code == 400, too_long.text
+    assert "at most" in too_long.json()["detail"]
+    bad_drop = client.get(f"/reports/farm/{farm_id}/cow-analytics?drop_pct=150")
+    assert bad_drop.status_code == 400, bad_drop.text
+
+
+def test_farm_milk_anomalies_endpoint():
+    """Test the milk anomalies endpoint"""
+    farm_id = 1
+    response = client.get(f"/reports/farm/{farm_id}/milk-anomalies")
+    print(f"Farm {farm_id} milk anomalies: {response.status_code}")
+    assert response.status_code == 200, response.text
+    anomalies = response.json()
+    assert isinstance(anomalies, list)
+    for anomaly in anomalies:
+        assert set(anomaly) == {
+            "cow_id",
+            "cow_tag",
+            "date",
+            "liters",
+            "baseline",
+            "score",
+            "health_date",
+        }
+        assert anomaly["liters"] < anomaly["baseline"]
+    for anomaly in anomalies[:3]:
+        print(
+            f"    {anomaly['cow_tag']} {anomaly['date']}: {anomaly['liters']} L "
+            f"(baseline {anomaly['baseline']} L, score {anomaly['score']})"
+        )
+
+
 def test_farmer_summary_endpoint():
     """Test the farmer summary endpoint"""
     # seeded farmer user_id is likely 3 based on migrations order, but we don't enforce here
@@ -89,6 +177,13 @@ def test_farmer_summary_endpoint():
     return response.status_code in (200, 404)
 
 
+def test_farmer_summaries_batch_endpoint():
+    """Test the batched farmer summary endpoint"""
+    response = client.get("/reports/farmers/summary?user_ids=1,2,3")
+    print(f"Farmer summaries (batch): {response.status_code}")
+    return response.status_code == 200
+
+
 def test_recent_activities_endpoint():
     """Test the recent activities endpoint"""
     response = client.get("/reports/activities/recent?limit=5")
@@ -96,6 +191,49 @@ def test_recent_activities_endpoint():
     return response.status_code == 200
 
 
+def access_token(user_id):
+    """An API access token for ``user_id`` (1 is the seeded superadmin)."""
+    claims = {"token_type": "access", "user_id": str(user_id), "exp": time.time() + 60}
+    return jwt.encode(claims, JWT_SIGNING_KEY, algorithm="HS256")
+
+
+def test_milk_records_export_endpoint():
+    """Test the streamed milk record export (CSV and NDJSON)"""
+    anonymous = client.get("/exports/milk-records?farm_id=1")
+    print(f"Milk records export without a token: {anonymous.status_code}")
+    assert anonymous.status_code == 401
+    garbage = client.get(
+        "/exports/milk-records?farm_id=1", headers={"Authorization": "Bearer x"}
+    )
+    assert garbage.status_code == 401
+
+    headers = {"Authorization": f"Bearer {access_token(1)}"}
+    response = client.get("/exports/milk-records?farm_id=1", headers=headers)
+    lines = response.text.splitlines()
+    print(f"Milk records export (csv): {response.status_code} - {len(lines) - 1} rows")
+    assert response.status_code == 200, response.text
+    assert lines[0].startswith("id,cow_id,")
+    ndjson = client.get(
+        "/exports/milk-records?farm_id=1&output=ndjson", headers=headers
+    )
+    print(f"Milk records export (ndjson): {ndjson.status_code}")
+    assert ndjson.status_code == 200, ndjson.text
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert len(rows) == len(lines) - 1
+    assert all(row["farm_id"] == 1 for row in rows)
+
+
+def test_request_metrics():
+    """Test the Server-Timing header and the scrape endpoint's access check"""
+    response = client.get("/reports/farm/1/daily-milk")
+    timing = response.headers.get("server-timing", "")
+    print(f"Server-Timing: {timing}")
+    scrape = client.get("/internal/metrics")
+    print(f"Metrics from the test client: {scrape.status_code}")
+    assert "db;dur=" in timing and "total;dur=" in timing
+    assert scrape.status_code == 403
+
+
 if __name__ == "__main__":
     print("Testing FarmHub Reporting API endpoints...")
     print("=" * 50)
@@ -105,17 +243,24 @@ if __name__ == "__main__":
         ("Health", test_health_endpoint),
         ("Summary", test_summary_endpoint),
         ("Farm Summary", test_farm_summary_endpoint),
+        ("Farm Summaries (batch)", test_farm_summaries_batch_endpoint),
         ("Farm Milk Production", test_farm_milk_production_endpoint),
         ("Farm Daily Milk", test_farm_daily_milk_endpoint),
+        ("Farm Cow Analytics", test_farm_cow_analytics_endpoint),
+        ("Farm Milk Anomalies", test_farm_milk_anomalies_endpoint),
         ("Farmer Summary", test_farmer_summary_endpoint),
+        ("Farmer Summaries (batch)", test_farmer_summaries_batch_endpoint),
         ("Recent Activities", test_recent_activities_endpoint),
+        ("Milk Records Export", test_milk_records_export_endpoint),
+        ("Request Metrics", test_request_metrics),
     ]
 
     results = []
     for test_name, test_func in tests:
         print(f"\n{test_name} Test:")
         try:
-            success = test_func()
+            # Older checks return a bool, newer ones assert.
+            success = test_func() is not False
             results.append((test_name, success))
         except Exception as e:
             print(f"  Error: {str(e)}")
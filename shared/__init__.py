@@ -0,0 +1,7 @@
+"""Code used by both the Django API (``core``) and the reporting service.
+
+Neither service is installed as a package: each runs from its own directory
+(``core/`` and ``reporting/``), so the modules that import from here append
+the repository root to ``sys.path`` first. Keep this package free of Django,
+FastAPI and SQLAlchemy imports.
+"""
@@ -0,0 +1,255 @@
+"""
+Request metrics registry shared by the API and the reporting service.
+
+Both services record the same series, so one dashboard covers them: the
+framework-specific middleware (``core/common/metrics.py``,
+``reporting/metrics.py``) fills a :class:`RequestStats` per request and hands
+the totals to :meth:`Registry.observe`; :func:`render` writes the Prometheus
+text format.
+
+Histograms are kept per process. When the registry has a directory, each
+worker writes its totals there from a background thread every
+``flush_seconds``, :meth:`Registry.collect` adds up all the files, and the
+gunicorn hooks call :func:`clear_dir` at startup and
+:func:`merge_dead_process` when a worker exits, so recycled workers do not
+reset the counters.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+REQUESTS = "farmhub_http_requests_total"
+HISTOGRAMS = {
+    "farmhub_http_request_duration_seconds": (
+        "Request latency in seconds.",
+        LATENCY_BUCKETS,
+    ),
+    "farmhub_db_queries": ("SQL queries per request.", QUERY_BUCKETS),
+    "farmhub_db_duration_seconds": (
+        "Time spent in SQL queries per request, in seconds.",
+        LATENCY_BUCKETS,
+    ),
+    "farmhub_serializer_duration_seconds": (
+        "Time spent serializing response data per request, in seconds.",
+        LATENCY_BUCKETS,
+    ),
+}
+ARCHIVE = "archive.json"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestStats:
+    """SQL and serializer totals of one request."""
+
+    __slots__ = ("queries", "db_time", "serializer_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def observations(self, total: float) -> Dict[str, float]:
+        """Histogram values of the request, ``total`` being its latency."""
+        return {
+            "farmhub_http_request_duration_seconds": total,
+            "farmhub_db_queries": self.queries,
+            "farmhub_db_duration_seconds": self.db_time,
+            "farmhub_serializer_duration_seconds": self.serializer_time,
+        }
+
+    def server_timing(self, total: float) -> str:
+        """``Server-Timing`` header value, ``total`` being the latency so far."""
+        return (
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries", '
+            f"serialize;dur={self.serializer_time * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}"
+        )
+
+
+def _empty() -> dict:
+    return {"requests": {}, "histograms": {name: {} for name in HISTOGRAMS}}
+
+
+def _merge(into: dict, snapshot: dict) -> dict:
+    for key, count in snapshot["requests"].items():
+        into["requests"][key] = into["requests"].get(key, 0) + count
+    for name, series in snapshot["histograms"].items():
+        target = into["histograms"].setdefault(name, {})
+        for key, values in series.items():
+            if key in target:
+                target[key] = [a + b for a, b in zip(target[key], values)]
+            else:
+                target[key] = list(values)
+    return into
+
+
+def _read(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def _write(path: Path, snapshot: dict) -> None:
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(json.dumps(snapshot))
+    os.replace(temporary, path)
+
+
+class Registry:
+    """Request counters and histograms of this process.
+
+    Series keys are tab-joined label values; a histogram series holds the
+    per-bucket counts (the last one for ``+Inf``) followed by the sum.
+    """
+
+    def __init__(self, directory: str = "", flush_seconds: float = 1.0):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._name = f"{self._pid}-{uuid.uuid4().hex[:8]}.json"
+        self._data = _empty()
+        self._dirty = False
+        # Threads do not survive a fork, so each worker starts its own.
+        self._flusher: Optional[threading.Thread] = None
+
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            # Forked from a preloaded master: start a file of our own.
+            self._reset()
+
+    def observe(
+        self, labels: Tuple[str, ...], status: int, values: Dict[str, float]
+    ) -> None:
+        """Record one request; ``values`` maps histogram names to observations."""
+        key = "\t".join(labels)
+        with self._lock:
+            self._check_fork()
+            requests = self._data["requests"]
+            counter = f"{key}\t{status}"
+            requests[counter] = requests.get(counter, 0) + 1
+            for name, value in values.items():
+                buckets = HISTOGRAMS[name][1]
+                series = self._data["histograms"][name].get(key)
+                if series is None:
+                    series = self._data["histograms"][name][key] = [0] * (
+                        len(buckets) + 2
+                    )
+                series[bisect_left(buckets, value)] += 1
+                series[-1] += value
+            self._dirty = True
+            start_flusher = bool(self.directory) and self._flusher is None
+            if start_flusher:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        if start_flusher:
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            if self._dirty:
+                self.flush()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._check_fork()
+            return json.loads(json.dumps(self._data))
+
+    def flush(self) -> None:
+        # One writer at a time, so an older snapshot never replaces a newer one.
+        with self._flush_lock:
+            self._dirty = False
+            snapshot = self.snapshot()
+            _write(Path(self.directory) / self._name, snapshot)
+
+    def collect(self) -> dict:
+        """Totals of every worker sharing the directory (or just this one)."""
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        return collect_dir(self.directory)
+
+
+def collect_dir(directory: str) -> dict:
+    root = Path(directory)
+    for _ in range(3):
+        # List first: a file folded into the archive after this point is
+        # either still readable or already listed as merged in the archive.
+        files = sorted(root.glob("*-*.json"))
+        archive = root / ARCHIVE
+        totals = _read(archive) if archive.exists() else {**_empty(), "merged": []}
+        merged = set(totals.pop("merged"))
+        try:
+            for path in files:
+                if path.name not in merged:
+                    _merge(totals, _read(path))
+        except FileNotFoundError:
+            continue
+        return totals
+    return totals
+
+
+def merge_dead_process(directory: str, pid: int) -> None:
+    """Fold the files of exited worker ``pid`` into the archive (``child_exit``)."""
+    root = Path(directory)
+    files = list(root.glob(f"{pid}-*.json"))
+    if not files:
+        return
+    archive = root / ARCHIVE
+    totals = _read(archive) if archive.exists() else {**_empty(), "merged": []}
+    totals["merged"] = [name for name in totals["merged"] if (root / name).exists()]
+    for path in files:
+        _merge(totals, _read(path))
+        totals["merged"].append(path.name)
+    _write(archive, totals)
+    for path in files:
+        path.unlink()
+
+
+def clear_dir(directory: str) -> None:
+    """Remove the files of a previous run (``on_starting``)."""
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    for path in root.glob("*.json"):
+        path.unlink()
+
+
+def _labels(names: Tuple[str, ...], key: str) -> str:
+    return ",".join(
+        '{}="{}"'.format(
+            name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(names, key.split("\t"))
+    )
+
+
+def render(snapshot: dict) -> str:
+    """Prometheus text exposition of a registry snapshot."""
+    lines = [
+        f"# HELP {REQUESTS} Requests by method, route and status.",
+        f"# TYPE {REQUESTS} counter",
+    ]
+    for key, count in sorted(snapshot["requests"].items()):
+        labels = _labels(("method", "route", "status"), key)
+        lines.append(f"{REQUESTS}{{{labels}}} {count}")
+    for name, (description, buckets) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for key, series in sorted(snapshot["histograms"].get(name, {}).items()):
+            labels = _labels(("method", "route"), key)
+            cumulative = 0
+            for bound, count in zip((*buckets, "+Inf"), series[:-1]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {series[-1]:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+    return "\n".join(lines) + "\n"